@@ -0,0 +1,38 @@
+"""add_llm_usage_columns
+
+Revision ID: 8f2c1d7e4b90
+Revises: 3a933d9e6d4b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c1d7e4b90'
+down_revision: Union[str, Sequence[str], None] = '3a933d9e6d4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Token usage and latency of the LLM call that produced an assistant message
+    op.add_column('messages', sa.Column('llm_model', sa.String(255), nullable=True))
+    op.add_column('messages', sa.Column('prompt_tokens', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('completion_tokens', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('latency_ms', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('ttft_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('ttft_ms')
+        batch_op.drop_column('latency_ms')
+        batch_op.drop_column('completion_tokens')
+        batch_op.drop_column('prompt_tokens')
+        batch_op.drop_column('llm_model')
@@ -0,0 +1,36 @@
+"""add_user_quota_usage
+
+Revision ID: c4e7a2b9d315
+Revises: 8f2c1d7e4b90
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a2b9d315'
+down_revision: Union[str, Sequence[str], None] = '8f2c1d7e4b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-minute quota counters checkpointed from memory
+    op.create_table(
+        'user_quota_usage',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.Integer(), nullable=False),
+        sa.Column('requests', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('tokens', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'bucket_start'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_quota_usage')
@@ -58,6 +58,38 @@ export interface TopUser {
   last_active: string;
 }
 
+/**
+ * Расход токенов и задержка ответов LLM за период
+ */
+export interface LLMUsageStats {
+  /** Количество ответов LLM */
+  responses: number;
+  /** Суммарные токены промптов */
+  prompt_tokens: number;
+  /** Суммарные токены ответов */
+  completion_tokens: number;
+  /** Средняя задержка ответа (мс) */
+  avg_latency_ms: number;
+  /** Максимальная задержка ответа (мс) */
+  max_latency_ms: number;
+  /** Среднее время до первого фрагмента потокового ответа (мс) */
+  avg_ttft_ms: number | null;
+}
+
+/**
+ * Расход токенов пользователя
+ */
+export interface UserTokenUsage {
+  /** ID пользователя Telegram */
+  user_id: number;
+  /** Количество ответов LLM пользователю за период */
+  responses: number;
+  /** Суммарные токены промптов и ответов */
+  total_tokens: number;
+  /** Средняя задержка ответа (мс) */
+  avg_latency_ms: number;
+}
+
 /**
  * Полный ответ от API endpoint /stats
  */
@@ -72,6 +104,10 @@ export interface StatsResponse {
   top_users: TopUser[];
   /** Период за который собрана статистика */
   period: Period;
+  /** Расход токенов и задержка ответов LLM (только реальные данные) */
+  llm_usage?: LLMUsageStats | null;
+  /** Топ 5 пользователей по расходу токенов */
+  top_token_users?: UserTokenUsage[];
 }
 
 /**
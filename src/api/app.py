@@ -1,10 +1,15 @@
 """FastAPI приложение для API дашборда статистики и чата"""
 
+import json
 import structlog
-from typing import Annotated
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Annotated, Any
 
 from fastapi import FastAPI, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from src.api.chat_service import ChatService
 from src.api.real_stat_collector import RealStatCollector
@@ -12,8 +17,14 @@ from src.api.schemas import ChatRequest, ChatResponse, ClearChatRequest, Session
 from src.api.session_manager import generate_session_id
 from src.api.stat_collector import StatsPeriod
 from src.api.text_to_sql_service import TextToSQLService
+from src.bulkhead import BUSY_MESSAGE, BulkheadFullError, get_bulkhead
 from src.config import Config
 from src.database import Database
+from src.http_transport import close_http_client, warm_up_http_client
+from src.message_write_queue import MessageWriteQueue
+from src.quota import QuotaExceededError, QuotaTracker
+from src.rate_limiter import get_rate_limiter
+from src.response_cache import close_response_cache, get_response_cache
 
 # Инициализация логгера
 _logger = structlog.get_logger()
@@ -21,11 +32,52 @@ _logger = structlog.get_logger()
 # Инициализация базы данных и сервисов
 _config = Config()
 _database = Database(_config)
+_write_queue = MessageWriteQueue(_config, _database, _logger) if _config.DB_WRITE_BATCHING_ENABLED else None
 _stat_collector = RealStatCollector(_database)
-_chat_service = ChatService(_config, _database, _logger)
+_quota = QuotaTracker(_config, _database, _logger) if _config.QUOTA_ENABLED else None
+_chat_service = ChatService(_config, _database, _logger, _write_queue, _quota)
 _text_to_sql_service = TextToSQLService(_config, _database, _logger)
 
 
+def format_sse_event(event: str, data: dict[str, Any]) -> str:
+    """Сформировать событие Server-Sent Events
+
+    Args:
+        event: Тип события
+        data: Данные события (сериализуются в JSON)
+
+    Returns:
+        Текст события в формате text/event-stream
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Жизненный цикл приложения: открыть пулы соединений к БД и LLM при старте и закрыть при остановке
+
+    Args:
+        app: FastAPI приложение
+    """
+    await _database.connect()
+    if _write_queue is not None:
+        await _write_queue.start()
+    if _quota is not None:
+        await _quota.start()
+    if _config.LLM_HTTP_WARMUP_ENABLED:
+        await warm_up_http_client(_config, _logger)
+    try:
+        yield
+    finally:
+        if _quota is not None:
+            await _quota.stop()
+        if _write_queue is not None:
+            await _write_queue.stop()
+        await _database.close()
+        await close_response_cache()
+        await close_http_client()
+
+
 def create_app() -> FastAPI:
     """Создать и настроить FastAPI приложение
 
@@ -38,6 +90,7 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
 
     # Настройка CORS для доступа из frontend
@@ -58,6 +111,37 @@ def create_app() -> FastAPI:
         """
         return {"status": "ok", "service": "dashboard-api"}
 
+    @app.get("/metrics", tags=["Health"])
+    async def get_metrics() -> dict[str, Any]:
+        """Внутренние метрики производительности сервиса
+
+        Returns:
+            Метрики пула соединений к БД, очереди групповой записи, кэша диалогов и вызовов LLM
+        """
+        metrics: dict[str, Any] = {
+            "database_pool": asdict(_database.get_pool_stats()),
+            "llm": {
+                "chat": _chat_service.llm_client.get_stats(),
+                "text_to_sql": _text_to_sql_service.llm_client.get_stats(),
+            },
+        }
+        bulkhead = get_bulkhead(_config)
+        if bulkhead is not None:
+            metrics["llm_bulkhead"] = bulkhead.get_stats()
+        rate_limiter = get_rate_limiter(_config)
+        if rate_limiter is not None:
+            metrics["llm_rate_limiter"] = rate_limiter.get_stats()
+        response_cache = get_response_cache(_config, _logger)
+        if response_cache is not None:
+            metrics["llm_response_cache"] = response_cache.get_stats()
+        if _write_queue is not None:
+            metrics["message_write_queue"] = _write_queue.get_stats()
+        if _quota is not None:
+            metrics["quota"] = _quota.get_stats()
+        if _chat_service.dialog_manager.cache is not None:
+            metrics["conversation_cache"] = _chat_service.dialog_manager.cache.get_stats()
+        return metrics
+
     @app.get("/stats", response_model=StatsResponse, tags=["Statistics"])
     async def get_stats(
         period: Annotated[
@@ -103,6 +187,54 @@ def create_app() -> FastAPI:
         else:
             return await _chat_service.process_message(request)
 
+    @app.post("/api/chat/message/stream", tags=["Chat"])
+    async def stream_chat_message(request: ChatRequest = Body(...)) -> StreamingResponse:
+        """Отправка сообщения в чат с потоковым ответом (Server-Sent Events)
+
+        События:
+        - delta: {"delta": "..."} - очередной фрагмент ответа
+        - done: {"session_id": "...", "sql_query": ...} - ответ завершён
+        - error: {"message": "..."} - ошибка генерации, перегрузка сервиса или исчерпанная квота
+
+        При отключении клиента запрос к LLM отменяется, а полученная часть
+        ответа сохраняется в историю. Admin режим не поддерживает потоковую
+        генерацию: ответ text-to-SQL отдаётся одним фрагментом.
+
+        Args:
+            request: Запрос с сообщением, режимом и session_id
+
+        Returns:
+            Поток событий text/event-stream
+        """
+
+        async def events() -> AsyncIterator[str]:
+            sql_query: str | None = None
+            try:
+                if request.mode == "admin":
+                    response = await _text_to_sql_service.process_message(request)
+                    sql_query = response.sql_query
+                    yield format_sse_event("delta", {"delta": response.message})
+                else:
+                    async for delta in _chat_service.stream_message(request):
+                        yield format_sse_event("delta", {"delta": delta})
+            except BulkheadFullError:
+                yield format_sse_event("error", {"message": BUSY_MESSAGE})
+                return
+            except QuotaExceededError as e:
+                yield format_sse_event("error", {"message": e.user_message})
+                return
+            except Exception:
+                _logger.exception("chat_stream_error", session_id=request.session_id, mode=request.mode)
+                yield format_sse_event("error", {"message": "Произошла ошибка, попробуйте позже"})
+                return
+            yield format_sse_event("done", {"session_id": request.session_id, "sql_query": sql_query})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.post("/api/chat/clear", tags=["Chat"])
     async def clear_chat(request: ClearChatRequest = Body(...)) -> dict[str, str]:
         """Очистка истории чата
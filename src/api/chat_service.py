@@ -1,44 +1,65 @@
 """Сервис для обработки чата (normal mode)"""
 
+import asyncio
+from collections.abc import AsyncIterator, Coroutine
+from typing import TYPE_CHECKING, Any
+
 import structlog
 
 from src.api.schemas import ChatRequest, ChatResponse
 from src.api.session_manager import session_id_to_user_id
+from src.bulkhead import BUSY_MESSAGE, BulkheadFullError
 from src.config import Config
 from src.database import Database
 from src.dialog_manager import DialogManager
 from src.llm_client import LLMClient
 from src.message_repository import MessageRepository
+from src.message_write_queue import MessageWriteQueue
+from src.quota import QuotaExceededError, QuotaTracker
+
+if TYPE_CHECKING:
+    from src.llm_usage import LLMUsage
 
 
 class ChatService:
     """Сервис для обработки запросов чата в normal режиме"""
 
-    def __init__(self, config: Config, database: Database, logger: structlog.BoundLogger) -> None:
+    def __init__(
+        self,
+        config: Config,
+        database: Database,
+        logger: structlog.BoundLogger,
+        write_queue: MessageWriteQueue | None = None,
+        quota: QuotaTracker | None = None,
+    ) -> None:
         """Инициализация сервиса чата
 
         Args:
             config: Конфигурация приложения
             database: Менеджер подключений к базе данных
             logger: Логгер приложения
+            write_queue: Очередь групповой записи сообщений (опционально)
+            quota: Учёт квот пользователей (None - без ограничений)
         """
         self.config = config
         self.database = database
         self.logger = logger
         self.llm_client = LLMClient(config, logger)
-        self.repository = MessageRepository(database)
+        self.repository = MessageRepository(database, write_queue)
         self.dialog_manager = DialogManager(config, self.repository)
+        self.quota = quota
+        # Фоновые задачи сохранения частичных ответов (держим ссылки до завершения)
+        self._background_tasks: set[asyncio.Task[None]] = set()
 
     async def process_message(self, request: ChatRequest) -> ChatResponse:
         """Обработка сообщения в normal режиме
 
         Логика:
         1. Конвертировать session_id в user_id для БД
-        2. Добавить сообщение пользователя в историю
-        3. Получить полную историю диалога
-        4. Отправить в LLM для генерации ответа
-        5. Сохранить ответ ассистента в историю
-        6. Вернуть ответ
+        2. Добавить сообщение пользователя и получить историю диалога (одна транзакция)
+        3. Отправить в LLM для генерации ответа
+        4. Сохранить ответ ассистента в историю
+        5. Вернуть ответ
 
         Args:
             request: Запрос от пользователя
@@ -61,17 +82,21 @@ class ChatService:
         )
 
         try:
-            # Добавить сообщение пользователя в историю
-            await self.dialog_manager.add_message(user_id, "user", request.message)
+            self._acquire_quota(request.session_id, user_id)
+        except QuotaExceededError as e:
+            return ChatResponse(message=e.user_message, sql_query=None, session_id=request.session_id)
 
-            # Получить полную историю диалога
-            history = await self.dialog_manager.get_history(user_id)
+        try:
+            # Добавить сообщение пользователя и получить историю диалога за один запрос к БД
+            history = await self.dialog_manager.add_message_and_get_history(user_id, "user", request.message)
 
             # Генерация ответа от LLM
-            response_text = await self.llm_client.generate_response(history)
+            result = await self.llm_client.generate_response_with_usage(history)
+            response_text = result.content
+            self._record_tokens(user_id, result.usage)
 
-            # Сохранить ответ ассистента в историю
-            await self.dialog_manager.add_message(user_id, "assistant", response_text)
+            # Сохранить ответ ассистента в историю вместе с расходом токенов
+            await self.dialog_manager.add_message(user_id, "assistant", response_text, result.usage)
 
             self.logger.info(
                 "chat_response_generated",
@@ -82,12 +107,124 @@ class ChatService:
 
             return ChatResponse(message=response_text, sql_query=None, session_id=request.session_id)
 
+        except BulkheadFullError as e:
+            # Перегрузка: сразу вернуть ответ о занятости вместо ожидания в очереди
+            self.logger.warning("llm_overloaded", session_id=request.session_id, user_id=user_id, error=str(e))
+            return ChatResponse(message=BUSY_MESSAGE, sql_query=None, session_id=request.session_id)
+        except Exception as e:
+            self.logger.error(
+                "chat_processing_error", session_id=request.session_id, user_id=user_id, error=str(e), exc_info=True
+            )
+            raise
+
+    async def stream_message(self, request: ChatRequest) -> AsyncIterator[str]:
+        """Потоковая обработка сообщения в normal режиме
+
+        Фрагменты ответа отдаются по мере генерации. Полный ответ сохраняется
+        после завершения потока. Если клиент отключился (генератор закрыт или
+        задача отменена), запрос к LLM прерывается, а уже полученная часть
+        ответа сохраняется в историю.
+
+        Args:
+            request: Запрос от пользователя
+
+        Yields:
+            Фрагменты текста ответа
+
+        Raises:
+            QuotaExceededError: Если пользователь исчерпал квоту (до вызова LLM)
+            Exception: При ошибках LLM или БД
+        """
+        user_id = session_id_to_user_id(request.session_id)
+
+        self.logger.info(
+            "chat_stream_received",
+            session_id=request.session_id,
+            user_id=user_id,
+            mode=request.mode,
+            message_length=len(request.message),
+        )
+
+        self._acquire_quota(request.session_id, user_id)
+
+        history = await self.dialog_manager.add_message_and_get_history(user_id, "user", request.message)
+
+        parts: list[str] = []
+        usages: list[LLMUsage] = []
+        try:
+            async for delta in self.llm_client.stream_response(history, on_usage=usages.append):
+                parts.append(delta)
+                yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            partial_text = "".join(parts)
+            self.logger.info(
+                "chat_stream_aborted",
+                session_id=request.session_id,
+                user_id=user_id,
+                response_length=len(partial_text),
+            )
+            if partial_text:
+                # Отменённая задача не может надёжно ждать запись, поэтому сохраняем в фоне
+                self._run_in_background(self.dialog_manager.add_message(user_id, "assistant", partial_text))
+            raise
         except Exception as e:
             self.logger.error(
                 "chat_processing_error", session_id=request.session_id, user_id=user_id, error=str(e), exc_info=True
             )
             raise
 
+        response_text = "".join(parts)
+        usage = usages[-1] if usages else None
+        self._record_tokens(user_id, usage)
+        await self.dialog_manager.add_message(user_id, "assistant", response_text, usage)
+
+        self.logger.info(
+            "chat_response_generated",
+            session_id=request.session_id,
+            user_id=user_id,
+            response_length=len(response_text),
+        )
+
+    def _acquire_quota(self, session_id: str, user_id: int) -> None:
+        """Проверить квоту пользователя и учесть запрос
+
+        Args:
+            session_id: ID сессии (для логов)
+            user_id: ID пользователя
+
+        Raises:
+            QuotaExceededError: Если квота исчерпана
+        """
+        if self.quota is None:
+            return
+        try:
+            self.quota.acquire(user_id)
+        except QuotaExceededError as e:
+            self.logger.warning(
+                "quota_exceeded", session_id=session_id, user_id=user_id, limit=e.limit_name, retry_after=e.retry_after
+            )
+            raise
+
+    def _record_tokens(self, user_id: int, usage: "LLMUsage | None") -> None:
+        """Учесть расход токенов ответа в квоте пользователя
+
+        Args:
+            user_id: ID пользователя
+            usage: Расход ответа (None - неизвестен)
+        """
+        if self.quota is not None and usage is not None:
+            self.quota.record_tokens(user_id, usage.total_tokens)
+
+    def _run_in_background(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Запустить корутину в фоне, сохранив ссылку на задачу до её завершения
+
+        Args:
+            coro: Корутина для выполнения
+        """
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
     async def clear_chat(self, session_id: str) -> None:
         """Очистка истории чата для сессии
 
@@ -5,9 +5,11 @@ from datetime import datetime, timedelta
 from src.api.schemas import (
     ActivityDataPoint,
     DialogPreview,
+    LLMUsageStats,
     OverallStats,
     StatsResponse,
     UserActivity,
+    UserTokenUsage,
 )
 from src.api.stat_collector import StatsPeriod
 from src.database import Database
@@ -54,6 +56,8 @@ class RealStatCollector:
         activity_data = await self._get_activity_data(start_time, stats_period)
         recent_dialogs = await self._get_recent_dialogs()
         top_users = await self._get_top_users(start_time)
+        llm_usage = await self._get_llm_usage_stats(start_time)
+        top_token_users = await self._get_top_token_users(start_time)
 
         return StatsResponse(
             overall=overall,
@@ -61,6 +65,8 @@ class RealStatCollector:
             recent_dialogs=recent_dialogs,
             top_users=top_users,
             period=period,
+            llm_usage=llm_usage,
+            top_token_users=top_token_users,
         )
 
     def _get_period_start(self, now: datetime, period: StatsPeriod) -> datetime:
@@ -333,3 +339,78 @@ class RealStatCollector:
             )
 
         return top_users
+
+    async def _get_llm_usage_stats(self, start_time: datetime) -> LLMUsageStats:
+        """Получить расход токенов и задержку ответов LLM
+
+        Удалённые (очищенные) сообщения учитываются: расход уже понесён.
+
+        Args:
+            start_time: Начало периода
+
+        Returns:
+            LLMUsageStats с суммами и средними за период
+        """
+        async with self.database.get_connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT
+                    COUNT(*) as responses,
+                    COALESCE(SUM(prompt_tokens), 0) as prompt_tokens,
+                    COALESCE(SUM(completion_tokens), 0) as completion_tokens,
+                    COALESCE(AVG(latency_ms), 0) as avg_latency_ms,
+                    COALESCE(MAX(latency_ms), 0) as max_latency_ms,
+                    AVG(ttft_ms) as avg_ttft_ms
+                FROM messages
+                WHERE created_at >= ? AND role = 'assistant' AND llm_model IS NOT NULL
+                """,
+                (start_time.isoformat(),),
+            )
+            row = await cursor.fetchone()
+
+        avg_ttft_ms = row["avg_ttft_ms"] if row else None
+        return LLMUsageStats(
+            responses=row["responses"] if row else 0,
+            prompt_tokens=row["prompt_tokens"] if row else 0,
+            completion_tokens=row["completion_tokens"] if row else 0,
+            avg_latency_ms=round(float(row["avg_latency_ms"]), 1) if row else 0.0,
+            max_latency_ms=row["max_latency_ms"] if row else 0,
+            avg_ttft_ms=round(float(avg_ttft_ms), 1) if avg_ttft_ms is not None else None,
+        )
+
+    async def _get_top_token_users(self, start_time: datetime) -> list[UserTokenUsage]:
+        """Получить топ пользователей по расходу токенов
+
+        Args:
+            start_time: Начало периода
+
+        Returns:
+            Список из 5 пользователей с наибольшим расходом токенов
+        """
+        async with self.database.get_connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT
+                    user_id,
+                    COUNT(*) as responses,
+                    COALESCE(SUM(prompt_tokens), 0) + COALESCE(SUM(completion_tokens), 0) as total_tokens,
+                    AVG(latency_ms) as avg_latency_ms
+                FROM messages
+                WHERE created_at >= ? AND role = 'assistant' AND llm_model IS NOT NULL
+                GROUP BY user_id
+                ORDER BY total_tokens DESC
+                LIMIT 5
+                """,
+                (start_time.isoformat(),),
+            )
+            rows = await cursor.fetchall()
+
+        return [
+            UserTokenUsage(
+                user_id=row["user_id"],
+                responses=row["responses"],
+                total_tokens=row["total_tokens"],
+                avg_latency_ms=round(float(row["avg_latency_ms"] or 0), 1),
+            )
+            for row in rows
+        ]
@@ -1,6 +1,6 @@
 """Схемы данных для API дашборда статистики и чата"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -63,6 +63,44 @@ class UserActivity:
     last_active: str  # ISO 8601 format: YYYY-MM-DDTHH:MM:SSZ
 
 
+@dataclass
+class LLMUsageStats:
+    """Расход токенов и задержка ответов LLM за период
+
+    Attributes:
+        responses: Количество ответов LLM
+        prompt_tokens: Суммарные токены промптов
+        completion_tokens: Суммарные токены ответов
+        avg_latency_ms: Средняя задержка ответа (мс)
+        max_latency_ms: Максимальная задержка ответа (мс)
+        avg_ttft_ms: Среднее время до первого фрагмента потокового ответа (мс)
+    """
+
+    responses: int
+    prompt_tokens: int
+    completion_tokens: int
+    avg_latency_ms: float
+    max_latency_ms: int
+    avg_ttft_ms: float | None
+
+
+@dataclass
+class UserTokenUsage:
+    """Расход токенов пользователя для топа по стоимости
+
+    Attributes:
+        user_id: ID пользователя Telegram
+        responses: Количество ответов LLM пользователю за период
+        total_tokens: Суммарные токены промптов и ответов
+        avg_latency_ms: Средняя задержка ответа (мс)
+    """
+
+    user_id: int
+    responses: int
+    total_tokens: int
+    avg_latency_ms: float
+
+
 @dataclass
 class StatsResponse:
     """Полный ответ API со статистикой
@@ -73,6 +111,8 @@ class StatsResponse:
         recent_dialogs: Список последних диалогов (последние 10)
         top_users: Топ активных пользователей (топ 5)
         period: Период, за который собрана статистика
+        llm_usage: Расход токенов и задержка ответов LLM за период
+        top_token_users: Топ пользователей по расходу токенов (топ 5)
     """
 
     overall: OverallStats
@@ -80,6 +120,8 @@ class StatsResponse:
     recent_dialogs: list[DialogPreview]
     top_users: list[UserActivity]
     period: str  # "day" | "week" | "month"
+    llm_usage: LLMUsageStats | None = None
+    top_token_users: list[UserTokenUsage] = field(default_factory=list)
 
 
 # ==================== Chat API Schemas ====================
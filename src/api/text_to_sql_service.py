@@ -9,6 +9,8 @@ from src.api.session_manager import session_id_to_user_id
 from src.config import Config
 from src.database import Database
 from src.llm_client import LLMClient
+from src.model_router import Route
+from src.rate_limiter import LLMPriority
 
 # Промпт для генерации SQL
 TEXT_TO_SQL_PROMPT = """You are a SQL expert. Generate a SQL query for SQLite database.
@@ -113,7 +115,9 @@ class TextToSQLService:
 
         # Генерируем SQL через LLM
         messages = [{"role": "user", "content": prompt}]
-        sql_response = await self.llm_client.generate_response(messages)
+        sql_response = await self.llm_client.generate_response(
+            messages, route=Route.LARGE, priority=LLMPriority.ADMIN, use_cache=True
+        )
 
         # Очистка ответа от markdown и лишних символов
         sql = sql_response.strip()
@@ -141,10 +145,8 @@ class TextToSQLService:
         Raises:
             Exception: При ошибках выполнения запроса
         """
+        # busy_timeout уже настроен для соединений пула (DB_BUSY_TIMEOUT_MS)
         async with self.database.get_connection() as conn:
-            # Устанавливаем timeout для запроса (5 секунд)
-            await conn.execute("PRAGMA busy_timeout = 5000")
-
             cursor = await conn.execute(sql)
             rows = await cursor.fetchall()
 
@@ -179,7 +181,9 @@ class TextToSQLService:
 
         # Генерируем ответ через LLM
         messages = [{"role": "user", "content": prompt}]
-        formatted_response = await self.llm_client.generate_response(messages)
+        formatted_response = await self.llm_client.generate_response(
+            messages, route=Route.LARGE, priority=LLMPriority.ADMIN, use_cache=True
+        )
 
         return formatted_response
 
@@ -1,13 +1,46 @@
 """Telegram Bot с инициализацией aiogram"""
 
+import asyncio
+
 from aiogram import Bot as AiogramBot
 from aiogram import Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from src.config import Config
 
+# Заголовок, в котором Telegram передаёт секретный токен webhook
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+async def serve_app(app: web.Application, host: str, port: int) -> None:
+    """Запустить HTTP-сервер aiohttp и работать до отмены
+
+    Args:
+        app: Приложение aiohttp
+        host: Адрес для прослушивания
+        port: Порт для прослушивания
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
 
 class Bot:
-    """Telegram Bot с инициализацией aiogram"""
+    """Telegram Bot с инициализацией aiogram
+
+    Обновления принимаются long polling (по умолчанию, удобно для локальной
+    разработки) или через webhook (BOT_MODE=webhook): Telegram сам доставляет
+    обновления на HTTP-эндпоинт, поэтому несколько процессов можно поставить
+    за балансировщик.
+    """
 
     def __init__(self, config: Config) -> None:
         """Инициализация бота и диспетчера
@@ -16,9 +49,65 @@ class Bot:
             config: Конфигурация приложения
         """
         self.config: Config = config
-        self.bot: AiogramBot = AiogramBot(token=config.TELEGRAM_BOT_TOKEN)
+        # Собственный сервер Bot API (локальный или тестовый) вместо api.telegram.org
+        session = (
+            AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+            if config.TELEGRAM_API_URL
+            else None
+        )
+        self.bot: AiogramBot = AiogramBot(token=config.TELEGRAM_BOT_TOKEN, session=session)
         self.dp: Dispatcher = Dispatcher()
 
     async def start(self) -> None:
-        """Запуск polling бота"""
+        """Запуск приёма обновлений в режиме BOT_MODE"""
+        if self.config.BOT_MODE == "webhook":
+            await serve_app(self.create_webhook_app(), self.config.WEBHOOK_HOST, self.config.WEBHOOK_PORT)
+            return
+
+        # Активный webhook не даёт получать обновления через getUpdates
+        await self.bot.delete_webhook()
         await self.dp.start_polling(self.bot)
+
+    async def start_worker(self, worker_index: int) -> None:
+        """Запуск воркера: обновления доставляет фронтовой процесс через localhost
+
+        Args:
+            worker_index: Номер воркера (порт BOT_WORKER_BASE_PORT + номер)
+        """
+        app = self.create_webhook_app(register_webhook=False)
+        await serve_app(app, "127.0.0.1", self.config.BOT_WORKER_BASE_PORT + worker_index)
+
+    def create_webhook_app(self, register_webhook: bool = True) -> web.Application:
+        """Создать aiohttp-приложение с эндпоинтом webhook
+
+        Запрос проверяется по секретному токену (заголовок
+        X-Telegram-Bot-Api-Secret-Token) и подтверждается ответом 200 сразу:
+        обработка обновления продолжается в фоне, поэтому медленный ответ LLM
+        не задерживает доставку следующих обновлений и не вызывает повторов.
+
+        Args:
+            register_webhook: Регистрировать webhook в Telegram при старте
+                (False для воркеров, которым обновления передаёт фронт)
+
+        Returns:
+            Приложение aiohttp
+        """
+        app = web.Application()
+        SimpleRequestHandler(
+            dispatcher=self.dp,
+            bot=self.bot,
+            handle_in_background=True,
+            secret_token=self.config.WEBHOOK_SECRET,
+        ).register(app, path=self.config.WEBHOOK_PATH)
+        if register_webhook:
+            self.dp.startup.register(self._set_webhook)
+        setup_application(app, self.dp, bot=self.bot)
+        return app
+
+    async def _set_webhook(self) -> None:
+        """Зарегистрировать адрес webhook в Telegram"""
+        await self.bot.set_webhook(
+            url=self.config.WEBHOOK_URL.rstrip("/") + self.config.WEBHOOK_PATH,
+            secret_token=self.config.WEBHOOK_SECRET,
+            allowed_updates=self.dp.resolve_used_update_types(),
+        )
@@ -0,0 +1,200 @@
+"""Ограничение параллельных вызовов LLM с контролем допуска (bulkhead)"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from src.config import Config
+from src.rate_limiter import LLMPriority
+
+# Ответ пользователю, когда запрос отклонён из-за перегрузки
+BUSY_MESSAGE = "Сейчас слишком много запросов, попробуйте ещё раз через минуту"
+
+# Вес нового измерения в скользящей средней времени обслуживания
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+# Единственный bulkhead процесса: ограничивает суммарную нагрузку всех LLMClient
+_bulkhead: "Bulkhead | None" = None
+
+
+class BulkheadFullError(Exception):
+    """Запрос отклонён без ожидания: очередь заполнена или ожидание слишком долгое"""
+
+
+class Bulkhead:
+    """Ограничитель параллельных вызовов с ограниченной очередью ожидания
+
+    Не более max_concurrent вызовов выполняются одновременно, остальные ждут
+    в очереди по приоритету (USER > ADMIN > BACKGROUND, FIFO внутри приоритета),
+    как и в ограничителе частоты. Запрос отклоняется сразу (BulkheadFullError),
+    если очередь заполнена или ожидаемое время ожидания, оценённое по
+    скользящему среднему времени обслуживания, превышает max_wait_seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация bulkhead
+
+        Args:
+            max_concurrent: Максимальное количество одновременных вызовов
+            max_queue: Максимальное количество ожидающих вызовов
+            max_wait_seconds: Максимальное ожидаемое время ожидания в очереди
+            clock: Источник времени (для тестов)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._active = 0
+        # Куча (приоритет, порядковый номер, future)
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self.service_time_ewma: float | None = None
+
+        # Метрики
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_too_long = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество вызовов, ожидающих в очереди"""
+        return len(self._waiters)
+
+    def expected_wait(self, priority: LLMPriority = LLMPriority.USER) -> float:
+        """Оценить время ожидания для нового вызова
+
+        Args:
+            priority: Приоритет вызова (его обгоняют только ожидающие с тем же или более высоким)
+
+        Returns:
+            Ожидаемое время в очереди в секундах (0 - есть свободный слот)
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            return 0.0
+        # Вызов дождётся завершения стольких «волн» вызовов, сколько очередей перед ним
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= priority)
+        waves = math.ceil((ahead + 1) / self.max_concurrent)
+        return waves * (self.service_time_ewma or 0.0)
+
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority = LLMPriority.USER) -> AsyncIterator[None]:
+        """Занять слот на время выполнения вызова
+
+        Args:
+            priority: Приоритет вызова в очереди
+
+        Raises:
+            BulkheadFullError: Если запрос отклонён контролем допуска
+        """
+        await self._acquire(priority)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._observe(self._clock() - started)
+            self._release()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики bulkhead
+
+        Returns:
+            Текущая загрузка, глубина очереди, время обслуживания и счётчики отказов
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "service_time_ewma": round(self.service_time_ewma, 3) if self.service_time_ewma is not None else None,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_wait_too_long": self.rejected_wait_too_long,
+        }
+
+    async def _acquire(self, priority: LLMPriority) -> None:
+        """Занять слот сразу или дождаться его в очереди
+
+        Args:
+            priority: Приоритет вызова в очереди
+
+        Raises:
+            BulkheadFullError: Если очередь заполнена или ожидание слишком долгое
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise BulkheadFullError("Очередь вызовов LLM заполнена")
+        expected_wait = self.expected_wait(priority)
+        if expected_wait > self.max_wait_seconds:
+            self.rejected_wait_too_long += 1
+            raise BulkheadFullError(f"Ожидаемое время ожидания {expected_wait:.1f} с превышает допустимое")
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter = (int(priority), next(self._seq), future)
+        heapq.heappush(self._waiters, waiter)
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже передан этому вызову - передать его следующему
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+        self.admitted += 1
+
+    def _release(self) -> None:
+        """Освободить слот, передав его ожидающему с наивысшим приоритетом"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Слот переходит ожидающему без уменьшения счётчика активных
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _observe(self, duration: float) -> None:
+        """Обновить скользящую среднюю времени обслуживания
+
+        Args:
+            duration: Время выполнения вызова в секундах
+        """
+        if self.service_time_ewma is None:
+            self.service_time_ewma = duration
+        else:
+            self.service_time_ewma += SERVICE_TIME_EWMA_ALPHA * (duration - self.service_time_ewma)
+
+
+def get_bulkhead(config: Config) -> Bulkhead | None:
+    """Получить общий bulkhead процесса, создав его при первом обращении
+
+    Args:
+        config: Конфигурация приложения
+
+    Returns:
+        Bulkhead или None, если ограничение параллельных вызовов выключено
+    """
+    global _bulkhead
+    if config.LLM_MAX_CONCURRENCY <= 0:
+        return None
+    if _bulkhead is None:
+        _bulkhead = Bulkhead(config.LLM_MAX_CONCURRENCY, config.LLM_MAX_QUEUE, config.LLM_MAX_QUEUE_WAIT_SECONDS)
+    return _bulkhead
@@ -0,0 +1,117 @@
+"""Автоматический выключатель (circuit breaker) для вызовов внешних сервисов"""
+
+import time
+from collections.abc import Callable
+from enum import StrEnum
+from typing import Any
+
+
+class CircuitState(StrEnum):
+    """Состояние выключателя"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонён без обращения к сервису: выключатель разомкнут"""
+
+
+class CircuitBreaker:
+    """Выключатель, размыкающийся после серии ошибок подряд
+
+    В замкнутом состоянии пропускает все запросы. После failure_threshold
+    ошибок подряд размыкается и отклоняет запросы recovery_seconds секунд,
+    затем переходит в полуоткрытое состояние и пропускает один пробный
+    запрос: успех замыкает выключатель, ошибка снова размыкает. Если исход
+    пробного запроса так и не был записан (например, задачу отменили),
+    следующий пробный запрос пропускается через recovery_seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация выключателя
+
+        Args:
+            name: Имя защищаемого сервиса (для метрик и логов)
+            failure_threshold: Количество ошибок подряд до размыкания (0 - выключатель отключён)
+            recovery_seconds: Время в разомкнутом состоянии до пробного запроса
+            clock: Источник времени (для тестов)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: float | None = None
+
+        # Метрики
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Текущее состояние с учётом истёкшего времени восстановления"""
+        if self._state is CircuitState.OPEN and self._clock() - self._opened_at >= self.recovery_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_started_at = None
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Проверить, можно ли выполнить запрос, и учесть отказ в метриках
+
+        Returns:
+            True если запрос можно выполнить
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return True
+
+        if state is CircuitState.HALF_OPEN:
+            now = self._clock()
+            if self._probe_started_at is None or now - self._probe_started_at >= self.recovery_seconds:
+                self._probe_started_at = now
+                return True
+
+        self.rejected_count += 1
+        return False
+
+    def record_success(self) -> None:
+        """Записать успешный запрос: сбросить счётчик ошибок и замкнуть выключатель"""
+        self.consecutive_failures = 0
+        self._state = CircuitState.CLOSED
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Записать ошибку: разомкнуть выключатель при достижении порога или неудачной пробе"""
+        self.consecutive_failures += 1
+        # Ошибки запросов, начатых до размыкания, не продлевают время восстановления
+        if self.failure_threshold <= 0 or self._state is CircuitState.OPEN:
+            return
+        if self._state is CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self._probe_started_at = None
+            self.opened_count += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики выключателя
+
+        Returns:
+            Состояние и счётчики ошибок, размыканий и отклонённых запросов
+        """
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+        }
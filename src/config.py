@@ -1,5 +1,6 @@
 """Конфигурация приложения из .env файла"""
 
+import math
 import os
 
 from dotenv import load_dotenv
@@ -18,6 +19,25 @@ class Config:
 
         # Telegram Bot
         self.TELEGRAM_BOT_TOKEN: str = self._get_required("TELEGRAM_BOT_TOKEN")
+        # Адрес сервера Bot API (пусто - api.telegram.org; для локального или тестового сервера)
+        self.TELEGRAM_API_URL: str = os.getenv("TELEGRAM_API_URL", "")
+
+        # Приём обновлений: polling (локальная разработка) или webhook
+        self.BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+        if self.BOT_MODE not in ("polling", "webhook"):
+            raise ValueError(f"Неизвестный BOT_MODE: {self.BOT_MODE} (ожидается polling или webhook)")
+        self.WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+        self.WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+        self.WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+        self.WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+        self.WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8081"))
+        if self.BOT_MODE == "webhook" and not (self.WEBHOOK_URL and self.WEBHOOK_SECRET):
+            # Без секрета эндпоинт принимал бы поддельные обновления от кого угодно
+            raise ValueError("Для BOT_MODE=webhook нужно установить WEBHOOK_URL и WEBHOOK_SECRET")
+
+        # Процессы-воркеры: фронт распределяет обновления по ним по user_id (1 = один процесс)
+        self.BOT_WORKERS: int = int(os.getenv("BOT_WORKERS", "1"))
+        self.BOT_WORKER_BASE_PORT: int = int(os.getenv("BOT_WORKER_BASE_PORT", "8090"))
 
         # Openrouter/LLM
         self.OPENAI_API_KEY: str = self._get_required("OPENAI_API_KEY")
@@ -25,20 +45,149 @@ class Config:
         self.OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "openai/gpt-4")
         self.SYSTEM_PROMPT: str = self._load_system_prompt()
 
+        # Устойчивость вызовов LLM: таймауты, повторы и автоматический выключатель
+        self.LLM_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+        self.LLM_READ_TIMEOUT_SECONDS: float = float(os.getenv("LLM_READ_TIMEOUT_SECONDS", "60"))
+        self.LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.LLM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+        self.LLM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+        self.LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.LLM_CIRCUIT_RECOVERY_SECONDS: float = float(os.getenv("LLM_CIRCUIT_RECOVERY_SECONDS", "30"))
+
+        # Запрашивать расход токенов в потоковых ответах (stream_options.include_usage)
+        self.LLM_STREAM_USAGE_ENABLED: bool = self._get_bool("LLM_STREAM_USAGE_ENABLED", True)
+
+        # Объединение одновременных одинаковых запросов к LLM в один вызов
+        self.LLM_SINGLEFLIGHT_ENABLED: bool = self._get_bool("LLM_SINGLEFLIGHT_ENABLED", True)
+
+        # Кэш ответов LLM для детерминированных запросов (text-to-SQL); пустой путь - только память.
+        # Выключен по умолчанию: ответы чата его не используют
+        self.LLM_RESPONSE_CACHE_ENABLED: bool = self._get_bool("LLM_RESPONSE_CACHE_ENABLED", False)
+        self.LLM_RESPONSE_CACHE_PATH: str = os.getenv("LLM_RESPONSE_CACHE_PATH", "./llm_response_cache.db")
+        self.LLM_RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "86400"))
+        self.LLM_RESPONSE_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_RESPONSE_CACHE_MEMORY_ENTRIES", "256"))
+        self.LLM_RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+
+        # Ограничение параллельных вызовов LLM и сброс нагрузки (0 = без ограничения);
+        # LLM_MAX_CONCURRENCY и лимиты частоты общие: воркеры делят их (split_llm_limits)
+        self.LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+        self.LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "100"))
+        self.LLM_MAX_QUEUE_WAIT_SECONDS: float = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "30"))
+
+        # Клиентский ограничитель частоты запросов к LLM (0 = без ограничения)
+        self.LLM_RATE_LIMIT_RPM: int = int(os.getenv("LLM_RATE_LIMIT_RPM", "0"))
+        self.LLM_RATE_LIMIT_TPM: int = int(os.getenv("LLM_RATE_LIMIT_TPM", "0"))
+        self.LLM_RATE_LIMIT_COMPLETION_TOKENS: int = int(os.getenv("LLM_RATE_LIMIT_COMPLETION_TOKENS", "512"))
+
+        # Общий HTTP-клиент для запросов к LLM
+        self.LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+        self.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+        self.LLM_HTTP2_ENABLED: bool = self._get_bool("LLM_HTTP2_ENABLED", True)
+        self.LLM_HTTP_WARMUP_ENABLED: bool = self._get_bool("LLM_HTTP_WARMUP_ENABLED", True)
+
+        # Пул целей LLM (модель|endpoint) и SLO задержки для переключения между ними
+        self.LLM_TARGETS: list[tuple[str, str]] = self._parse_llm_targets(os.getenv("LLM_TARGETS", "")) or [
+            (self.OPENAI_MODEL, self.OPENAI_BASE_URL)
+        ]
+        self.LLM_LATENCY_SLO_SECONDS: float = float(os.getenv("LLM_LATENCY_SLO_SECONDS", "0"))
+
+        # Быстрые модели для простых запросов (пусто = маршрутизация по сложности выключена)
+        self.LLM_FAST_TARGETS: list[tuple[str, str]] = self._parse_llm_targets(os.getenv("LLM_FAST_TARGETS", ""))
+        self.ROUTER_FAST_MAX_CHARS: int = int(os.getenv("ROUTER_FAST_MAX_CHARS", "280"))
+        self.ROUTER_FAST_MAX_CONTEXT_CHARS: int = int(os.getenv("ROUTER_FAST_MAX_CONTEXT_CHARS", "6000"))
+
         # Bot роль
         self.BOT_ROLE_NAME: str = os.getenv("BOT_ROLE_NAME", "ИИ-ассистент")
         self.BOT_ROLE_DESCRIPTION: str = os.getenv("BOT_ROLE_DESCRIPTION", "Помогаю отвечать на вопросы")
 
+        # Потоковая выдача ответа в Telegram через редактирование сообщения
+        self.STREAMING_ENABLED: bool = self._get_bool("STREAMING_ENABLED", False)
+        self.STREAM_EDIT_INTERVAL_SECONDS: float = float(os.getenv("STREAM_EDIT_INTERVAL_SECONDS", "1.5"))
+
+        # Что делать с незавершённой генерацией при новом сообщении пользователя:
+        # cancel_previous - отменить, keep_previous - дать завершиться (/clear отменяет всегда)
+        self.GENERATION_SUPERSEDE_POLICY: str = os.getenv("GENERATION_SUPERSEDE_POLICY", "cancel_previous")
+
+        # Объединение быстрой серии сообщений пользователя в один ход (0 = каждое сообщение отдельно)
+        self.MESSAGE_DEBOUNCE_SECONDS: float = float(os.getenv("MESSAGE_DEBOUNCE_SECONDS", "0"))
+        self.MESSAGE_DEBOUNCE_MAX_SECONDS: float = float(os.getenv("MESSAGE_DEBOUNCE_MAX_SECONDS", "5"))
+
+        # Ограничение частоты сообщений пользователя (flood control), раздельно для команд и текста
+        self.THROTTLE_ENABLED: bool = self._get_bool("THROTTLE_ENABLED", True)
+        self.THROTTLE_TEXT_PER_MINUTE: int = int(os.getenv("THROTTLE_TEXT_PER_MINUTE", "20"))
+        self.THROTTLE_TEXT_BURST: int = int(os.getenv("THROTTLE_TEXT_BURST", "5"))
+        self.THROTTLE_COMMAND_PER_MINUTE: int = int(os.getenv("THROTTLE_COMMAND_PER_MINUTE", "30"))
+        self.THROTTLE_COMMAND_BURST: int = int(os.getenv("THROTTLE_COMMAND_BURST", "10"))
+        # drop - отбрасывать лишние сообщения, defer - откладывать до THROTTLE_MAX_DEFER_SECONDS
+        self.THROTTLE_MODE: str = os.getenv("THROTTLE_MODE", "drop")
+        self.THROTTLE_MAX_DEFER_SECONDS: float = float(os.getenv("THROTTLE_MAX_DEFER_SECONDS", "5"))
+        self.THROTTLE_IDLE_SECONDS: float = float(os.getenv("THROTTLE_IDLE_SECONDS", "600"))
+
+        # Очередь исходящих сообщений с темпом по чатам и по боту (лимиты Telegram);
+        # DELIVERY_GLOBAL_PER_SECOND - на весь бот, делится между BOT_WORKERS (0 = без ограничения)
+        self.DELIVERY_ENABLED: bool = self._get_bool("DELIVERY_ENABLED", True)
+        self.DELIVERY_GLOBAL_PER_SECOND: float = float(os.getenv("DELIVERY_GLOBAL_PER_SECOND", "25"))
+        self.DELIVERY_CHAT_INTERVAL_SECONDS: float = float(os.getenv("DELIVERY_CHAT_INTERVAL_SECONDS", "1.0"))
+        self.DELIVERY_GROUP_INTERVAL_SECONDS: float = float(os.getenv("DELIVERY_GROUP_INTERVAL_SECONDS", "3.0"))
+        self.DELIVERY_MAX_RETRIES: int = int(os.getenv("DELIVERY_MAX_RETRIES", "3"))
+
+        # Квоты пользователей на запросы и токены LLM (0 = без ограничения)
+        self.QUOTA_ENABLED: bool = self._get_bool("QUOTA_ENABLED", False)
+        self.QUOTA_REQUESTS_PER_HOUR: int = int(os.getenv("QUOTA_REQUESTS_PER_HOUR", "100"))
+        self.QUOTA_REQUESTS_PER_DAY: int = int(os.getenv("QUOTA_REQUESTS_PER_DAY", "500"))
+        self.QUOTA_TOKENS_PER_HOUR: int = int(os.getenv("QUOTA_TOKENS_PER_HOUR", "200000"))
+        self.QUOTA_TOKENS_PER_DAY: int = int(os.getenv("QUOTA_TOKENS_PER_DAY", "1000000"))
+        self.QUOTA_CHECKPOINT_INTERVAL_SECONDS: float = float(os.getenv("QUOTA_CHECKPOINT_INTERVAL_SECONDS", "30"))
+
         # Логирование
         self.LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
         self.LOG_FILE_PATH: str = os.getenv("LOG_FILE_PATH", "logs/")
+        # Период записи метрик компонентов в лог во время работы (0 = только при остановке)
+        self.STATS_LOG_INTERVAL_SECONDS: float = float(os.getenv("STATS_LOG_INTERVAL_SECONDS", "60"))
 
         # Контекст
         max_context = os.getenv("MAX_CONTEXT_MESSAGES", "0")
         self.MAX_CONTEXT_MESSAGES: int = int(max_context)
+        # Бюджет контекста в токенах (0 = без ограничения)
+        self.MAX_CONTEXT_TOKENS: int = int(os.getenv("MAX_CONTEXT_TOKENS", "0"))
+        self.CONTEXT_CHARS_PER_TOKEN: float = float(os.getenv("CONTEXT_CHARS_PER_TOKEN", "3"))
+
+        # Кэш окон диалогов в памяти процесса
+        self.CONVERSATION_CACHE_ENABLED: bool = self._get_bool("CONVERSATION_CACHE_ENABLED", False)
+        self.CONVERSATION_CACHE_MAX_USERS: int = int(os.getenv("CONVERSATION_CACHE_MAX_USERS", "1000"))
+        self.CONVERSATION_CACHE_MAX_BYTES: int = int(os.getenv("CONVERSATION_CACHE_MAX_BYTES", "16777216"))
+        self.CONVERSATION_CACHE_TTL_SECONDS: float = float(os.getenv("CONVERSATION_CACHE_TTL_SECONDS", "900"))
 
         # База данных
         self.DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./telegram_bot.db")
+        self.DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+        self.DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "8192"))
+        self.DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", "134217728"))
+        self.KNOWN_USERS_CACHE_SIZE: int = int(os.getenv("KNOWN_USERS_CACHE_SIZE", "10000"))
+
+        # Групповая запись сообщений (group commit)
+        self.DB_WRITE_BATCHING_ENABLED: bool = self._get_bool("DB_WRITE_BATCHING_ENABLED", False)
+        self.DB_WRITE_BATCH_MAX_SIZE: int = int(os.getenv("DB_WRITE_BATCH_MAX_SIZE", "100"))
+        self.DB_WRITE_BATCH_MAX_DELAY_MS: int = int(os.getenv("DB_WRITE_BATCH_MAX_DELAY_MS", "5"))
+
+    def split_llm_limits(self, workers: int) -> None:
+        """Разделить лимиты LLM между процессами-воркерами
+
+        Ограничитель частоты и bulkhead существуют в каждом процессе, поэтому
+        при BOT_WORKERS > 1 каждый воркер получает долю ceil(лимит / воркеры)
+        от LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM и LLM_MAX_CONCURRENCY,
+        а суммарная нагрузка на провайдера остаётся в пределах общего лимита.
+        Нулевой лимит (без ограничения) не меняется.
+
+        Args:
+            workers: Количество процессов-воркеров
+        """
+        workers = max(1, workers)
+        self.LLM_RATE_LIMIT_RPM = math.ceil(self.LLM_RATE_LIMIT_RPM / workers)
+        self.LLM_RATE_LIMIT_TPM = math.ceil(self.LLM_RATE_LIMIT_TPM / workers)
+        self.LLM_MAX_CONCURRENCY = math.ceil(self.LLM_MAX_CONCURRENCY / workers)
 
     def _get_required(self, key: str) -> str:
         """Получить обязательный параметр из окружения
@@ -57,6 +206,40 @@ class Config:
             raise ValueError(f"Обязательная переменная окружения {key} не установлена")
         return value
 
+    def _get_bool(self, key: str, default: bool) -> bool:
+        """Получить булев параметр из окружения
+
+        Args:
+            key: Название переменной окружения
+            default: Значение по умолчанию, если переменная не установлена
+
+        Returns:
+            True для значений "1", "true", "yes", "on" (без учёта регистра)
+        """
+        value = os.getenv(key)
+        if value is None:
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    def _parse_llm_targets(self, value: str) -> list[tuple[str, str]]:
+        """Разобрать пул целей LLM
+
+        Формат: цели через запятую в порядке приоритета, каждая в виде
+        "модель" или "модель|base_url" (по умолчанию OPENAI_BASE_URL).
+
+        Args:
+            value: Значение переменной окружения
+
+        Returns:
+            Список пар (модель, base_url)
+        """
+        targets = []
+        for item in value.split(","):
+            model, _, base_url = item.strip().partition("|")
+            if model.strip():
+                targets.append((model.strip(), base_url.strip() or self.OPENAI_BASE_URL))
+        return targets
+
     def _load_system_prompt(self) -> str:
         """Загрузить системный промпт из файла или переменной окружения
 
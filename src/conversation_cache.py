@@ -0,0 +1,269 @@
+"""In-memory кэш окон диалогов пользователей (write-through)"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheEntry:
+    """Закэшированное окно диалога пользователя
+
+    Attributes:
+        messages: Сообщения (role, content) в хронологическом порядке
+        size: Размер текста сообщений в байтах (UTF-8)
+        last_access: Время последнего обращения (clock)
+    """
+
+    messages: list[dict[str, Any]]
+    size: int
+    last_access: float
+
+
+def _messages_size(messages: list[dict[str, Any]]) -> int:
+    """Посчитать размер текста сообщений в байтах
+
+    Args:
+        messages: Сообщения (role, content)
+
+    Returns:
+        Суммарный размер content в UTF-8
+    """
+    return sum(len(msg["content"].encode("utf-8")) for msg in messages)
+
+
+class ConversationCache:
+    """LRU-кэш окон диалогов с ограничением по пользователям, байтам и времени простоя
+
+    Заполнение кэша из БД защищено от гонок с записью: если во время чтения
+    из БД для пользователя было добавлено сообщение или очищена история,
+    а также если чтение пересеклось с незавершённой записью (begin_write),
+    прочитанное окно в кэш не попадает. Иначе оно могло бы уже содержать
+    записанное сообщение, которое затем добавилось бы в окно второй раз.
+    """
+
+    def __init__(
+        self,
+        max_users: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация кэша
+
+        Args:
+            max_users: Максимальное количество пользователей в кэше
+            max_bytes: Максимальный суммарный размер текста сообщений в байтах
+            ttl_seconds: Время простоя, после которого запись устаревает
+            clock: Источник времени (для тестов)
+        """
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        # user_id -> [количество заполнений в процессе, номер записи]
+        self._fills: dict[int, list[int]] = {}
+        # user_id -> количество записей в БД в процессе
+        self._writes: dict[int, int] = {}
+
+        # Метрики
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def contains(self, user_id: int) -> bool:
+        """Проверить наличие актуального окна пользователя без учёта в метриках
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            True если окно есть в кэше и не устарело
+        """
+        entry = self._entries.get(user_id)
+        return entry is not None and self._clock() - entry.last_access <= self.ttl_seconds
+
+    def get(self, user_id: int) -> list[dict[str, Any]] | None:
+        """Получить окно диалога пользователя
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Копия списка сообщений или None при промахе
+        """
+        entry = self._entries.get(user_id)
+        now = self._clock()
+        if entry is not None and now - entry.last_access > self.ttl_seconds:
+            self._remove(user_id)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry.last_access = now
+        self._entries.move_to_end(user_id)
+        return list(entry.messages)
+
+    def put(self, user_id: int, messages: list[dict[str, Any]]) -> None:
+        """Сохранить окно диалога пользователя
+
+        Окно больше max_bytes не кэшируется.
+
+        Args:
+            user_id: ID пользователя
+            messages: Сообщения (role, content) в хронологическом порядке
+        """
+        self._remove(user_id)
+        size = _messages_size(messages)
+        if self.max_users <= 0 or size > self.max_bytes:
+            return
+
+        self._entries[user_id] = CacheEntry(messages=list(messages), size=size, last_access=self._clock())
+        self._bytes += size
+        self._evict()
+
+    def append(self, user_id: int, message: dict[str, Any]) -> None:
+        """Добавить сообщение в окно пользователя, если оно закэшировано
+
+        Args:
+            user_id: ID пользователя
+            message: Сообщение (role, content)
+        """
+        self._mark_write(user_id)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+
+        size = len(message["content"].encode("utf-8"))
+        entry.messages.append(message)
+        entry.size += size
+        entry.last_access = self._clock()
+        self._bytes += size
+        self._entries.move_to_end(user_id)
+        self._evict()
+
+    def begin_write(self, user_id: int) -> None:
+        """Отметить начало записи сообщения пользователя в БД
+
+        Пока запись не завершена, окна, прочитанные из БД, не кэшируются:
+        они могут уже содержать записываемое сообщение.
+
+        Args:
+            user_id: ID пользователя
+        """
+        self._mark_write(user_id)
+        self._writes[user_id] = self._writes.get(user_id, 0) + 1
+
+    def complete_write(self, user_id: int, message: dict[str, Any] | None) -> None:
+        """Завершить запись в БД и добавить сообщение в закэшированное окно
+
+        Args:
+            user_id: ID пользователя
+            message: Записанное сообщение (role, content); None - запись не удалась
+        """
+        writes = self._writes[user_id] - 1
+        if writes:
+            self._writes[user_id] = writes
+        else:
+            del self._writes[user_id]
+        if message is not None:
+            self.append(user_id, message)
+        else:
+            self._mark_write(user_id)
+
+    def invalidate(self, user_id: int) -> None:
+        """Удалить окно пользователя из кэша
+
+        Args:
+            user_id: ID пользователя
+        """
+        self._mark_write(user_id)
+        self._remove(user_id)
+
+    def begin_fill(self, user_id: int) -> int:
+        """Отметить начало чтения окна пользователя из БД
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Токен, который нужно передать в complete_fill()
+        """
+        state = self._fills.setdefault(user_id, [0, 0])
+        state[0] += 1
+        return state[1]
+
+    def complete_fill(self, user_id: int, token: int, messages: list[dict[str, Any]] | None) -> None:
+        """Завершить чтение окна из БД и закэшировать его, если не было конкурентных записей
+
+        Окно не кэшируется, если во время чтения были записи или запись ещё не завершена.
+
+        Args:
+            user_id: ID пользователя
+            token: Токен из begin_fill()
+            messages: Прочитанное окно (None - чтение не удалось)
+        """
+        state = self._fills[user_id]
+        state[0] -= 1
+        if state[0] == 0:
+            del self._fills[user_id]
+        if messages is not None and state[1] == token and user_id not in self._writes:
+            self.put(user_id, messages)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики кэша
+
+        Returns:
+            Счётчики попаданий/промахов/вытеснений и текущий размер
+        """
+        return {
+            "users": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _mark_write(self, user_id: int) -> None:
+        """Отметить запись для пользователя, чьё окно сейчас читается из БД
+
+        Args:
+            user_id: ID пользователя
+        """
+        state = self._fills.get(user_id)
+        if state is not None:
+            state[1] += 1
+
+    def _remove(self, user_id: int) -> None:
+        """Удалить запись без учёта в метриках
+
+        Args:
+            user_id: ID пользователя
+        """
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Вытеснить устаревшие и самые давние записи при превышении лимитов"""
+        now = self._clock()
+        while self._entries:
+            user_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_access > self.ttl_seconds:
+                self._remove(user_id)
+                self.expirations += 1
+            elif len(self._entries) > self.max_users or self._bytes > self.max_bytes:
+                self._remove(user_id)
+                self.evictions += 1
+            else:
+                break
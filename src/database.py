@@ -1,15 +1,50 @@
 """Управление соединением с базой данных SQLite"""
 
+import asyncio
+import time
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
 import aiosqlite
 
 from src.config import Config
 
 
+@dataclass
+class PoolStats:
+    """Метрики пула соединений
+
+    Attributes:
+        size: Максимальный размер пула
+        open_connections: Количество открытых соединений
+        in_use: Количество соединений, выданных в работу
+        idle: Количество свободных соединений
+        waiting: Количество задач, ожидающих свободное соединение
+        acquisitions: Общее количество выдач соединений
+        waits: Количество выдач, которым пришлось ждать свободное соединение
+        total_wait_ms: Суммарное время ожидания соединений (мс)
+        max_wait_ms: Максимальное время ожидания соединения (мс)
+    """
+
+    size: int
+    open_connections: int
+    in_use: int
+    idle: int
+    waiting: int
+    acquisitions: int
+    waits: int
+    total_wait_ms: float
+    max_wait_ms: float
+
+
 class Database:
-    """Менеджер подключений к базе данных"""
+    """Менеджер подключений к базе данных
+
+    Держит ограниченный пул постоянно открытых соединений. PRAGMA-настройки
+    (WAL, synchronous, busy_timeout, кэш, mmap) применяются один раз при открытии
+    соединения, а не на каждый запрос.
+    """
 
     def __init__(self, config: Config) -> None:
         """Инициализация менеджера базы данных
@@ -31,23 +66,182 @@ class Database:
         ):
             self.db_path = "./" + self.db_path
 
+        self.pool_size: int = max(1, config.DB_POOL_SIZE)
+        # LIFO: повторно выдаём "горячие" соединения с прогретым кэшем страниц.
+        # None — сигнал закрытия пула для задач, ожидающих соединение
+        self._idle: asyncio.LifoQueue[aiosqlite.Connection | None] = asyncio.LifoQueue()
+        self._opened = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Метрики насыщения пула
+        self._acquisitions = 0
+        self._waits = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    async def connect(self) -> None:
+        """Открыть все соединения пула заранее (вызывается при старте приложения)"""
+        self._closed = False
+        # Сигнал закрытия от предыдущего close() больше не нужен
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if conn is not None:
+                self._idle.put_nowait(conn)
+                break
+        while self._opened < self.pool_size:
+            self._opened += 1
+            try:
+                conn = await self._open_connection()
+            except Exception:
+                self._opened -= 1
+                raise
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Закрыть все свободные соединения пула (вызывается при остановке приложения)
+
+        Соединения, выданные в работу, закрываются при возврате в пул.
+        Задачи, ожидающие свободное соединение, получают RuntimeError.
+        """
+        self._closed = True
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if conn is None:
+                continue
+            self._opened -= 1
+            await conn.close()
+        if self._waiting > 0:
+            self._idle.put_nowait(None)
+
+    def get_pool_stats(self) -> PoolStats:
+        """Получить метрики насыщения пула соединений
+
+        Returns:
+            Текущее состояние и накопленные метрики пула
+        """
+        return PoolStats(
+            size=self.pool_size,
+            open_connections=self._opened,
+            in_use=self._in_use,
+            idle=self._idle.qsize(),
+            waiting=self._waiting,
+            acquisitions=self._acquisitions,
+            waits=self._waits,
+            total_wait_ms=round(self._total_wait_ms, 3),
+            max_wait_ms=round(self._max_wait_ms, 3),
+        )
+
     @asynccontextmanager
     async def get_connection(self) -> AsyncIterator[aiosqlite.Connection]:
-        """Получить async соединение с базой данных
+        """Получить async соединение с базой данных из пула
+
+        Транзакция фиксируется при успешном выходе из контекста
+        и откатывается при исключении.
 
         Yields:
             aiosqlite.Connection: Соединение с базой данных
         """
-        conn = await aiosqlite.connect(self.db_path)
+        conn = await self._acquire()
+        healthy = True
+        try:
+            yield conn
+            await conn.commit()
+        except BaseException:
+            try:
+                await conn.rollback()
+            except Exception:
+                healthy = False
+            raise
+        finally:
+            await self._release(conn, healthy)
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        """Открыть новое соединение и применить PRAGMA-настройки
+
+        Returns:
+            Настроенное соединение
+        """
+        conn = await aiosqlite.connect(self.db_path, uri=self.db_path.startswith("file:"))
         # Enable foreign keys support
         await conn.execute("PRAGMA foreign_keys = ON")
+        # WAL: запись бота не блокирует чтение API из того же файла
+        await conn.execute("PRAGMA journal_mode = WAL")
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        await conn.execute(f"PRAGMA busy_timeout = {int(self.config.DB_BUSY_TIMEOUT_MS)}")
+        # Отрицательное значение cache_size задаёт размер в KiB
+        await conn.execute(f"PRAGMA cache_size = -{int(self.config.DB_CACHE_SIZE_KB)}")
+        await conn.execute(f"PRAGMA mmap_size = {int(self.config.DB_MMAP_SIZE)}")
         # Set row factory to dict for easier data access
         conn.row_factory = aiosqlite.Row
+        return conn
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        """Взять соединение из пула, открыв новое или дождавшись свободного
+
+        Returns:
+            Соединение с базой данных
+
+        Raises:
+            RuntimeError: Если пул закрыт
+        """
+        if self._closed:
+            raise RuntimeError("Database connection pool is closed")
+
+        self._acquisitions += 1
+
+        if self._idle.empty() and self._opened < self.pool_size:
+            self._opened += 1
+            try:
+                conn = await self._open_connection()
+            except Exception:
+                self._opened -= 1
+                raise
+            self._in_use += 1
+            return conn
+
+        if self._idle.empty():
+            self._waits += 1
+
+        start = time.perf_counter()
+        self._waiting += 1
         try:
-            yield conn
-            await conn.commit()
-        except Exception:
-            await conn.rollback()
-            raise
+            conn = await self._idle.get()
         finally:
+            self._waiting -= 1
+
+        if conn is None:
+            # Пул закрыт во время ожидания: передаём сигнал следующей задаче
+            self._idle.put_nowait(None)
+            raise RuntimeError("Database connection pool is closed")
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self._total_wait_ms += wait_ms
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+        self._in_use += 1
+        return conn
+
+    async def _release(self, conn: aiosqlite.Connection, healthy: bool) -> None:
+        """Вернуть соединение в пул
+
+        Args:
+            conn: Соединение для возврата
+            healthy: False, если соединение в неизвестном состоянии и его нужно закрыть
+        """
+        self._in_use -= 1
+        if self._closed or not healthy:
+            self._opened -= 1
             await conn.close()
+            # Ожидающие задачи не должны зависнуть из-за выброшенного соединения
+            if not self._closed and self._waiting > 0:
+                self._opened += 1
+                try:
+                    replacement = await self._open_connection()
+                except Exception:
+                    self._opened -= 1
+                    raise
+                self._idle.put_nowait(replacement)
+            return
+        self._idle.put_nowait(conn)
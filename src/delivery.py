@@ -0,0 +1,398 @@
+"""Очередь исходящих запросов к Telegram с учётом лимитов на чат и на бота"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from aiogram.client.default import Default
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiogram.methods.base import Response, TelegramMethod, TelegramType
+
+from src.config import Config
+from src.metrics import Histogram
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+# Максимальная длина текста одного сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Границы корзин гистограммы задержки доставки
+DELIVERY_MS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Сколько ждать доставки оставшихся запросов при остановке
+DRAIN_TIMEOUT_SECONDS = 5.0
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list[str]:
+    """Разбить текст на части не длиннее лимита, по возможности по переводам строк
+
+    Args:
+        text: Текст сообщения
+        limit: Максимальная длина части
+
+    Returns:
+        Части в исходном порядке (для короткого текста - он сам)
+    """
+    parts: list[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            # Строка длиннее лимита: режем по лимиту
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+def _is_formatted(bot: "Bot", method: SendMessage) -> bool:
+    """Проверить, задано ли у сообщения форматирование (явно или по умолчанию для бота)
+
+    Args:
+        bot: Бот, выполняющий запрос
+        method: Сообщение
+
+    Returns:
+        True, если у сообщения есть entities или parse_mode
+    """
+    parse_mode = method.parse_mode
+    if isinstance(parse_mode, Default):
+        parse_mode = bot.default[parse_mode.name]
+    return bool(method.entities) or parse_mode is not None
+
+
+def _chunk(method: SendMessage, text: str, index: int, total: int) -> SendMessage:
+    """Построить часть разбитого сообщения
+
+    Args:
+        method: Исходное сообщение
+        text: Текст части
+        index: Номер части
+        total: Количество частей
+
+    Returns:
+        Сообщение с текстом части: ответ на сообщение сохраняется только у первой
+        части, клавиатура - только у последней
+    """
+    update: dict[str, Any] = {"text": text}
+    if index > 0:
+        update["reply_parameters"] = None
+        update["reply_to_message_id"] = None
+    if index < total - 1:
+        update["reply_markup"] = None
+    return method.model_copy(update=update)
+
+
+@dataclass
+class _Job:
+    """Запрос к Bot API, ожидающий отправки
+
+    Attributes:
+        make_request: Следующий обработчик в цепочке запросов сессии
+        bot: Бот, выполняющий запрос
+        method: Метод Bot API
+        future: Future с ответом для вызвавшего
+        enqueued_at: Время постановки в очередь
+        attempts: Количество повторов после RetryAfter
+    """
+
+    make_request: NextRequestMiddlewareType[Any]
+    bot: "Bot"
+    method: TelegramMethod[Any]
+    future: asyncio.Future[Response[Any]]
+    enqueued_at: float
+    attempts: int = 0
+
+
+@dataclass
+class _Chat:
+    """Очередь запросов одного чата
+
+    Attributes:
+        jobs: Запросы в порядке постановки
+        next_at: Не раньше этого времени можно отправить следующий запрос
+        busy: Запрос чата выполняется или чат стоит в расписании
+    """
+
+    jobs: deque[_Job] = field(default_factory=deque)
+    next_at: float = 0.0
+    busy: bool = False
+
+
+class DeliveryQueue(BaseRequestMiddleware):
+    """Middleware сессии бота: очередь отправок и правок с темпом по чатам и по боту
+
+    Все запросы с chat_id (ответы, правки, удаления) проходят через очередь:
+    в одном чате не чаще DELIVERY_CHAT_INTERVAL_SECONDS (в группах -
+    DELIVERY_GROUP_INTERVAL_SECONDS) и строго по порядку, а всего не больше
+    DELIVERY_GLOBAL_PER_SECOND в секунду на бота (каждый из BOT_WORKERS
+    воркеров получает свою долю). Расписание ведёт одна фоновая
+    задача: она выбирает чат, который раньше всех может отправлять, и не
+    задерживает остальные чаты из-за медленного. RetryAfter (429) откладывает
+    запрос чата на указанное Telegram время и повторяет его. Текст длиннее
+    4096 символов отправляется несколькими сообщениями по порядку: ответ на
+    сообщение - только у первой части, клавиатура - только у последней.
+    Форматированный текст (entities или parse_mode) не разбивается: смещения
+    сущностей и теги разметки нельзя корректно разнести по частям.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        logger: structlog.BoundLogger,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация
+
+        Args:
+            config: Конфигурация приложения
+            logger: Логгер приложения
+            clock: Источник времени (для тестов)
+        """
+        self.logger = logger
+        # Лимит Telegram общий для бота: воркеры (BOT_WORKERS) делят его поровну; 0 - без ограничения
+        per_second = config.DELIVERY_GLOBAL_PER_SECOND / max(1, config.BOT_WORKERS)
+        self.global_interval = 1 / per_second if per_second > 0 else 0.0
+        self.chat_interval: float = config.DELIVERY_CHAT_INTERVAL_SECONDS
+        self.group_interval: float = config.DELIVERY_GROUP_INTERVAL_SECONDS
+        self.max_retries: int = config.DELIVERY_MAX_RETRIES
+        self._clock = clock
+        self._chats: dict[int | str, _Chat] = {}
+        # (время готовности, порядковый номер, chat_id) - чаты с запросами в очереди
+        self._schedule: list[tuple[float, int, int | str]] = []
+        self._seq = itertools.count()
+        self._global_next = 0.0
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._sending: set[asyncio.Task[None]] = set()
+
+        # Метрики
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.split = 0
+        self.latency_ms = Histogram(DELIVERY_MS_BUCKETS)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Поставить запрос в очередь чата или выполнить сразу, если он не относится к чату
+
+        Args:
+            make_request: Следующий обработчик в цепочке запросов сессии
+            bot: Бот, выполняющий запрос
+            method: Метод Bot API
+
+        Returns:
+            Ответ Bot API (для разбитого сообщения - ответ на первую часть)
+        """
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or self._dispatcher is None:
+            return await make_request(bot, method)
+
+        if isinstance(method, SendMessage) and len(method.text) > TELEGRAM_MESSAGE_LIMIT:
+            if _is_formatted(bot, method):
+                # Отправляется как есть: Telegram отклонит его как слишком длинное
+                self.logger.warning("delivery_formatted_message_not_split", chat_id=chat_id, length=len(method.text))
+                return await self._enqueue(chat_id, make_request, bot, method)
+            parts = split_message(method.text)
+            self.split += 1
+            futures = [
+                self._enqueue(chat_id, make_request, bot, _chunk(method, part, index, len(parts)))
+                for index, part in enumerate(parts)
+            ]
+            responses = await asyncio.gather(*futures)
+            return responses[0]
+
+        return await self._enqueue(chat_id, make_request, bot, method)
+
+    async def start(self) -> None:
+        """Запустить фоновую задачу расписания"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дождаться отправки очереди (не дольше DRAIN_TIMEOUT_SECONDS) и остановиться"""
+        deadline = time.monotonic() + DRAIN_TIMEOUT_SECONDS
+        while (self.queued or self._sending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._dispatcher
+            self._dispatcher = None
+        for chat in self._chats.values():
+            for job in chat.jobs:
+                job.future.cancel()
+        self._chats.clear()
+        self._schedule.clear()
+
+    @property
+    def queued(self) -> int:
+        """Количество запросов, ожидающих отправки"""
+        return sum(len(chat.jobs) for chat in self._chats.values())
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики доставки
+
+        Returns:
+            Глубина очереди, количество чатов, отправленных, повторённых, неудачных
+            и разбитых сообщений, гистограмма задержки доставки
+        """
+        return {
+            "queued": self.queued,
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "split": self.split,
+            "latency_ms": self.latency_ms.snapshot(),
+        }
+
+    def _enqueue(
+        self,
+        chat_id: int | str,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> asyncio.Future[Response[TelegramType]]:
+        """Добавить запрос в очередь чата
+
+        Args:
+            chat_id: Чат запроса
+            make_request: Следующий обработчик в цепочке запросов сессии
+            bot: Бот, выполняющий запрос
+            method: Метод Bot API
+
+        Returns:
+            Future с ответом Bot API
+        """
+        future: asyncio.Future[Response[TelegramType]] = asyncio.get_running_loop().create_future()
+        chat = self._chats.setdefault(chat_id, _Chat())
+        chat.jobs.append(_Job(make_request, bot, method, future, self._clock()))
+        if not chat.busy:
+            self._schedule_chat(chat_id, chat)
+        return future
+
+    def _schedule_chat(self, chat_id: int | str, chat: _Chat) -> None:
+        """Поставить чат в расписание на время его готовности
+
+        Args:
+            chat_id: Чат
+            chat: Очередь чата
+        """
+        chat.busy = True
+        heapq.heappush(self._schedule, (max(chat.next_at, self._clock()), next(self._seq), chat_id))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Фоновая задача: отправлять запросы готовых чатов в глобальном темпе"""
+        while True:
+            if not self._schedule:
+                self._sweep()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            ready_at = self._schedule[0][0]
+            now = self._clock()
+            start_at = max(ready_at, self._global_next)
+            if start_at > now:
+                # Ждать готовности или появления чата, готового раньше
+                self._wakeup.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), start_at - now)
+                continue
+
+            _, _, chat_id = heapq.heappop(self._schedule)
+            chat = self._chats[chat_id]
+            # Запросы, от ожидания которых отказались (например, отменённая генерация), не отправляются
+            while chat.jobs and chat.jobs[0].future.done():
+                chat.jobs.popleft()
+            if not chat.jobs:
+                self._release_chat(chat_id, chat)
+                continue
+
+            self._global_next = max(now, self._global_next) + self.global_interval
+            task = asyncio.create_task(self._send(chat_id, chat, chat.jobs.popleft()))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, chat_id: int | str, chat: _Chat, job: _Job) -> None:
+        """Выполнить запрос чата и запланировать следующий
+
+        Args:
+            chat_id: Чат
+            chat: Очередь чата
+            job: Запрос
+        """
+        started = self._clock()
+        interval = self.group_interval if isinstance(chat_id, int) and chat_id < 0 else self.chat_interval
+        chat.next_at = started + interval
+        try:
+            response = await job.make_request(job.bot, job.method)
+        except TelegramRetryAfter as e:
+            if job.attempts < self.max_retries and not job.future.done():
+                # Повторить первым в очереди чата после паузы, которую назвал Telegram
+                job.attempts += 1
+                self.retried += 1
+                chat.jobs.appendleft(job)
+                chat.next_at = self._clock() + e.retry_after
+                self.logger.warning("telegram_retry_after", chat_id=chat_id, retry_after=e.retry_after)
+            else:
+                self._fail(job, e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            self.sent += 1
+            self.latency_ms.observe((self._clock() - job.enqueued_at) * 1000)
+            if not job.future.done():
+                job.future.set_result(response)
+        finally:
+            if chat.jobs:
+                self._schedule_chat(chat_id, chat)
+            else:
+                self._release_chat(chat_id, chat)
+
+    def _fail(self, job: _Job, error: Exception) -> None:
+        """Передать ошибку запроса вызвавшему
+
+        Args:
+            job: Запрос
+            error: Ошибка
+        """
+        self.failed += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def _sweep(self) -> None:
+        """Удалить пустые чаты, для которых уже можно отправлять без паузы"""
+        now = self._clock()
+        idle = [chat_id for chat_id, chat in self._chats.items() if not chat.busy and chat.next_at <= now]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    def _release_chat(self, chat_id: int | str, chat: _Chat) -> None:
+        """Снять чат с расписания; пустой и уже готовый чат удаляется
+
+        Args:
+            chat_id: Чат
+            chat: Очередь чата
+        """
+        chat.busy = False
+        if not chat.jobs and chat.next_at <= self._clock():
+            del self._chats[chat_id]
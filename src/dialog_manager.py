@@ -1,23 +1,40 @@
 """Управление историей диалогов с персистентным хранением"""
 
+from collections.abc import Coroutine
 from typing import Any
 
 from src.config import Config
+from src.conversation_cache import ConversationCache
+from src.llm_usage import LLMUsage
 from src.message_repository import MessageRepository
+from src.token_estimator import CharRatioTokenEstimator, TokenEstimator
 
 
 class DialogManager:
     """Управление историей диалогов с персистентным хранением"""
 
-    def __init__(self, config: Config, repository: MessageRepository) -> None:
+    def __init__(
+        self, config: Config, repository: MessageRepository, token_estimator: TokenEstimator | None = None
+    ) -> None:
         """Инициализация менеджера диалогов
 
         Args:
             config: Конфигурация приложения
             repository: Репозиторий для работы с сообщениями
+            token_estimator: Оценщик токенов для MAX_CONTEXT_TOKENS (по умолчанию - по символам на токен)
         """
         self.config: Config = config
         self.repository: MessageRepository = repository
+        self.token_estimator: TokenEstimator = token_estimator or CharRatioTokenEstimator(
+            config.CONTEXT_CHARS_PER_TOKEN
+        )
+        self.cache: ConversationCache | None = None
+        if config.CONVERSATION_CACHE_ENABLED:
+            self.cache = ConversationCache(
+                max_users=config.CONVERSATION_CACHE_MAX_USERS,
+                max_bytes=config.CONVERSATION_CACHE_MAX_BYTES,
+                ttl_seconds=config.CONVERSATION_CACHE_TTL_SECONDS,
+            )
 
     async def get_history(self, user_id: int) -> list[dict[str, Any]]:
         """Получить историю диалога пользователя
@@ -28,30 +45,82 @@ class DialogManager:
         Returns:
             Список сообщений в формате OpenAI API
         """
-        # Загрузить сообщения из базы данных
-        messages = await self.repository.get_user_messages(user_id)
+        if self.cache is not None:
+            cached = self.cache.get(user_id)
+            if cached is not None:
+                window = self._trim_window(cached)
+                self.cache.put(user_id, window)
+                return self._build_history(window)
 
-        # Преобразовать формат БД в формат OpenAI API
-        history = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        # Загрузить из базы данных только нужный хвост истории
+        messages = await self._load_window(
+            user_id,
+            self.repository.get_recent_messages(
+                user_id,
+                self._history_limit(),
+                token_budget=self._token_budget(),
+                estimate_tokens=self.token_estimator.estimate_tokens,
+            ),
+        )
 
-        # Добавить системный промпт в начало (не хранится в БД)
-        history = [{"role": "system", "content": self.config.SYSTEM_PROMPT}] + history
+        return self._build_history(messages)
 
-        # Применить обрезку контекста если настроено
-        if self.config.MAX_CONTEXT_MESSAGES > 0:
-            history = self._trim_history(history)
+    async def add_message(self, user_id: int, role: str, content: str, usage: LLMUsage | None = None) -> None:
+        """Добавить сообщение в историю
 
-        return history
+        Args:
+            user_id: ID пользователя
+            role: Роль отправителя (user/assistant)
+            content: Текст сообщения
+            usage: Расход токенов и задержка ответа LLM (для сообщений ассистента)
+        """
+        if self.cache is None:
+            await self.repository.add_message(user_id, role, content, usage)
+            return
 
-    async def add_message(self, user_id: int, role: str, content: str) -> None:
-        """Добавить сообщение в историю
+        # Чтение из БД, пересёкшееся с записью, не должно попасть в кэш:
+        # оно может уже содержать это сообщение, и append() добавил бы его второй раз
+        self.cache.begin_write(user_id)
+        message: dict[str, Any] | None = None
+        try:
+            await self.repository.add_message(user_id, role, content, usage)
+            message = {"role": role, "content": content}
+        finally:
+            self.cache.complete_write(user_id, message)
+
+    async def add_message_and_get_history(self, user_id: int, role: str, content: str) -> list[dict[str, Any]]:
+        """Добавить сообщение и получить историю диалога за один запрос к БД
+
+        Эквивалент add_message() + get_history(), но в одной транзакции
+        на одном соединении. Если окно пользователя закэшировано, из БД
+        ничего не читается.
 
         Args:
             user_id: ID пользователя
             role: Роль отправителя (user/assistant)
             content: Текст сообщения
+
+        Returns:
+            Список сообщений в формате OpenAI API, включая добавленное
         """
-        await self.repository.add_message(user_id, role, content)
+        if self.cache is not None and self.cache.contains(user_id):
+            # Запись попадает в кэш через add_message(), чтение обслуживается из кэша
+            await self.add_message(user_id, role, content)
+            return await self.get_history(user_id)
+
+        messages = await self._load_window(
+            user_id,
+            self.repository.add_message_and_get_history(
+                user_id,
+                role,
+                content,
+                self._history_limit(),
+                token_budget=self._token_budget(),
+                estimate_tokens=self.token_estimator.estimate_tokens,
+            ),
+        )
+
+        return self._build_history(messages)
 
     async def clear_history(self, user_id: int) -> None:
         """Очистить историю диалога пользователя (мягкое удаление)
@@ -61,6 +130,104 @@ class DialogManager:
         """
         await self.repository.soft_delete_user_messages(user_id)
 
+        if self.cache is not None:
+            self.cache.invalidate(user_id)
+
+    async def _load_window(
+        self, user_id: int, query: Coroutine[Any, Any, list[dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """Выполнить чтение окна диалога из БД и закэшировать результат
+
+        Args:
+            user_id: ID пользователя
+            query: Запрос к репозиторию, возвращающий окно диалога
+
+        Returns:
+            Окно диалога (role, content) в хронологическом порядке
+        """
+        if self.cache is None:
+            return await query
+
+        fill_token = self.cache.begin_fill(user_id)
+        try:
+            messages = await query
+        except BaseException:
+            self.cache.complete_fill(user_id, fill_token, None)
+            raise
+        self.cache.complete_fill(user_id, fill_token, messages)
+        return messages
+
+    def _history_limit(self) -> int | None:
+        """Количество последних сообщений, которое нужно загрузить из БД
+
+        Returns:
+            MAX_CONTEXT_MESSAGES*2 или None, если обрезка контекста выключена
+        """
+        if self.config.MAX_CONTEXT_MESSAGES > 0:
+            return self.config.MAX_CONTEXT_MESSAGES * 2
+        return None
+
+    def _token_budget(self) -> int | None:
+        """Бюджет токенов на сообщения диалога с учётом системного промпта
+
+        Системный промпт сохраняется всегда, поэтому его оценка вычитается из MAX_CONTEXT_TOKENS.
+
+        Returns:
+            Оставшийся бюджет токенов или None, если режим выключен
+        """
+        if self.config.MAX_CONTEXT_TOKENS <= 0:
+            return None
+        system_tokens = self.token_estimator.estimate_tokens(len(self.config.SYSTEM_PROMPT))
+        return max(0, self.config.MAX_CONTEXT_TOKENS - system_tokens)
+
+    def _trim_window(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Обрезать закэшированное окно по тем же правилам, что и выборку из БД
+
+        Args:
+            messages: Сообщения (role, content) в хронологическом порядке
+
+        Returns:
+            Последние сообщения, укладывающиеся в MAX_CONTEXT_MESSAGES и MAX_CONTEXT_TOKENS
+        """
+        limit = self._history_limit()
+        if limit is not None:
+            messages = messages[-limit:]
+
+        token_budget = self._token_budget()
+        if token_budget is None:
+            return messages
+
+        # Идём от новых сообщений к старым; самое новое сохраняется всегда
+        start = len(messages)
+        used_tokens = 0
+        for index in range(len(messages) - 1, -1, -1):
+            used_tokens += self.token_estimator.estimate_tokens(len(messages[index]["content"]))
+            if used_tokens > token_budget and start < len(messages):
+                break
+            start = index
+        return messages[start:]
+
+    def _build_history(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Собрать контекст для LLM из сообщений БД
+
+        Args:
+            messages: Сообщения пользователя (role, content) в хронологическом порядке
+
+        Returns:
+            Список сообщений в формате OpenAI API с системным промптом
+        """
+        # Преобразовать формат БД в формат OpenAI API
+        history = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+
+        # Добавить системный промпт в начало (не хранится в БД)
+        history = [{"role": "system", "content": self.config.SYSTEM_PROMPT}] + history
+
+        # Применить обрезку контекста если настроено
+        if self.config.MAX_CONTEXT_MESSAGES > 0:
+            history = self._trim_history(history)
+
+        return history
+
     def _trim_history(self, history: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """Обрезать историю до MAX_CONTEXT_MESSAGES
 
@@ -0,0 +1,141 @@
+"""Отслеживание выполняющихся генераций ответов и их отмена"""
+
+import asyncio
+from collections.abc import Coroutine
+from enum import StrEnum
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class GenerationPolicy(StrEnum):
+    """Что делать с выполняющейся генерацией, когда пользователь пишет снова"""
+
+    # Новое сообщение отменяет предыдущую генерацию (её ответ уже никому не нужен)
+    CANCEL_PREVIOUS = "cancel_previous"
+    # Предыдущие генерации продолжаются; отменяет только /clear
+    KEEP_PREVIOUS = "keep_previous"
+
+
+class GenerationCancelledError(Exception):
+    """Генерация отменена более новым сообщением пользователя или очисткой истории"""
+
+
+class GenerationTracker:
+    """Выполняющиеся генерации ответов по пользователям
+
+    Генерация выполняется в отдельной задаче, поэтому её отмена прерывает
+    ожидание LLM (и HTTP-запрос к провайдеру), не затрагивая обработчик,
+    который её запустил: он получает GenerationCancelledError.
+    """
+
+    def __init__(self, policy: GenerationPolicy) -> None:
+        """Инициализация
+
+        Args:
+            policy: Политика для генераций, вытесненных новым сообщением
+        """
+        self.policy = policy
+        self._tasks: dict[int, set[asyncio.Task[Any]]] = {}
+
+        # Метрики
+        self.superseded = 0
+        self.cleared = 0
+
+    async def run(self, user_id: int, coro: Coroutine[Any, Any, T]) -> T:
+        """Выполнить генерацию пользователя с возможностью её отмены
+
+        Args:
+            user_id: ID пользователя
+            coro: Корутина генерации ответа
+
+        Returns:
+            Результат генерации
+
+        Raises:
+            GenerationCancelledError: Если генерация отменена новым сообщением или /clear
+        """
+        self.supersede(user_id)
+
+        task = asyncio.ensure_future(coro)
+        tasks = self._tasks.setdefault(user_id, set())
+        tasks.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if task.cancelled() and (current is None or not current.cancelling()):
+                # Отменена только генерация, а не вызывающая задача
+                raise GenerationCancelledError(f"Генерация для пользователя {user_id} отменена") from None
+            raise
+        finally:
+            tasks.discard(task)
+            if not tasks and self._tasks.get(user_id) is tasks:
+                del self._tasks[user_id]
+
+    def supersede(self, user_id: int) -> int:
+        """Отменить генерации пользователя, если этого требует политика
+
+        Вызывается при новом сообщении пользователя, в том числе до ожидания
+        очереди его ходов, чтобы устаревшая генерация не задерживала новую.
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество отменённых генераций
+        """
+        if self.policy is not GenerationPolicy.CANCEL_PREVIOUS:
+            return 0
+        cancelled = self._cancel_tasks(user_id)
+        self.superseded += cancelled
+        return cancelled
+
+    async def cancel(self, user_id: int) -> int:
+        """Отменить все генерации пользователя и дождаться их завершения
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество отменённых генераций
+        """
+        tasks = list(self._tasks.get(user_id, ()))
+        cancelled = self._cancel_tasks(user_id)
+        self.cleared += cancelled
+        # Дождаться, чтобы отменённая генерация не успела ничего записать после возврата
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return cancelled
+
+    def in_flight(self, user_id: int) -> int:
+        """Количество выполняющихся генераций пользователя"""
+        return len(self._tasks.get(user_id, ()))
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики генераций
+
+        Returns:
+            Политика, количество выполняющихся и отменённых генераций
+        """
+        return {
+            "policy": self.policy.value,
+            "in_flight": sum(len(tasks) for tasks in self._tasks.values()),
+            "superseded": self.superseded,
+            "cleared": self.cleared,
+        }
+
+    def _cancel_tasks(self, user_id: int) -> int:
+        """Запросить отмену незавершённых генераций пользователя
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество генераций, которым отправлена отмена
+        """
+        cancelled = 0
+        for task in self._tasks.get(user_id, ()):
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        return cancelled
@@ -1,28 +1,70 @@
 """Обработчики сообщений Telegram"""
 
+import asyncio
+import contextlib
+import time
+from typing import Any
+
 import structlog
 from aiogram import Router
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from src.bulkhead import BUSY_MESSAGE, BulkheadFullError
+from src.delivery import TELEGRAM_MESSAGE_LIMIT, split_message
 from src.dialog_manager import DialogManager
+from src.generation_tracker import GenerationCancelledError, GenerationPolicy, GenerationTracker
 from src.llm_client import LLMClient
+from src.llm_usage import LLMUsage
+from src.message_debouncer import MessageDebouncer
+from src.quota import QuotaExceededError, QuotaTracker
+
+# Текст сообщения-заглушки до появления первых токенов
+STREAM_PLACEHOLDER = "…"
+
+# Ответ пользователю при ошибке генерации
+ERROR_MESSAGE = "Произошла ошибка, попробуйте позже"
+
+
+class EmptyResponseError(Exception):
+    """LLM завершил ответ без текста"""
+
+
+class StreamAnswerError(Exception):
+    """Потоковый ответ прерван ошибкой; заглушка уже заменена сообщением об ошибке"""
 
 
 class MessageHandler:
     """Обработчики сообщений Telegram"""
 
-    def __init__(self, llm_client: LLMClient, dialog_manager: DialogManager, logger: structlog.BoundLogger) -> None:
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        dialog_manager: DialogManager,
+        logger: structlog.BoundLogger,
+        quota: QuotaTracker | None = None,
+    ) -> None:
         """Инициализация роутера и регистрация обработчиков
 
         Args:
             llm_client: Клиент для работы с LLM
             dialog_manager: Менеджер истории диалогов
             logger: Логгер приложения
+            quota: Учёт квот пользователей (None - без ограничений)
         """
         self.llm_client: LLMClient = llm_client
         self.dialog_manager: DialogManager = dialog_manager
         self.logger: structlog.BoundLogger = logger
+        self.quota: QuotaTracker | None = quota
+        self.generations: GenerationTracker = GenerationTracker(
+            GenerationPolicy(dialog_manager.config.GENERATION_SUPERSEDE_POLICY)
+        )
+        self.debouncer: MessageDebouncer[Message] = MessageDebouncer(
+            dialog_manager.config.MESSAGE_DEBOUNCE_SECONDS,
+            dialog_manager.config.MESSAGE_DEBOUNCE_MAX_SECONDS,
+            self._handle_turn,
+        )
         self.router: Router = Router()
         self._register_handlers()
 
@@ -63,7 +105,14 @@ class MessageHandler:
             return
 
         user_id = message.from_user.id
-        await self.dialog_manager.clear_history(user_id)
+        # Отбросить собираемый ход и отменить генерацию до очистки,
+        # чтобы они не попали в новую историю
+        self.debouncer.discard(user_id)
+        cancelled = await self.generations.cancel(user_id)
+        if cancelled:
+            self.logger.info("generation_cancelled", user_id=user_id, reason="clear", count=cancelled)
+        async with self.debouncer.lock(user_id):
+            await self.dialog_manager.clear_history(user_id)
         await message.answer("История диалога очищена")
 
     async def handle_text(self, message: Message) -> None:
@@ -84,21 +133,181 @@ class MessageHandler:
         # Логирование получения сообщения
         self.logger.info("message_received", user_id=user_id, text=message.text)
 
-        try:
-            # Добавить сообщение пользователя в историю
-            await self.dialog_manager.add_message(user_id, "user", message.text)
+        # Новое сообщение делает выполняющуюся генерацию устаревшей (по политике)
+        superseded = self.generations.supersede(user_id)
+        if superseded:
+            self.logger.info("generation_cancelled", user_id=user_id, reason="superseded", count=superseded)
+
+        # Быстрая серия сообщений объединяется в один ход с одним вызовом LLM
+        await self.debouncer.submit(user_id, message)
+
+    async def _handle_turn(self, user_id: int, messages: list[Message]) -> None:
+        """Обработать ход пользователя: сохранить сообщения и ответить на них одним вызовом LLM
+
+        Выполняется под блокировкой пользователя, поэтому ходы одного
+        пользователя не перемешивают записи в историю.
+
+        Args:
+            user_id: ID пользователя
+            messages: Сообщения хода в порядке поступления
+        """
+        message = messages[-1]
+        if self.quota is not None:
+            try:
+                # Квота считает ходы: объединённая серия сообщений - один запрос к LLM
+                self.quota.acquire(user_id)
+            except QuotaExceededError as e:
+                # Квота исчерпана: отказать, не сохраняя сообщения и не вызывая LLM
+                self.logger.warning("quota_exceeded", user_id=user_id, limit=e.limit_name, retry_after=e.retry_after)
+                await message.answer(e.user_message)
+                return
 
-            # Получить полную историю и отправить в LLM
-            history = await self.dialog_manager.get_history(user_id)
-            response = await self.llm_client.generate_response(history)
+        try:
+            # Каждое сообщение сохраняется отдельно, в контекст LLM попадают все
+            for earlier in messages[:-1]:
+                await self.dialog_manager.add_message(user_id, "user", earlier.text or "")
 
-            # Добавить ответ ассистента в историю
-            await self.dialog_manager.add_message(user_id, "assistant", response)
+            # Добавить последнее сообщение и получить историю за один запрос к БД
+            history = await self.dialog_manager.add_message_and_get_history(user_id, "user", message.text or "")
 
-            await message.answer(response)
+            # Генерация отменяется новым сообщением (по политике) или /clear
+            await self.generations.run(user_id, self._answer(message, user_id, history))
+        except GenerationCancelledError:
+            # Ответ больше не нужен: ничего не сохраняем и не отправляем
+            self.logger.info("turn_cancelled", user_id=user_id)
+        except BulkheadFullError as e:
+            # Перегрузка: сразу сообщить пользователю вместо ожидания в очереди
+            self.logger.warning("llm_overloaded", user_id=user_id, error=str(e))
+            if not self.dialog_manager.config.STREAMING_ENABLED:
+                await message.answer(BUSY_MESSAGE)
+        except StreamAnswerError as e:
+            # Пользователь уже видит ошибку в заглушке: второе сообщение не отправляем
+            self.logger.error("llm_error", user_id=user_id, error=str(e), exc_info=e.__cause__ or e)
         except Exception as e:
             # Логирование ошибки
             self.logger.error("llm_error", user_id=user_id, error=str(e), exc_info=True)
 
             # Отправка сообщения пользователю
-            await message.answer("Произошла ошибка, попробуйте позже")
+            await message.answer(ERROR_MESSAGE)
+
+    async def _answer(self, message: Message, user_id: int, history: list[dict[str, Any]]) -> None:
+        """Сгенерировать ответ, сохранить его в историю и отправить пользователю
+
+        Args:
+            message: Входящее сообщение
+            user_id: ID пользователя
+            history: Контекст для LLM
+        """
+        if self.dialog_manager.config.STREAMING_ENABLED:
+            # Ответ показывается по мере генерации, в историю сохраняется один раз целиком
+            response, usage = await self._stream_answer(message, history)
+            self._record_tokens(user_id, usage)
+            await self.dialog_manager.add_message(user_id, "assistant", response, usage)
+            return
+
+        result = await self.llm_client.generate_response_with_usage(history)
+        self._record_tokens(user_id, result.usage)
+        if not result.content.strip():
+            # Пустой ответ не сохраняется в историю и не отправляется
+            raise EmptyResponseError("LLM вернул пустой ответ")
+
+        # Добавить ответ ассистента в историю вместе с расходом токенов
+        await self.dialog_manager.add_message(user_id, "assistant", result.content, result.usage)
+
+        await message.answer(result.content)
+
+    def _record_tokens(self, user_id: int, usage: LLMUsage | None) -> None:
+        """Учесть расход токенов ответа в квоте пользователя
+
+        Args:
+            user_id: ID пользователя
+            usage: Расход ответа (None - неизвестен)
+        """
+        if self.quota is not None and usage is not None:
+            self.quota.record_tokens(user_id, usage.total_tokens)
+
+    async def _stream_answer(self, message: Message, history: list[dict[str, Any]]) -> tuple[str, LLMUsage | None]:
+        """Отправить ответ LLM потоково: заглушка, затем редактирование по мере генерации
+
+        Редактирования не чаще STREAM_EDIT_INTERVAL_SECONDS, чтобы не упираться
+        в лимиты Telegram на редактирование сообщений.
+
+        Args:
+            message: Входящее сообщение
+            history: Контекст для LLM
+
+        Returns:
+            Полный текст ответа и его расход (None - поток не сообщил расход)
+
+        Raises:
+            BulkheadFullError: Если вызов LLM отклонён из-за перегрузки (заглушка уже заменена)
+            StreamAnswerError: Если поток прерван ошибкой или не содержит текста (заглушка уже заменена)
+        """
+        interval = self.dialog_manager.config.STREAM_EDIT_INTERVAL_SECONDS
+        placeholder = await message.answer(STREAM_PLACEHOLDER)
+
+        text = ""
+        shown = ""
+        usages: list[LLMUsage] = []
+        last_edit = time.monotonic()
+        try:
+            async for delta in self.llm_client.stream_response(history, on_usage=usages.append):
+                text += delta
+                now = time.monotonic()
+                if now - last_edit >= interval and text.strip():
+                    # Промежуточные правки не критичны: при ошибке покажем текст следующей правкой
+                    edited = await self._edit_text(placeholder, text[:TELEGRAM_MESSAGE_LIMIT], strict=False)
+                    if edited is not None:
+                        shown = edited
+                    last_edit = now
+            if not text.strip():
+                # Пустой ответ не сохраняется в историю
+                raise EmptyResponseError("LLM вернул пустой ответ")
+        except BulkheadFullError:
+            # Заглушка заменяется ответом о перегрузке
+            await self._edit_text(placeholder, BUSY_MESSAGE, strict=False)
+            raise
+        except asyncio.CancelledError:
+            # Генерация отменена: пустую заглушку убираем, показанную часть оставляем
+            if not shown:
+                with contextlib.suppress(TelegramAPIError):
+                    await placeholder.delete()
+            raise
+        except Exception as e:
+            # Заглушка заменяется сообщением об ошибке; показанная часть ответа сохраняется над ним
+            suffix = f"\n\n{ERROR_MESSAGE}"
+            error_text = shown[: TELEGRAM_MESSAGE_LIMIT - len(suffix)] + suffix if shown else ERROR_MESSAGE
+            await self._edit_text(placeholder, error_text, strict=False)
+            raise StreamAnswerError(str(e)) from e
+
+        parts = split_message(text)
+        if parts[0] and parts[0] != shown:
+            await self._edit_text(placeholder, parts[0], strict=True)
+
+        # Хвост длинного ответа отправляем отдельными сообщениями, по возможности по границам строк
+        for part in parts[1:]:
+            await message.answer(part)
+
+        return text, usages[-1] if usages else None
+
+    async def _edit_text(self, sent: Message, text: str, strict: bool) -> str | None:
+        """Отредактировать отправленное сообщение
+
+        Args:
+            sent: Ранее отправленное сообщение бота
+            text: Новый текст
+            strict: Пробрасывать ошибки Telegram (для финальной правки)
+
+        Returns:
+            Показанный текст или None, если правка не удалась
+        """
+        try:
+            await sent.edit_text(text)
+        except TelegramAPIError as e:
+            if isinstance(e, TelegramBadRequest) and "message is not modified" in str(e):
+                return text
+            if strict:
+                raise
+            self.logger.warning("stream_edit_failed", error=str(e))
+            return None
+        return text
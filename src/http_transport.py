@@ -0,0 +1,80 @@
+"""Общий для процесса HTTP-клиент для запросов к LLM"""
+
+import importlib.util
+
+import httpx
+import structlog
+
+from src.config import Config
+
+# Единственный клиент процесса: все LLMClient используют общий пул соединений
+_http_client: httpx.AsyncClient | None = None
+
+
+def http2_available() -> bool:
+    """Проверить, установлена ли поддержка HTTP/2 (пакет h2)
+
+    Returns:
+        True если httpx может использовать HTTP/2
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client(config: Config, logger: structlog.BoundLogger | None = None) -> httpx.AsyncClient:
+    """Получить общий HTTP-клиент процесса, создав его при первом обращении
+
+    Клиент закрывается только через close_http_client(): его нельзя закрывать
+    через AsyncOpenAI.close(), так как он общий для всех клиентов процесса.
+
+    Args:
+        config: Конфигурация приложения
+        logger: Логгер для предупреждения, если HTTP/2 включён, но недоступен
+
+    Returns:
+        Общий httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        if config.LLM_HTTP2_ENABLED and not http2_available() and logger is not None:
+            logger.warning("llm_http2_unavailable", reason="h2 package is not installed, using HTTP/1.1")
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(config.LLM_READ_TIMEOUT_SECONDS, connect=config.LLM_CONNECT_TIMEOUT_SECONDS),
+            http2=config.LLM_HTTP2_ENABLED and http2_available(),
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def warm_up_http_client(config: Config, logger: structlog.BoundLogger) -> None:
+    """Заранее открыть соединения ко всем endpoint LLM
+
+    Выполняет HEAD-запрос к каждому base_url, чтобы TCP- и TLS-рукопожатие
+    произошло при старте, а не на первом запросе пользователя. Статус ответа
+    не важен: соединение остаётся в пуле keep-alive. Ошибки только логируются.
+
+    Args:
+        config: Конфигурация приложения
+        logger: Логгер приложения
+    """
+    client = get_http_client(config)
+    base_urls = dict.fromkeys(base_url for _, base_url in [*config.LLM_TARGETS, *config.LLM_FAST_TARGETS])
+    for base_url in base_urls:
+        try:
+            response = await client.head(base_url, timeout=config.LLM_CONNECT_TIMEOUT_SECONDS)
+        except httpx.HTTPError as e:
+            logger.warning("llm_http_warmup_failed", base_url=base_url, error=str(e))
+            continue
+        logger.info("llm_http_warmed_up", base_url=base_url, http_version=response.http_version)
+
+
+async def close_http_client() -> None:
+    """Закрыть общий HTTP-клиент процесса и все его соединения"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
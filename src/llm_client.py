@@ -1,18 +1,225 @@
 """Клиент для работы с LLM через OpenAI API"""
 
-from typing import Any
+import asyncio
+import contextlib
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
 
 import structlog
-from openai import AsyncOpenAI, OpenAIError
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, OpenAIError, Timeout
 
+from src.bulkhead import get_bulkhead
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
 from src.config import Config
+from src.http_transport import get_http_client
+from src.llm_usage import LLMUsage
+from src.model_router import ModelRouter, Route
+from src.rate_limiter import LLMPriority, get_rate_limiter
+from src.response_cache import get_response_cache
+from src.singleflight import SingleFlight, fingerprint
+from src.token_estimator import CharRatioTokenEstimator
+
+T = TypeVar("T")
+
+# HTTP-статусы, при которых запрос имеет смысл повторить (плюс все 5xx)
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429})
+
+# Вес нового измерения в скользящих средних задержки и доли ошибок цели
+HEALTH_EWMA_ALPHA = 0.2
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Проверить, является ли ошибка временной (таймаут, сеть, перегрузка провайдера)
+
+    Args:
+        error: Ошибка вызова LLM
+
+    Returns:
+        True если запрос имеет смысл повторить
+    """
+    if isinstance(error, (TimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Получить задержку перед повтором из заголовков ответа провайдера
+
+    Поддерживаются заголовки retry-after-ms и Retry-After (секунды или HTTP-дата).
+
+    Args:
+        error: Ошибка вызова LLM
+
+    Returns:
+        Задержка в секундах или None, если провайдер её не указал
+    """
+    if not isinstance(error, APIStatusError):
+        return None
+
+    headers = error.response.headers
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+def _token_count(usage: Any, field: str) -> int | None:
+    """Получить количество токенов из usage ответа провайдера
+
+    Args:
+        usage: Объект usage (None - провайдер не сообщил расход)
+        field: Имя поля (prompt_tokens, completion_tokens, total_tokens)
+
+    Returns:
+        Количество токенов или None, если провайдер его не сообщил
+    """
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else None
+
+
+def _elapsed_ms(started: float) -> int:
+    """Время в миллисекундах с момента started (time.perf_counter)"""
+    return round((time.perf_counter() - started) * 1000)
+
+
+@dataclass
+class LLMResult:
+    """Ответ LLM вместе с расходом токенов и задержкой
+
+    Attributes:
+        content: Текст ответа
+        usage: Расход ответа
+    """
+
+    content: str
+    usage: LLMUsage
+
+
+@dataclass
+class LLMTarget:
+    """Цель маршрутизации: модель на конкретном OpenAI-совместимом endpoint
+
+    Attributes:
+        index: Порядковый номер цели (приоритет при равном здоровье)
+        model: Имя модели
+        base_url: URL endpoint
+        client: Клиент OpenAI для endpoint
+        circuit_breaker: Выключатель цели
+        latency_ewma: Скользящая средняя задержки ответа в секундах (None - нет измерений)
+        error_rate: Скользящая доля ошибок
+        requests: Количество попыток
+        failures: Количество неудачных попыток
+    """
+
+    index: int
+    model: str
+    base_url: str
+    client: AsyncOpenAI
+    circuit_breaker: CircuitBreaker
+    latency_ewma: float | None = None
+    error_rate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+    def record_success(self, latency: float) -> None:
+        """Учесть успешную попытку
+
+        Args:
+            latency: Время ответа в секундах
+        """
+        self.requests += 1
+        self._observe_latency(latency)
+        self.error_rate *= 1 - HEALTH_EWMA_ALPHA
+        self.circuit_breaker.record_success()
+
+    def record_failure(self, latency: float | None = None) -> None:
+        """Учесть неудачную попытку
+
+        Args:
+            latency: Время до таймаута в секундах (None - ошибка не связана с задержкой)
+        """
+        self.requests += 1
+        self.failures += 1
+        if latency is not None:
+            self._observe_latency(latency)
+        self.error_rate = self.error_rate * (1 - HEALTH_EWMA_ALPHA) + HEALTH_EWMA_ALPHA
+        self.circuit_breaker.record_failure()
+
+    def score(self, default_latency: float) -> float:
+        """Оценка здоровья цели: ожидаемая задержка с поправкой на долю ошибок (меньше - лучше)
+
+        Args:
+            default_latency: Задержка для цели без измерений
+
+        Returns:
+            Оценка цели
+        """
+        latency = self.latency_ewma if self.latency_ewma is not None else default_latency
+        return latency / max(1.0 - self.error_rate, 0.05)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики цели
+
+        Returns:
+            Модель, endpoint, скользящие задержка и доля ошибок, счётчики и состояние выключателя
+        """
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "circuit_breaker": self.circuit_breaker.get_stats(),
+        }
+
+    def _observe_latency(self, latency: float) -> None:
+        """Обновить скользящую среднюю задержки
+
+        Args:
+            latency: Время ответа в секундах
+        """
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += HEALTH_EWMA_ALPHA * (latency - self.latency_ewma)
 
 
 class LLMClient:
-    """Клиент для работы с LLM через OpenAI API"""
+    """Клиент для работы с LLM через OpenAI API
+
+    Запросы маршрутизируются по пулу целей LLM_TARGETS: выбирается самая
+    здоровая цель по скользящим задержке и доле ошибок, при ошибке или
+    превышении LLM_LATENCY_SLO_SECONDS запрос переключается на следующую.
+    Если задан LLM_FAST_TARGETS, простые запросы сначала отправляются
+    быстрым моделям, а большие модели служат для них запасными целями.
+    """
 
     def __init__(self, config: Config, logger: structlog.BoundLogger) -> None:
-        """Инициализация клиента OpenAI
+        """Инициализация клиентов OpenAI для всех целей
 
         Args:
             config: Конфигурация приложения
@@ -20,13 +227,43 @@ class LLMClient:
         """
         self.config: Config = config
         self.logger: structlog.BoundLogger = logger
-        self.client: AsyncOpenAI = AsyncOpenAI(base_url=config.OPENAI_BASE_URL, api_key=config.OPENAI_API_KEY)
 
-    async def generate_response(self, messages: list[dict[str, Any]]) -> str:
+        self._clients: dict[str, AsyncOpenAI] = {}
+        self.targets: list[LLMTarget] = [
+            self._create_target(index, model, base_url) for index, (model, base_url) in enumerate(config.LLM_TARGETS)
+        ]
+        self.fast_targets: list[LLMTarget] = [
+            self._create_target(len(self.targets) + index, model, base_url)
+            for index, (model, base_url) in enumerate(config.LLM_FAST_TARGETS)
+        ]
+        self.router: ModelRouter | None = ModelRouter(config) if self.fast_targets else None
+        self.rate_limiter = get_rate_limiter(config)
+        self.bulkhead = get_bulkhead(config)
+        self.response_cache = get_response_cache(config, logger)
+        self.singleflight: SingleFlight[LLMResult] | None = SingleFlight() if config.LLM_SINGLEFLIGHT_ENABLED else None
+        self.token_estimator = CharRatioTokenEstimator(config.CONTEXT_CHARS_PER_TOKEN)
+
+        # Метрики
+        self.attempts = 0
+        self.retries = 0
+        self.failovers = 0
+        self.failed_requests = 0
+
+    async def generate_response(
+        self,
+        messages: list[dict[str, Any]],
+        route: Route | None = None,
+        priority: LLMPriority = LLMPriority.USER,
+        use_cache: bool = False,
+    ) -> str:
         """Генерация ответа от LLM
 
         Args:
             messages: История сообщений в формате OpenAI API
+            route: Маршрут запроса (None - определяется по сложности запроса)
+            priority: Приоритет запроса в очередях ограничителя частоты и bulkhead
+            use_cache: Использовать кэш ответов (только для детерминированных запросов,
+                ответ которых зависит лишь от сообщений)
 
         Returns:
             Ответ от LLM
@@ -34,15 +271,91 @@ class LLMClient:
         Raises:
             OpenAIError: При ошибках API (неверный ключ, лимиты и т.д.)
             TimeoutError: При таймауте запроса
+            CircuitOpenError: Если все цели недоступны и их выключатели разомкнуты
+            BulkheadFullError: Если вызов отклонён из-за перегрузки
+        """
+        result = await self.generate_response_with_usage(messages, route, priority, use_cache)
+        return result.content
+
+    async def generate_response_with_usage(
+        self,
+        messages: list[dict[str, Any]],
+        route: Route | None = None,
+        priority: LLMPriority = LLMPriority.USER,
+        use_cache: bool = False,
+    ) -> LLMResult:
+        """Генерация ответа от LLM с учётом расхода токенов и задержки
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+            route: Маршрут запроса (None - определяется по сложности запроса)
+            priority: Приоритет запроса в очередях ограничителя частоты и bulkhead
+            use_cache: Использовать кэш ответов (см. generate_response)
+
+        Returns:
+            Ответ от LLM и его расход
+
+        Raises:
+            OpenAIError: При ошибках API (неверный ключ, лимиты и т.д.)
+            TimeoutError: При таймауте запроса
+            CircuitOpenError: Если все цели недоступны и их выключатели разомкнуты
+            BulkheadFullError: Если вызов отклонён из-за перегрузки
         """
-        # Логирование запроса
-        self.logger.info("llm_request", model=self.config.OPENAI_MODEL, message_count=len(messages))
+        started = time.perf_counter()
+        tiers = self._route_tiers(messages, route)
+
+        # Логирование запроса: предпочтительная модель выбранного маршрута
+        self.logger.info("llm_request", model=tiers[0][0].model, message_count=len(messages))
+        key = fingerprint({"models": [[t.model for t in tier] for tier in tiers], "messages": messages})
+        cache = self.response_cache if use_cache else None
+        if cache is not None:
+            cached = await cache.get(key)
+            if cached is not None:
+                self.logger.info("llm_cache_hit", length=len(cached))
+                usage = LLMUsage(tiers[0][0].model, 0, 0, _elapsed_ms(started), cached=True)
+                return LLMResult(cached, usage)
 
+        async def call() -> LLMResult:
+            result = await self._generate(messages, tiers, priority)
+            if cache is not None and result.content:
+                await cache.set(key, result.content)
+            return result
+
+        if self.singleflight is None:
+            return await call()
+        # Одновременные запросы с теми же моделями и сообщениями разделяют один вызов провайдера
+        return await self.singleflight.do(key, call)
+
+    async def _generate(
+        self, messages: list[dict[str, Any]], tiers: list[list[LLMTarget]], priority: LLMPriority
+    ) -> LLMResult:
+        """Выполнить запрос генерации ответа
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+            tiers: Группы целей в порядке предпочтения
+            priority: Приоритет запроса в очередях ограничителя частоты и bulkhead
+
+        Returns:
+            Ответ от LLM и его расход
+        """
+        estimated_tokens = self._estimate_tokens(messages)
+        requested = time.perf_counter()
         try:
-            response = await self.client.chat.completions.create(
-                model=self.config.OPENAI_MODEL,
-                messages=messages,  # type: ignore[arg-type]
-            )
+            async with contextlib.AsyncExitStack() as slot:
+                target, response, started = await self._call_with_failover(
+                    lambda target: target.client.chat.completions.create(
+                        model=target.model,
+                        messages=messages,  # type: ignore[arg-type]
+                    ),
+                    tiers,
+                    slot,
+                    priority,
+                    estimated_tokens,
+                )
+        except CircuitOpenError as e:
+            self.logger.warning("llm_circuit_open", error=str(e))
+            raise
         except OpenAIError as e:
             self.logger.error("llm_api_error", error=str(e), exc_info=True)
             raise
@@ -50,9 +363,393 @@ class LLMClient:
             self.logger.error("llm_timeout_error", error=str(e), exc_info=True)
             raise
 
+        usage = self._record_usage(target, response.usage, estimated_tokens, requested, started)
         content = response.choices[0].message.content
 
-        # Логирование ответа
-        self.logger.info("llm_response", length=len(content) if content else 0)
+        # Логирование ответа: модель, фактически выполнившая запрос
+        self.logger.info("llm_response", model=target.model, length=len(content) if content else 0)
+        self.logger.info("llm_usage", **asdict(usage))
+
+        return LLMResult(content or "", usage)
 
-        return content or ""
+    async def stream_response(
+        self,
+        messages: list[dict[str, Any]],
+        route: Route | None = None,
+        priority: LLMPriority = LLMPriority.USER,
+        on_usage: Callable[[LLMUsage], None] | None = None,
+    ) -> AsyncIterator[str]:
+        """Потоковая генерация ответа от LLM
+
+        HTTP-запрос к провайдеру закрывается при выходе из итератора,
+        в том числе при отмене задачи или досрочном прекращении чтения.
+        Повторы и переключение цели выполняются только до получения первого фрагмента.
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+            route: Маршрут запроса (None - определяется по сложности запроса)
+            priority: Приоритет запроса в очередях ограничителя частоты и bulkhead
+            on_usage: Вызывается с расходом ответа после успешного завершения потока
+
+        Yields:
+            Фрагменты (дельты) текста ответа по мере генерации
+
+        Raises:
+            OpenAIError: При ошибках API (неверный ключ, лимиты и т.д.)
+            TimeoutError: При таймауте запроса
+            CircuitOpenError: Если все цели недоступны и их выключатели разомкнуты
+            BulkheadFullError: Если вызов отклонён из-за перегрузки
+        """
+        tiers = self._route_tiers(messages, route)
+
+        # Логирование запроса: предпочтительная модель выбранного маршрута
+        self.logger.info("llm_stream_request", model=tiers[0][0].model, message_count=len(messages))
+
+        # Провайдер присылает расход токенов последним фрагментом без choices
+        extra: dict[str, Any] = (
+            {"stream_options": {"include_usage": True}} if self.config.LLM_STREAM_USAGE_ENABLED else {}
+        )
+        estimated_tokens = self._estimate_tokens(messages)
+        requested = time.perf_counter()
+
+        # Слот успешной попытки занят до закрытия потока
+        async with contextlib.AsyncExitStack() as slot:
+            try:
+                target, stream, started = await self._call_with_failover(
+                    lambda target: target.client.chat.completions.create(
+                        model=target.model,
+                        messages=messages,  # type: ignore[arg-type]
+                        stream=True,
+                        **extra,
+                    ),
+                    tiers,
+                    slot,
+                    priority,
+                    estimated_tokens,
+                )
+            except CircuitOpenError as e:
+                self.logger.warning("llm_circuit_open", error=str(e))
+                raise
+            except OpenAIError as e:
+                self.logger.error("llm_api_error", error=str(e), exc_info=True)
+                raise
+            except TimeoutError as e:
+                self.logger.error("llm_timeout_error", error=str(e), exc_info=True)
+                raise
+
+            length = 0
+            ttft_ms: int | None = None
+            stream_usage: Any = None
+            try:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        stream_usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if ttft_ms is None:
+                            ttft_ms = _elapsed_ms(started)
+                        length += len(delta)
+                        yield delta
+            except (OpenAIError, TimeoutError) as e:
+                # Обрыв потока после начала ответа не повторяется, но учитывается в здоровье цели
+                if is_retryable_error(e):
+                    target.record_failure()
+                self.failed_requests += 1
+                self.logger.error("llm_api_error", error=str(e), exc_info=True)
+                raise
+            finally:
+                await stream.close()
+
+        usage = self._record_usage(target, stream_usage, estimated_tokens, requested, started)
+        usage.ttft_ms = ttft_ms
+
+        # Логирование ответа: модель, фактически выполнившая запрос
+        self.logger.info("llm_response", model=target.model, length=length)
+        self.logger.info("llm_usage", **asdict(usage))
+        if on_usage is not None:
+            on_usage(usage)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики вызовов LLM
+
+        Returns:
+            Счётчики попыток, повторов, переключений, неудачных запросов и метрики целей
+        """
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failovers": self.failovers,
+            "failed_requests": self.failed_requests,
+            "targets": [target.get_stats() for target in self.targets],
+            "fast_targets": [target.get_stats() for target in self.fast_targets],
+            "router": self.router.get_stats() if self.router is not None else None,
+            "singleflight": self.singleflight.get_stats() if self.singleflight is not None else None,
+        }
+
+    def _record_usage(
+        self, target: LLMTarget, usage: Any, estimated_tokens: int, requested: float, started: float
+    ) -> LLMUsage:
+        """Собрать расход ответа и скорректировать ограничитель по фактическому расходу токенов
+
+        Args:
+            target: Цель, выполнившая запрос
+            usage: Объект usage из ответа провайдера (None - провайдер не сообщил)
+            estimated_tokens: Оценка, с которой было получено разрешение ограничителя
+            requested: Момент поступления запроса, до ожидания слота и ограничителя (time.perf_counter)
+            started: Момент начала успешной попытки вызова провайдера (time.perf_counter)
+
+        Returns:
+            Расход ответа
+        """
+        prompt_tokens = _token_count(usage, "prompt_tokens")
+        completion_tokens = _token_count(usage, "completion_tokens")
+        total_tokens = _token_count(usage, "total_tokens")
+        if self.rate_limiter is not None and total_tokens is not None:
+            self.rate_limiter.record_usage(estimated_tokens, total_tokens)
+        return LLMUsage(
+            target.model,
+            prompt_tokens,
+            completion_tokens,
+            _elapsed_ms(started),
+            queue_ms=round((started - requested) * 1000),
+        )
+
+    def _concurrency_slot(self, priority: LLMPriority) -> AbstractAsyncContextManager[Any]:
+        """Слот ограничителя параллельных вызовов (или пустой контекст, если он выключен)
+
+        Args:
+            priority: Приоритет вызова в очереди bulkhead
+
+        Returns:
+            Асинхронный контекстный менеджер слота
+        """
+        return self.bulkhead.slot(priority) if self.bulkhead is not None else contextlib.nullcontext()
+
+    def _estimate_tokens(self, messages: list[dict[str, Any]]) -> int:
+        """Оценить расход токенов запроса для ограничителя частоты
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+
+        Returns:
+            Оценка токенов промпта плюс LLM_RATE_LIMIT_COMPLETION_TOKENS на ответ
+        """
+        prompt_tokens = sum(self.token_estimator.estimate_tokens(len(m["content"])) for m in messages)
+        return prompt_tokens + self.config.LLM_RATE_LIMIT_COMPLETION_TOKENS
+
+    def _create_target(self, index: int, model: str, base_url: str) -> LLMTarget:
+        """Создать цель маршрутизации, переиспользуя клиент OpenAI для того же endpoint
+
+        Все клиенты OpenAI работают через общий HTTP-клиент процесса.
+
+        Args:
+            index: Порядковый номер цели
+            model: Имя модели
+            base_url: URL endpoint
+
+        Returns:
+            Цель маршрутизации
+        """
+        if base_url not in self._clients:
+            # Повторы SDK отключены: их выполняет _call_with_failover с учётом выключателей
+            self._clients[base_url] = AsyncOpenAI(
+                base_url=base_url,
+                api_key=self.config.OPENAI_API_KEY,
+                timeout=Timeout(self.config.LLM_READ_TIMEOUT_SECONDS, connect=self.config.LLM_CONNECT_TIMEOUT_SECONDS),
+                max_retries=0,
+                http_client=get_http_client(self.config, self.logger),
+            )
+        breaker = CircuitBreaker(
+            f"llm:{model}", self.config.LLM_CIRCUIT_FAILURE_THRESHOLD, self.config.LLM_CIRCUIT_RECOVERY_SECONDS
+        )
+        return LLMTarget(index, model, base_url, self._clients[base_url], breaker)
+
+    def _route_tiers(self, messages: list[dict[str, Any]], route: Route | None) -> list[list[LLMTarget]]:
+        """Определить цели для запроса в порядке предпочтения
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+            route: Явно заданный маршрут (None - определяется маршрутизатором)
+
+        Returns:
+            Группы целей: сначала опробуются все цели первой группы, затем следующей
+        """
+        if self.router is None:
+            return [self.targets]
+        if route is None:
+            route = self.router.route(messages)
+            self.logger.debug("llm_route", route=route.value)
+        if route is Route.FAST:
+            return [self.fast_targets, self.targets]
+        return [self.targets]
+
+    async def _call_with_failover(
+        self,
+        request: Callable[[LLMTarget], Awaitable[T]],
+        tiers: list[list[LLMTarget]],
+        slot: contextlib.AsyncExitStack,
+        priority: LLMPriority = LLMPriority.USER,
+        estimated_tokens: int = 0,
+    ) -> tuple[LLMTarget, T, float]:
+        """Выполнить запрос на самой здоровой цели с переключением и повторами
+
+        При временной ошибке (таймауты, сетевые ошибки, 408/409/429/5xx) или
+        превышении LLM_LATENCY_SLO_SECONDS запрос сразу переключается на
+        следующую ещё не опробованную цель. Когда опробованы все доступные цели,
+        запрос повторяется не более LLM_MAX_RETRIES раз с экспоненциальной
+        задержкой и случайным разбросом (full jitter). Если провайдер указал
+        Retry-After, используется он; если он больше LLM_RETRY_MAX_DELAY_SECONDS,
+        повтор не выполняется. Каждая попытка проходит через ограничитель частоты
+        и только затем занимает слот bulkhead: слот удерживается лишь на время
+        вызова провайдера и освобождается до задержки перед повтором.
+
+        Args:
+            request: Фабрика корутины запроса к цели (вызывается на каждую попытку)
+            tiers: Группы целей в порядке предпочтения
+            slot: Стек, в который передаётся слот bulkhead успешной попытки;
+                вызывающий освобождает его после обработки результата
+            priority: Приоритет запроса в очередях ограничителя частоты и bulkhead
+            estimated_tokens: Оценка токенов запроса для ограничителя частоты
+
+        Returns:
+            Цель, выполнившая запрос, результат запроса и момент начала
+            успешной попытки (time.perf_counter) для измерения задержки провайдера
+
+        Raises:
+            CircuitOpenError: Если выключатели всех целей разомкнуты
+            OpenAIError: Ошибка последней попытки или неповторяемая ошибка
+            TimeoutError: Таймаут последней попытки
+        """
+        retries = 0
+        tried: set[int] = set()
+        while True:
+            if self.rate_limiter is not None:
+                waited = await self.rate_limiter.acquire(estimated_tokens, priority)
+                if waited > 0:
+                    self.logger.info("llm_rate_limited", priority=priority.name.lower(), wait_seconds=round(waited, 3))
+
+            attempt = contextlib.AsyncExitStack()
+            await attempt.enter_async_context(self._concurrency_slot(priority))
+
+            target = self._select_target(tiers, tried)
+            if target is None:
+                await attempt.aclose()
+                self.failed_requests += 1
+                raise CircuitOpenError("Все цели LLM недоступны: выключатели разомкнуты")
+
+            tried.add(target.index)
+            # SLO ограничивает попытку, только если есть куда переключиться
+            slo = self.config.LLM_LATENCY_SLO_SECONDS if self._peek_target(tiers, tried) is not None else 0
+            self.attempts += 1
+            started = time.perf_counter()
+            try:
+                if slo > 0:
+                    result = await asyncio.wait_for(request(target), slo)
+                else:
+                    result = await request(target)
+            except BaseException as e:
+                # Слот не удерживается на время переключения, задержки повтора или отмены
+                await attempt.aclose()
+                if not isinstance(e, OpenAIError | TimeoutError):
+                    raise
+                if not is_retryable_error(e):
+                    # Провайдер доступен и ответил, ошибка в самом запросе
+                    target.circuit_breaker.record_success()
+                    self.failed_requests += 1
+                    raise
+
+                elapsed = time.perf_counter() - started
+                target.record_failure(elapsed if isinstance(e, TimeoutError | APITimeoutError) else None)
+
+                next_target = self._peek_target(tiers, tried)
+                if next_target is not None:
+                    self.failovers += 1
+                    self.logger.warning(
+                        "llm_failover", from_model=target.model, to_model=next_target.model, error=str(e)
+                    )
+                    continue
+
+                delay = self._retry_delay(e, retries)
+                if retries >= self.config.LLM_MAX_RETRIES or delay is None:
+                    self.failed_requests += 1
+                    raise
+
+                retries += 1
+                self.retries += 1
+                tried.clear()
+                self.logger.warning("llm_retry", attempt=retries, delay=round(delay, 3), error=str(e))
+                await asyncio.sleep(delay)
+                continue
+
+            target.record_success(time.perf_counter() - started)
+            await slot.enter_async_context(attempt)
+            return target, result, started
+
+    def _ranked_targets(self, tiers: list[list[LLMTarget]], exclude: set[int]) -> list[LLMTarget]:
+        """Упорядочить цели по группам, а внутри группы - по здоровью
+
+        Цели без измерений оцениваются по лучшей измеренной задержке в группе,
+        поэтому при равных оценках сохраняется порядок из конфигурации.
+
+        Args:
+            tiers: Группы целей в порядке предпочтения
+            exclude: Индексы уже опробованных целей
+
+        Returns:
+            Не опробованные цели от самой предпочтительной к наименее
+        """
+        ranked: list[LLMTarget] = []
+        for targets in tiers:
+            measured = [t.latency_ewma for t in targets if t.latency_ewma is not None]
+            default_latency = min(measured, default=0.0)
+            candidates = [t for t in targets if t.index not in exclude]
+            ranked.extend(sorted(candidates, key=lambda t: (t.score(default_latency), t.index)))
+        return ranked
+
+    def _select_target(self, tiers: list[list[LLMTarget]], exclude: set[int]) -> LLMTarget | None:
+        """Выбрать самую предпочтительную цель, которую пропускает её выключатель
+
+        Args:
+            tiers: Группы целей в порядке предпочтения
+            exclude: Индексы уже опробованных целей
+
+        Returns:
+            Цель или None, если все выключатели разомкнуты
+        """
+        for target in self._ranked_targets(tiers, exclude):
+            if target.circuit_breaker.allow_request():
+                return target
+        return None
+
+    def _peek_target(self, tiers: list[list[LLMTarget]], exclude: set[int]) -> LLMTarget | None:
+        """Найти цель для переключения, не занимая пробный запрос выключателя
+
+        Args:
+            tiers: Группы целей в порядке предпочтения
+            exclude: Индексы уже опробованных целей
+
+        Returns:
+            Самая предпочтительная цель с не разомкнутым выключателем или None
+        """
+        for target in self._ranked_targets(tiers, exclude):
+            if target.circuit_breaker.state is not CircuitState.OPEN:
+                return target
+        return None
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float | None:
+        """Вычислить задержку перед повтором
+
+        Args:
+            error: Ошибка последней попытки
+            attempt: Номер последнего повтора (с 0)
+
+        Returns:
+            Задержка в секундах или None, если Retry-After превышает допустимую задержку
+        """
+        max_delay = self.config.LLM_RETRY_MAX_DELAY_SECONDS
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= max_delay else None
+        return random.uniform(0, min(max_delay, self.config.LLM_RETRY_BASE_DELAY_SECONDS * 2**attempt))
@@ -0,0 +1,46 @@
+"""Учёт расхода токенов и задержки вызовов LLM"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class LLMUsage:
+    """Расход токенов и задержка одного ответа LLM
+
+    Attributes:
+        model: Модель, выполнившая запрос
+        prompt_tokens: Токены промпта (None - провайдер не сообщил)
+        completion_tokens: Токены ответа (None - провайдер не сообщил)
+        latency_ms: Время успешного вызова провайдера в мс
+        ttft_ms: Время от вызова провайдера до первого фрагмента ответа в мс (только для потоковых ответов)
+        cached: Ответ взят из кэша ответов без обращения к провайдеру
+        queue_ms: Ожидание до успешного вызова в мс: слот bulkhead, ограничитель
+            частоты, неудачные попытки и задержки повторов (None - вызова не было)
+    """
+
+    model: str
+    prompt_tokens: int | None
+    completion_tokens: int | None
+    latency_ms: int
+    ttft_ms: int | None = None
+    cached: bool = False
+    queue_ms: int | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        """Суммарные токены промпта и ответа (неизвестные считаются нулём)"""
+        return (self.prompt_tokens or 0) + (self.completion_tokens or 0)
+
+
+def usage_columns(usage: LLMUsage | None) -> tuple[str | None, int | None, int | None, int | None, int | None]:
+    """Значения колонок учёта LLM в таблице messages
+
+    Args:
+        usage: Расход ответа (None - сообщение не от LLM)
+
+    Returns:
+        (llm_model, prompt_tokens, completion_tokens, latency_ms, ttft_ms)
+    """
+    if usage is None:
+        return None, None, None, None, None
+    return usage.model, usage.prompt_tokens, usage.completion_tokens, usage.latency_ms, usage.ttft_ms
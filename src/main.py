@@ -1,6 +1,12 @@
 """Точка входа в приложение"""
 
 import asyncio
+import contextlib
+import multiprocessing
+import signal
+from collections.abc import Callable
+from dataclasses import asdict
+from multiprocessing.process import BaseProcess
 from pathlib import Path
 from typing import cast
 
@@ -9,10 +15,17 @@ import structlog
 from src.bot import Bot
 from src.config import Config
 from src.database import Database
+from src.delivery import DeliveryQueue
 from src.dialog_manager import DialogManager
 from src.handler import MessageHandler
+from src.http_transport import close_http_client, warm_up_http_client
 from src.llm_client import LLMClient
 from src.message_repository import MessageRepository
+from src.message_write_queue import MessageWriteQueue
+from src.quota import QuotaTracker
+from src.response_cache import close_response_cache
+from src.throttling import ThrottlingMiddleware
+from src.update_router import UpdateRouter
 
 
 def setup_logging(config: Config) -> structlog.BoundLogger:
@@ -42,35 +55,207 @@ def setup_logging(config: Config) -> structlog.BoundLogger:
     return cast("structlog.BoundLogger", structlog.get_logger())
 
 
-async def main() -> None:
-    """Главная функция запуска бота"""
+async def log_stats_periodically(interval: float, log_stats: Callable[[], None]) -> None:
+    """Периодически записывать метрики в лог, пока бот работает
+
+    Args:
+        interval: Период записи в секундах
+        log_stats: Функция, записывающая метрики
+    """
+    while True:
+        await asyncio.sleep(interval)
+        log_stats()
+
+
+def run_worker(worker_index: int) -> None:
+    """Точка входа процесса-воркера
+
+    Args:
+        worker_index: Номер воркера
+    """
+    with contextlib.suppress(asyncio.CancelledError, KeyboardInterrupt):
+        asyncio.run(_run_worker(worker_index))
+
+
+async def _run_worker(worker_index: int) -> None:
+    """Запуск воркера с корректным завершением по SIGTERM от фронта
+
+    Args:
+        worker_index: Номер воркера
+    """
+    task = asyncio.current_task()
+    assert task is not None
+    # Отмена вместо немедленного завершения: очереди сохраняются, статистика логируется
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    await main(worker_index)
+
+
+def _spawn_worker(worker_index: int) -> BaseProcess:
+    """Запустить процесс-воркер
+
+    Args:
+        worker_index: Номер воркера
+
+    Returns:
+        Запущенный процесс
+    """
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_worker, args=(worker_index,), name=f"bot-worker-{worker_index}"
+    )
+    process.start()
+    return process
+
+
+async def run_front(config: Config, logger: structlog.BoundLogger) -> None:
+    """Фронтовой процесс: приём обновлений и распределение по воркерам
+
+    Args:
+        config: Конфигурация приложения
+        logger: Логгер приложения
+    """
+    bot = Bot(config)
+    router = UpdateRouter(config, bot.bot, logger, _spawn_worker)
+    await router.start()
+
+    logger.info("bot_started", model=config.OPENAI_MODEL, mode=config.BOT_MODE, workers=config.BOT_WORKERS)
+    print(f"Бот запущен ({config.BOT_WORKERS} воркеров)...")
+    stats_task = (
+        asyncio.create_task(
+            log_stats_periodically(
+                config.STATS_LOG_INTERVAL_SECONDS, lambda: logger.info("update_router_stats", **router.get_stats())
+            )
+        )
+        if config.STATS_LOG_INTERVAL_SECONDS > 0
+        else None
+    )
+    try:
+        await router.run()
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await stats_task
+        await router.stop()
+        logger.info("update_router_stats", **router.get_stats())
+        await bot.bot.session.close()
+
+
+async def main(worker_index: int | None = None) -> None:
+    """Главная функция запуска бота
+
+    Args:
+        worker_index: Номер воркера (None - основной процесс)
+    """
     # Загрузка конфигурации
     config = Config()
 
     # Настройка логирования
     logger = setup_logging(config)
 
+    # Несколько воркеров: этот процесс только распределяет обновления
+    if worker_index is None and config.BOT_WORKERS > 1:
+        await run_front(config, logger)
+        return
+    if worker_index is not None:
+        logger = logger.bind(worker=worker_index)
+        # Ограничитель частоты и bulkhead в каждом воркере получают свою долю общих лимитов
+        config.split_llm_limits(config.BOT_WORKERS)
+
     # Инициализация бота
     bot = Bot(config)
 
     # Инициализация LLM клиента
     llm_client = LLMClient(config, logger)
+    if config.LLM_HTTP_WARMUP_ENABLED:
+        await warm_up_http_client(config, logger)
 
     # Инициализация базы данных и репозитория
     database = Database(config)
-    message_repository = MessageRepository(database)
+    await database.connect()
+
+    # Групповая запись сообщений (опционально)
+    write_queue = MessageWriteQueue(config, database, logger) if config.DB_WRITE_BATCHING_ENABLED else None
+    if write_queue is not None:
+        await write_queue.start()
+
+    message_repository = MessageRepository(database, write_queue)
+
+    # Квоты пользователей (опционально)
+    quota = QuotaTracker(config, database, logger) if config.QUOTA_ENABLED else None
+    if quota is not None:
+        await quota.start()
 
     # Инициализация менеджера диалогов
     dialog_manager = DialogManager(config, message_repository)
 
     # Инициализация обработчиков
-    handler = MessageHandler(llm_client, dialog_manager, logger)
+    handler = MessageHandler(llm_client, dialog_manager, logger, quota)
     bot.dp.include_router(handler.router)
 
+    # Очередь исходящих сообщений с учётом лимитов Telegram (опционально)
+    delivery = DeliveryQueue(config, logger) if config.DELIVERY_ENABLED else None
+    if delivery is not None:
+        bot.bot.session.middleware(delivery)
+        await delivery.start()
+
+    # Ограничение частоты сообщений до фильтров и обработчиков (опционально)
+    throttling = ThrottlingMiddleware(config, logger) if config.THROTTLE_ENABLED else None
+    if throttling is not None:
+        bot.dp.message.outer_middleware(throttling)
+
+    def log_stats() -> None:
+        """Записать метрики компонентов в лог"""
+        if delivery is not None:
+            logger.info("delivery_stats", **delivery.get_stats())
+        if quota is not None:
+            logger.info("quota_stats", **quota.get_stats())
+        if write_queue is not None:
+            logger.info("message_write_queue_stats", **write_queue.get_stats())
+        logger.info("llm_client_stats", **llm_client.get_stats())
+        logger.info("generation_stats", **handler.generations.get_stats())
+        logger.info("message_debouncer_stats", **handler.debouncer.get_stats())
+        if throttling is not None:
+            logger.info("throttling_stats", **throttling.get_stats())
+        if llm_client.bulkhead is not None:
+            logger.info("llm_bulkhead_stats", **llm_client.bulkhead.get_stats())
+        if llm_client.rate_limiter is not None:
+            logger.info("llm_rate_limiter_stats", **llm_client.rate_limiter.get_stats())
+        if llm_client.response_cache is not None:
+            logger.info("llm_response_cache_stats", **llm_client.response_cache.get_stats())
+        if dialog_manager.cache is not None:
+            logger.info("conversation_cache_stats", **dialog_manager.cache.get_stats())
+        logger.info("database_pool_stats", **asdict(database.get_pool_stats()))
+
+    # Метрики во время работы: после остановки очереди уже пусты
+    stats_task = (
+        asyncio.create_task(log_stats_periodically(config.STATS_LOG_INTERVAL_SECONDS, log_stats))
+        if config.STATS_LOG_INTERVAL_SECONDS > 0
+        else None
+    )
+
     # Запуск бота
-    logger.info("bot_started", model=config.OPENAI_MODEL)
+    logger.info("bot_started", model=config.OPENAI_MODEL, mode=config.BOT_MODE)
     print("Бот запущен...")
-    await bot.start()
+    try:
+        if worker_index is None:
+            await bot.start()
+        else:
+            await bot.start_worker(worker_index)
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await stats_task
+        if delivery is not None:
+            await delivery.stop()
+        if quota is not None:
+            await quota.stop()
+        if write_queue is not None:
+            await write_queue.stop()
+        log_stats()
+        await database.close()
+        await close_response_cache()
+        await close_http_client()
 
 
 if __name__ == "__main__":
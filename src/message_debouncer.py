@@ -0,0 +1,170 @@
+"""Объединение серий быстрых сообщений пользователя в один ход"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Batch(Generic[T]):
+    """Собираемый ход пользователя
+
+    Attributes:
+        items: Сообщения хода в порядке поступления
+        arrived: Событие поступления нового сообщения (сбрасывает ожидание)
+    """
+
+    items: list[T]
+    arrived: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+@dataclass
+class _UserLock:
+    """Блокировка пользователя со счётчиком владельцев и ожидающих
+
+    Attributes:
+        lock: Блокировка
+        holders: Количество задач, держащих или ожидающих блокировку
+    """
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    holders: int = 0
+
+
+class MessageDebouncer(Generic[T]):
+    """Сбор сообщений пользователя в ходы и последовательная обработка ходов
+
+    Первое сообщение открывает ход и ждёт тишины window_seconds (каждое
+    следующее сообщение продлевает ожидание, но не дольше max_wait_seconds
+    от первого). Сообщения, пришедшие за это время, добавляются в тот же ход,
+    и он обрабатывается одним вызовом process. Ходы одного пользователя
+    выполняются под блокировкой пользователя, поэтому записи в историю
+    и её чтение не перемешиваются.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        max_wait_seconds: float,
+        process: Callable[[int, list[T]], Awaitable[None]],
+    ) -> None:
+        """Инициализация
+
+        Args:
+            window_seconds: Окно тишины, закрывающее ход (0 - без объединения)
+            max_wait_seconds: Максимальное ожидание от первого сообщения хода
+            process: Обработка хода: ID пользователя и его сообщения
+        """
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._process = process
+        self._pending: dict[int, _Batch[T]] = {}
+        self._locks: dict[int, _UserLock] = {}
+
+        # Метрики
+        self.turns = 0
+        self.merged = 0
+        self.discarded = 0
+
+    async def submit(self, user_id: int, item: T) -> None:
+        """Добавить сообщение в ход пользователя
+
+        Сообщение, открывшее ход, ждёт его закрытия и обработки; остальные
+        возвращаются сразу после добавления.
+
+        Args:
+            user_id: ID пользователя
+            item: Сообщение
+        """
+        batch = self._pending.get(user_id)
+        if batch is not None:
+            batch.items.append(item)
+            batch.arrived.set()
+            self.merged += 1
+            return
+
+        batch = _Batch([item])
+        if self.window_seconds > 0:
+            self._pending[user_id] = batch
+            try:
+                await self._wait_quiet(batch)
+            finally:
+                if self._pending.get(user_id) is batch:
+                    del self._pending[user_id]
+
+        # Ход отменён (например, /clear до его закрытия)
+        if not batch.items:
+            return
+        self.turns += 1
+        async with self.lock(user_id):
+            await self._process(user_id, batch.items)
+
+    def discard(self, user_id: int) -> int:
+        """Отбросить собираемый ход пользователя
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество отброшенных сообщений
+        """
+        batch = self._pending.pop(user_id, None)
+        if batch is None:
+            return 0
+        count = len(batch.items)
+        batch.items.clear()
+        batch.arrived.set()
+        self.discarded += count
+        return count
+
+    @contextlib.asynccontextmanager
+    async def lock(self, user_id: int) -> AsyncIterator[None]:
+        """Блокировка пользователя: ходы и очистка истории выполняются по очереди
+
+        Args:
+            user_id: ID пользователя
+        """
+        user_lock = self._locks.setdefault(user_id, _UserLock())
+        user_lock.holders += 1
+        try:
+            async with user_lock.lock:
+                yield
+        finally:
+            user_lock.holders -= 1
+            if user_lock.holders == 0:
+                del self._locks[user_id]
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики объединения сообщений
+
+        Returns:
+            Количество собираемых и обработанных ходов, объединённых и отброшенных сообщений
+        """
+        return {
+            "pending": len(self._pending),
+            "turns": self.turns,
+            "merged": self.merged,
+            "discarded": self.discarded,
+        }
+
+    async def _wait_quiet(self, batch: _Batch[T]) -> None:
+        """Ждать, пока сообщения не перестанут поступать дольше окна
+
+        Args:
+            batch: Собираемый ход
+        """
+        deadline = time.monotonic() + self.max_wait_seconds
+        while batch.items:
+            timeout = min(self.window_seconds, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            batch.arrived.clear()
+            try:
+                await asyncio.wait_for(batch.arrived.wait(), timeout)
+            except TimeoutError:
+                return
@@ -1,20 +1,73 @@
 """Репозиторий для работы с сообщениями в базе данных"""
 
+from collections import OrderedDict
+from collections.abc import Callable
 from typing import Any
 
+import aiosqlite
+
 from src.database import Database
+from src.llm_usage import LLMUsage, usage_columns
+from src.message_write_queue import MessageWriteQueue
+
+
+class KnownUserCache:
+    """Ограниченное LRU-множество пользователей, уже существующих в таблице users"""
+
+    def __init__(self, max_size: int) -> None:
+        """Инициализация кэша
+
+        Args:
+            max_size: Максимальное количество пользователей (0 - кэш выключен)
+        """
+        self.max_size = max_size
+        self._users: OrderedDict[int, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def touch(self, user_id: int) -> bool:
+        """Проверить, известен ли пользователь, и отметить его как недавно использованного
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            True если пользователь есть в кэше
+        """
+        if user_id not in self._users:
+            return False
+        self._users.move_to_end(user_id)
+        return True
+
+    def add(self, user_id: int) -> None:
+        """Запомнить пользователя, вытеснив самого давнего при переполнении
+
+        Args:
+            user_id: ID пользователя
+        """
+        if self.max_size <= 0:
+            return
+        self._users[user_id] = None
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
 
 
 class MessageRepository:
     """Репозиторий для операций с сообщениями"""
 
-    def __init__(self, database: Database) -> None:
+    def __init__(self, database: Database, write_queue: MessageWriteQueue | None = None) -> None:
         """Инициализация репозитория
 
         Args:
             database: Менеджер подключений к базе данных
+            write_queue: Очередь групповой записи (None - запись каждого сообщения отдельной транзакцией)
         """
         self.database = database
+        self.write_queue = write_queue
+        # Пользователи, для которых upsert в users уже выполнен этим процессом
+        self.known_users = KnownUserCache(database.config.KNOWN_USERS_CACHE_SIZE)
 
     async def create_user(self, user_id: int) -> None:
         """Создать пользователя, если не существует
@@ -23,13 +76,8 @@ class MessageRepository:
             user_id: ID пользователя Telegram
         """
         async with self.database.get_connection() as conn:
-            await conn.execute(
-                """
-                INSERT OR IGNORE INTO users (id, created_at, is_deleted)
-                VALUES (?, CURRENT_TIMESTAMP, 0)
-                """,
-                (user_id,),
-            )
+            await self._upsert_user(conn, user_id)
+        self.known_users.add(user_id)
 
     async def get_user_messages(self, user_id: int) -> list[dict[str, Any]]:
         """Получить все не удаленные сообщения пользователя
@@ -54,28 +102,85 @@ class MessageRepository:
             # Convert Row objects to dicts
             return [dict(row) for row in rows]
 
-    async def add_message(self, user_id: int, role: str, content: str) -> None:
+    async def get_recent_messages(
+        self,
+        user_id: int,
+        limit: int | None = None,
+        token_budget: int | None = None,
+        estimate_tokens: Callable[[int], int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Получить последние не удаленные сообщения пользователя
+
+        Выбирает только role и content и ограничивает выборку в SQL, не загружая
+        всю историю пользователя.
+
+        Args:
+            user_id: ID пользователя Telegram
+            limit: Максимальное количество последних сообщений (None - без ограничения)
+            token_budget: Бюджет токенов на сообщения (None - без ограничения)
+            estimate_tokens: Оценка токенов по длине сообщения (обязательна вместе с token_budget)
+
+        Returns:
+            Сообщения (role, content) в хронологическом порядке
+        """
+        async with self.database.get_connection() as conn:
+            return await self._fetch_recent_messages(conn, user_id, limit, token_budget, estimate_tokens)
+
+    async def add_message(self, user_id: int, role: str, content: str, usage: LLMUsage | None = None) -> None:
         """Добавить сообщение в историю
 
+        Пользователь создаётся в той же транзакции, если он ещё не встречался
+        этому процессу; для недавно виденных пользователей upsert пропускается.
+
         Args:
             user_id: ID пользователя Telegram
             role: Роль отправителя (user/assistant/system)
             content: Текст сообщения
+            usage: Расход токенов и задержка ответа LLM (для сообщений ассистента)
         """
-        # Ensure user exists
-        await self.create_user(user_id)
+        user_known = self.known_users.touch(user_id)
+
+        if self.write_queue is not None:
+            await self.write_queue.add_message(user_id, role, content, ensure_user=not user_known, usage=usage)
+        else:
+            async with self.database.get_connection() as conn:
+                await self._insert_message(conn, user_id, role, content, ensure_user=not user_known, usage=usage)
+
+        self.known_users.add(user_id)
 
-        # Calculate message length
-        length = len(content)
+    async def add_message_and_get_history(
+        self,
+        user_id: int,
+        role: str,
+        content: str,
+        limit: int | None = None,
+        token_budget: int | None = None,
+        estimate_tokens: Callable[[int], int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Добавить сообщение и получить историю диалога за одну транзакцию
+
+        Вставка и чтение выполняются на одном соединении, минуя очередь групповой
+        записи: это путь перед вызовом LLM, где важна задержка, а не пропускная способность.
+
+        Args:
+            user_id: ID пользователя Telegram
+            role: Роль отправителя (user/assistant/system)
+            content: Текст сообщения
+            limit: Максимальное количество последних сообщений (None - без ограничения)
+            token_budget: Бюджет токенов на сообщения (None - без ограничения)
+            estimate_tokens: Оценка токенов по длине сообщения (обязательна вместе с token_budget)
+
+        Returns:
+            Последние сообщения пользователя (role, content), включая добавленное
+        """
+        user_known = self.known_users.touch(user_id)
 
         async with self.database.get_connection() as conn:
-            await conn.execute(
-                """
-                INSERT INTO messages (user_id, role, content, length, created_at, is_deleted)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, 0)
-                """,
-                (user_id, role, content, length),
-            )
+            await self._insert_message(conn, user_id, role, content, ensure_user=not user_known)
+            messages = await self._fetch_recent_messages(conn, user_id, limit, token_budget, estimate_tokens)
+
+        self.known_users.add(user_id)
+        return messages
 
     async def soft_delete_user_messages(self, user_id: int) -> None:
         """Мягкое удаление всех сообщений пользователя
@@ -93,3 +198,136 @@ class MessageRepository:
                 (user_id,),
             )
 
+    async def _upsert_user(self, conn: aiosqlite.Connection, user_id: int) -> None:
+        """Создать пользователя в рамках переданного соединения
+
+        Args:
+            conn: Соединение с открытой транзакцией
+            user_id: ID пользователя Telegram
+        """
+        await conn.execute(
+            """
+            INSERT OR IGNORE INTO users (id, created_at, is_deleted)
+            VALUES (?, CURRENT_TIMESTAMP, 0)
+            """,
+            (user_id,),
+        )
+
+    async def _insert_message(
+        self,
+        conn: aiosqlite.Connection,
+        user_id: int,
+        role: str,
+        content: str,
+        ensure_user: bool,
+        usage: LLMUsage | None = None,
+    ) -> None:
+        """Вставить сообщение в рамках переданного соединения
+
+        Args:
+            conn: Соединение с открытой транзакцией
+            user_id: ID пользователя Telegram
+            role: Роль отправителя
+            content: Текст сообщения
+            ensure_user: Выполнить upsert пользователя в той же транзакции
+            usage: Расход токенов и задержка ответа LLM
+        """
+        if ensure_user:
+            await self._upsert_user(conn, user_id)
+
+        await conn.execute(
+            """
+            INSERT INTO messages (
+                user_id, role, content, length, created_at, is_deleted,
+                llm_model, prompt_tokens, completion_tokens, latency_ms, ttft_ms
+            )
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, 0, ?, ?, ?, ?, ?)
+            """,
+            (user_id, role, content, len(content), *usage_columns(usage)),
+        )
+
+    async def _fetch_recent_messages(
+        self,
+        conn: aiosqlite.Connection,
+        user_id: int,
+        limit: int | None,
+        token_budget: int | None = None,
+        estimate_tokens: Callable[[int], int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Выбрать последние сообщения пользователя в рамках переданного соединения
+
+        Порядок (created_at, id) совпадает с индексом idx_messages_user_deleted_created
+        (rowid входит в индекс неявно), поэтому SQLite читает только хвост индекса
+        без сортировки.
+
+        Args:
+            conn: Соединение с базой данных
+            user_id: ID пользователя Telegram
+            limit: Максимальное количество сообщений (None - без ограничения)
+            token_budget: Бюджет токенов на сообщения (None - без ограничения)
+            estimate_tokens: Оценка токенов по длине сообщения
+
+        Returns:
+            Сообщения (role, content) в хронологическом порядке
+        """
+        if token_budget is not None and estimate_tokens is not None:
+            limit = await self._count_messages_within_budget(conn, user_id, limit, token_budget, estimate_tokens)
+
+        cursor = await conn.execute(
+            """
+            SELECT role, content
+            FROM messages
+            WHERE user_id = ? AND is_deleted = 0
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            # LIMIT -1 в SQLite означает отсутствие ограничения
+            (user_id, limit if limit is not None else -1),
+        )
+        rows = await cursor.fetchall()
+        return [{"role": row["role"], "content": row["content"]} for row in reversed(rows)]
+
+    async def _count_messages_within_budget(
+        self,
+        conn: aiosqlite.Connection,
+        user_id: int,
+        limit: int | None,
+        token_budget: int,
+        estimate_tokens: Callable[[int], int],
+    ) -> int:
+        """Определить, сколько последних сообщений помещается в бюджет токенов
+
+        Проходит историю от новых сообщений к старым по колонке length,
+        не загружая текст сообщений. Самое новое сообщение берётся всегда,
+        даже если оно одно превышает бюджет.
+
+        Args:
+            conn: Соединение с базой данных
+            user_id: ID пользователя Telegram
+            limit: Максимальное количество сообщений (None - без ограничения)
+            token_budget: Бюджет токенов на сообщения
+            estimate_tokens: Оценка токенов по длине сообщения
+
+        Returns:
+            Количество последних сообщений, помещающихся в бюджет
+        """
+        cursor = await conn.execute(
+            """
+            SELECT length
+            FROM messages
+            WHERE user_id = ? AND is_deleted = 0
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (user_id, limit if limit is not None else -1),
+        )
+
+        count = 0
+        used_tokens = 0
+        async for row in cursor:
+            used_tokens += estimate_tokens(row["length"])
+            if used_tokens > token_budget and count > 0:
+                break
+            count += 1
+        await cursor.close()
+        return count
@@ -0,0 +1,226 @@
+"""Очередь групповой записи сообщений (group commit)"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import structlog
+
+from src.config import Config
+from src.database import Database
+from src.llm_usage import LLMUsage, usage_columns
+from src.metrics import Histogram
+
+# Границы корзин гистограмм
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BATCH_LATENCY_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class PendingMessage:
+    """Сообщение, ожидающее записи в БД
+
+    Attributes:
+        user_id: ID пользователя
+        role: Роль отправителя
+        content: Текст сообщения
+        future: Future, которое завершается после фиксации транзакции
+        ensure_user: Выполнить upsert пользователя в той же транзакции
+        usage: Расход токенов и задержка ответа LLM
+        enqueued_at: Момент постановки в очередь (time.perf_counter)
+    """
+
+    user_id: int
+    role: str
+    content: str
+    future: asyncio.Future[None]
+    ensure_user: bool = True
+    usage: LLMUsage | None = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MessageWriteQueue:
+    """Единственный писатель, объединяющий вставки сообщений в общие транзакции
+
+    Собирает сообщения от всех конкурентных обработчиков в течение
+    DB_WRITE_BATCH_MAX_DELAY_MS (или до DB_WRITE_BATCH_MAX_SIZE строк),
+    записывает их одной транзакцией через executemany и завершает
+    ожидание каждого вызывающего после фиксации транзакции.
+    """
+
+    def __init__(self, config: Config, database: Database, logger: structlog.BoundLogger) -> None:
+        """Инициализация очереди
+
+        Args:
+            config: Конфигурация приложения
+            database: Менеджер подключений к базе данных
+            logger: Логгер приложения
+        """
+        self.config: Config = config
+        self.database: Database = database
+        self.logger: structlog.BoundLogger = logger
+        self.max_batch_size: int = max(1, config.DB_WRITE_BATCH_MAX_SIZE)
+        self.max_delay: float = max(0, config.DB_WRITE_BATCH_MAX_DELAY_MS) / 1000
+
+        self._queue: asyncio.Queue[PendingMessage | None] = asyncio.Queue()
+        self._writer: asyncio.Task[None] | None = None
+
+        # Метрики
+        self.batches_written = 0
+        self.messages_written = 0
+        self.batch_failures = 0
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_latency_ms_histogram = Histogram(BATCH_LATENCY_MS_BUCKETS)
+
+    async def start(self) -> None:
+        """Запустить фоновую задачу-писателя"""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дописать накопленные сообщения и остановить писателя"""
+        if self._writer is None:
+            return
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+
+    async def add_message(
+        self, user_id: int, role: str, content: str, ensure_user: bool = True, usage: LLMUsage | None = None
+    ) -> None:
+        """Поставить сообщение в очередь и дождаться его фиксации в БД
+
+        Args:
+            user_id: ID пользователя
+            role: Роль отправителя
+            content: Текст сообщения
+            ensure_user: Выполнить upsert пользователя в той же транзакции
+            usage: Расход токенов и задержка ответа LLM
+
+        Raises:
+            Exception: Ошибка записи пакета, в который попало сообщение
+        """
+        await self.start()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        await self._queue.put(PendingMessage(user_id, role, content, future, ensure_user, usage))
+        await future
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики очереди
+
+        Returns:
+            Счётчики и гистограммы размера/задержки пакетов
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches_written": self.batches_written,
+            "messages_written": self.messages_written,
+            "batch_failures": self.batch_failures,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "batch_latency_ms": self.batch_latency_ms_histogram.snapshot(),
+        }
+
+    async def _run(self) -> None:
+        """Основной цикл писателя: собрать пакет и записать его
+
+        При любом выходе (остановка, отмена, непредвиденная ошибка) ожидание
+        всех невыполненных сообщений завершается ошибкой, чтобы вызывающие
+        не зависли навсегда.
+        """
+        batch: list[PendingMessage] = []
+        try:
+            stopping = False
+            while not stopping:
+                first = await self._queue.get()
+                if first is None:
+                    break
+
+                batch = [first]
+                deadline = time.perf_counter() + self.max_delay
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - time.perf_counter()
+                    try:
+                        if timeout <= 0:
+                            item = self._queue.get_nowait()
+                        else:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except (asyncio.QueueEmpty, TimeoutError):
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                await self._write_batch(batch)
+                batch = []
+        finally:
+            self._fail_pending(batch)
+
+    def _fail_pending(self, batch: list[PendingMessage]) -> None:
+        """Завершить ошибкой ожидание незаписанных сообщений пакета и очереди
+
+        Args:
+            batch: Пакет, запись которого была прервана
+        """
+        pending = list(batch)
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                pending.append(item)
+        error = RuntimeError("Очередь записи сообщений остановлена")
+        failed = 0
+        for item in pending:
+            if not item.future.done():
+                item.future.set_exception(error)
+                failed += 1
+        if failed:
+            self.logger.error("message_write_queue_aborted", pending=failed)
+
+    async def _write_batch(self, batch: list[PendingMessage]) -> None:
+        """Записать пакет сообщений одной транзакцией
+
+        Args:
+            batch: Сообщения для записи
+        """
+        user_ids = list(dict.fromkeys(item.user_id for item in batch if item.ensure_user))
+        rows = [
+            (item.user_id, item.role, item.content, len(item.content), *usage_columns(item.usage)) for item in batch
+        ]
+
+        try:
+            async with self.database.get_connection() as conn:
+                if user_ids:
+                    await conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO users (id, created_at, is_deleted)
+                        VALUES (?, CURRENT_TIMESTAMP, 0)
+                        """,
+                        [(user_id,) for user_id in user_ids],
+                    )
+                await conn.executemany(
+                    """
+                    INSERT INTO messages (
+                        user_id, role, content, length, created_at, is_deleted,
+                        llm_model, prompt_tokens, completion_tokens, latency_ms, ttft_ms
+                    )
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, 0, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            self.batch_failures += 1
+            self.logger.error("message_batch_write_error", batch_size=len(batch), error=str(e), exc_info=True)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        self.batches_written += 1
+        self.messages_written += len(batch)
+        self.batch_size_histogram.observe(len(batch))
+        self.batch_latency_ms_histogram.observe((now - batch[0].enqueued_at) * 1000)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(None)
@@ -0,0 +1,48 @@
+"""Простые in-process метрики (гистограммы) без внешних зависимостей"""
+
+import bisect
+from collections.abc import Sequence
+from typing import Any
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин
+
+    Хранит накопительные счётчики по корзинам (как в Prometheus: значение
+    попадает во все корзины с границей ``le >= value``), количество и сумму.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        """Инициализация гистограммы
+
+        Args:
+            buckets: Верхние границы корзин по возрастанию
+        """
+        self.buckets: list[float] = sorted(buckets)
+        self._counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Записать наблюдение
+
+        Args:
+            value: Наблюдаемое значение
+        """
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict[str, Any]:
+        """Получить текущее состояние гистограммы
+
+        Returns:
+            Словарь с count, sum и накопительными счётчиками по корзинам
+        """
+        cumulative: dict[str, int] = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, self._counts, strict=False):
+            running += bucket_count
+            cumulative[f"le_{bound:g}"] = running
+        cumulative["le_inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": cumulative}
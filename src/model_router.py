@@ -0,0 +1,100 @@
+"""Маршрутизация запросов между быстрой и большой моделью по сложности"""
+
+import re
+from collections import Counter
+from enum import StrEnum
+from typing import Any
+
+from src.config import Config
+
+# Блоки и фрагменты кода в Markdown
+CODE_PATTERN = re.compile(r"```|`[^`\n]+`")
+# Строки маркированных и нумерованных списков
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+# Слова, с которых обычно начинаются задачи на рассуждение
+COMPLEX_KEYWORDS_PATTERN = re.compile(
+    r"\b(?:объясни|почему|сравни|проанализируй|разбери|докажи|напиши|составь|explain|why|compare|analy[sz]e|write)",
+    re.IGNORECASE,
+)
+
+
+class Route(StrEnum):
+    """Маршрут запроса"""
+
+    FAST = "fast"
+    LARGE = "large"
+
+
+class ModelRouter:
+    """Классификатор сложности запроса на дешёвых оффлайн-эвристиках
+
+    Запрос отправляется большой модели, если последнее сообщение пользователя
+    длинное, содержит код, список или слова-маркеры задач на рассуждение,
+    либо если контекст диалога велик. Остальные запросы идут быстрой модели.
+    """
+
+    def __init__(self, config: Config) -> None:
+        """Инициализация маршрутизатора
+
+        Args:
+            config: Конфигурация приложения
+        """
+        self.max_fast_chars: int = config.ROUTER_FAST_MAX_CHARS
+        self.max_fast_context_chars: int = config.ROUTER_FAST_MAX_CONTEXT_CHARS
+
+        # Метрики: количество запросов по маршрутам и причинам выбора большой модели
+        self.routes: Counter[str] = Counter()
+        self.reasons: Counter[str] = Counter()
+
+    def route(self, messages: list[dict[str, Any]]) -> Route:
+        """Выбрать маршрут для запроса и учесть его в метриках
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+
+        Returns:
+            Маршрут запроса
+        """
+        reason = self.classify(messages)
+        route = Route.FAST if reason is None else Route.LARGE
+        self.routes[route.value] += 1
+        if reason is not None:
+            self.reasons[reason] += 1
+        return route
+
+    def classify(self, messages: list[dict[str, Any]]) -> str | None:
+        """Определить причину, по которой запрос требует большой модели
+
+        Args:
+            messages: История сообщений в формате OpenAI API
+
+        Returns:
+            Причина (long_message, code, list, keyword, long_context) или None для простого запроса
+        """
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+        if len(last_user) > self.max_fast_chars:
+            return "long_message"
+        if CODE_PATTERN.search(last_user):
+            return "code"
+        if len(LIST_ITEM_PATTERN.findall(last_user)) >= 2:
+            return "list"
+        if COMPLEX_KEYWORDS_PATTERN.search(last_user):
+            return "keyword"
+
+        # Системный промпт одинаков для всех запросов и в размер контекста не входит
+        context_chars = sum(len(m["content"]) for m in messages if m["role"] != "system")
+        if context_chars > self.max_fast_context_chars:
+            return "long_context"
+        return None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики маршрутизации
+
+        Returns:
+            Количество запросов по маршрутам и причинам выбора большой модели
+        """
+        return {
+            "routes": {route.value: self.routes[route.value] for route in Route},
+            "large_reasons": dict(self.reasons),
+        }
@@ -0,0 +1,312 @@
+"""Квоты пользователей на запросы и токены LLM в скользящих окнах"""
+
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+from src.config import Config
+from src.database import Database
+
+# Ответ пользователю при превышении квоты
+QUOTA_EXCEEDED_MESSAGE = "Превышен лимит использования, попробуйте через {minutes} мин."
+
+# Размер корзины счётчиков: окна скользят с точностью до минуты
+BUCKET_SECONDS = 60
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+
+
+class QuotaExceededError(Exception):
+    """Пользователь исчерпал квоту в одном из окон"""
+
+    def __init__(self, limit_name: str, retry_after: float) -> None:
+        """Инициализация ошибки
+
+        Args:
+            limit_name: Имя превышенного лимита (например, tokens_per_hour)
+            retry_after: Через сколько секунд квота освободится
+        """
+        super().__init__(f"Квота {limit_name} исчерпана, повтор через {retry_after:.0f} с")
+        self.limit_name = limit_name
+        self.retry_after = retry_after
+
+    @property
+    def user_message(self) -> str:
+        """Текст отказа для пользователя"""
+        return QUOTA_EXCEEDED_MESSAGE.format(minutes=max(1, math.ceil(self.retry_after / 60)))
+
+
+@dataclass
+class UsageBucket:
+    """Счётчики пользователя за одну минуту
+
+    Attributes:
+        start: Начало минуты (секунды эпохи, кратно BUCKET_SECONDS)
+        requests: Количество запросов
+        tokens: Количество токенов
+        dirty: Изменена после последнего сохранения в БД
+    """
+
+    start: int
+    requests: int = 0
+    tokens: int = 0
+    dirty: bool = True
+
+
+class QuotaTracker:
+    """Учёт и проверка квот пользователей
+
+    Счётчики хранятся в памяти поминутными корзинами за последние сутки,
+    поэтому проверка квоты не обращается к БД. Изменённые корзины
+    периодически сохраняются в таблицу user_quota_usage и загружаются
+    при старте, чтобы перезапуск не обнулял квоты.
+
+    Запрос учитывается при проверке (до вызова LLM), токены - после ответа,
+    поэтому квота на токены может быть превышена не более чем на один ответ.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        database: Database,
+        logger: structlog.BoundLogger,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Инициализация учёта квот
+
+        Args:
+            config: Конфигурация приложения
+            database: Менеджер подключений к базе данных
+            logger: Логгер приложения
+            clock: Источник времени в секундах эпохи (для тестов)
+        """
+        self.database = database
+        self.logger = logger
+        self.checkpoint_interval: float = config.QUOTA_CHECKPOINT_INTERVAL_SECONDS
+        # (имя, окно в секундах, лимит, поле корзины); лимит 0 - без ограничения
+        self.limits: list[tuple[str, int, int, str]] = [
+            (name, window, limit, field)
+            for name, window, limit, field in (
+                ("requests_per_hour", HOUR_SECONDS, config.QUOTA_REQUESTS_PER_HOUR, "requests"),
+                ("requests_per_day", DAY_SECONDS, config.QUOTA_REQUESTS_PER_DAY, "requests"),
+                ("tokens_per_hour", HOUR_SECONDS, config.QUOTA_TOKENS_PER_HOUR, "tokens"),
+                ("tokens_per_day", DAY_SECONDS, config.QUOTA_TOKENS_PER_DAY, "tokens"),
+            )
+            if limit > 0
+        ]
+        self._clock = clock
+        self._usage: dict[int, deque[UsageBucket]] = {}
+        self._checkpointer: asyncio.Task[None] | None = None
+
+        # Метрики
+        self.allowed = 0
+        self.rejected = 0
+        self.checkpoints = 0
+        self.checkpoint_failures = 0
+
+    async def start(self) -> None:
+        """Загрузить счётчики за последние сутки и запустить периодическое сохранение"""
+        since = self._bucket_start(self._clock()) - DAY_SECONDS
+        async with self.database.get_connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT user_id, bucket_start, requests, tokens
+                FROM user_quota_usage
+                WHERE bucket_start > ?
+                ORDER BY bucket_start ASC
+                """,
+                (since,),
+            )
+            rows = await cursor.fetchall()
+        for row in rows:
+            bucket = UsageBucket(row["bucket_start"], row["requests"], row["tokens"], dirty=False)
+            self._usage.setdefault(row["user_id"], deque()).append(bucket)
+
+        if self._checkpointer is None or self._checkpointer.done():
+            self._checkpointer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить периодическое сохранение и сохранить несохранённые счётчики"""
+        if self._checkpointer is not None:
+            self._checkpointer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._checkpointer
+            self._checkpointer = None
+        await self.checkpoint()
+
+    def acquire(self, user_id: int) -> None:
+        """Проверить квоты пользователя и учесть запрос
+
+        Args:
+            user_id: ID пользователя
+
+        Raises:
+            QuotaExceededError: Если исчерпан любой из лимитов
+        """
+        now = self._clock()
+        buckets = self._prune(user_id, now)
+        for name, window, limit, field in self.limits:
+            in_window = [b for b in buckets if b.start > now - window]
+            used = sum(getattr(b, field) for b in in_window)
+            if used >= limit:
+                self.rejected += 1
+                raise QuotaExceededError(name, self._retry_after(in_window, field, used, limit, window, now))
+
+        self._current_bucket(user_id, now).requests += 1
+        self.allowed += 1
+
+    def record_tokens(self, user_id: int, tokens: int) -> None:
+        """Учесть расход токенов ответа
+
+        Args:
+            user_id: ID пользователя
+            tokens: Количество токенов промпта и ответа
+        """
+        if tokens > 0:
+            self._current_bucket(user_id, self._clock()).tokens += tokens
+
+    def get_usage(self, user_id: int) -> dict[str, int]:
+        """Получить использование пользователя по всем лимитам
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Имя лимита -> использовано в текущем окне
+        """
+        now = self._clock()
+        buckets = self._prune(user_id, now)
+        return {
+            name: sum(getattr(b, field) for b in buckets if b.start > now - window)
+            for name, window, _, field in self.limits
+        }
+
+    async def checkpoint(self) -> None:
+        """Сохранить изменённые корзины в БД и удалить устаревшие"""
+        now = self._clock()
+        rows: list[tuple[int, int, int, int]] = []
+        dirty: list[UsageBucket] = []
+        for user_id in list(self._usage):
+            for bucket in self._prune(user_id, now):
+                if bucket.dirty:
+                    rows.append((user_id, bucket.start, bucket.requests, bucket.tokens))
+                    dirty.append(bucket)
+        for bucket in dirty:
+            bucket.dirty = False
+
+        try:
+            async with self.database.get_connection() as conn:
+                if rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO user_quota_usage (user_id, bucket_start, requests, tokens)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (user_id, bucket_start)
+                        DO UPDATE SET requests = excluded.requests, tokens = excluded.tokens
+                        """,
+                        rows,
+                    )
+                await conn.execute(
+                    "DELETE FROM user_quota_usage WHERE bucket_start <= ?",
+                    (self._bucket_start(now) - DAY_SECONDS,),
+                )
+        except Exception as e:
+            # Не сохранённые корзины будут сохранены следующей попыткой
+            for bucket in dirty:
+                bucket.dirty = True
+            self.checkpoint_failures += 1
+            self.logger.error("quota_checkpoint_error", error=str(e), exc_info=True)
+            return
+        self.checkpoints += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики квот
+
+        Returns:
+            Лимиты, количество отслеживаемых пользователей, разрешённых и отклонённых запросов
+        """
+        return {
+            "limits": {name: limit for name, _, limit, _ in self.limits},
+            "tracked_users": len(self._usage),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "checkpoints": self.checkpoints,
+            "checkpoint_failures": self.checkpoint_failures,
+        }
+
+    async def _run(self) -> None:
+        """Фоновая задача: периодически сохранять счётчики"""
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self.checkpoint()
+
+    def _prune(self, user_id: int, now: float) -> deque[UsageBucket]:
+        """Удалить корзины старше суток (не сохранённые в БД остаются до сохранения)
+
+        Args:
+            user_id: ID пользователя
+            now: Текущее время
+
+        Returns:
+            Актуальные корзины пользователя
+        """
+        buckets = self._usage.get(user_id)
+        if buckets is None:
+            return deque()
+        while buckets and buckets[0].start <= now - DAY_SECONDS and not buckets[0].dirty:
+            buckets.popleft()
+        if not buckets:
+            del self._usage[user_id]
+        return buckets
+
+    def _current_bucket(self, user_id: int, now: float) -> UsageBucket:
+        """Получить корзину текущей минуты, создав её при необходимости
+
+        Args:
+            user_id: ID пользователя
+            now: Текущее время
+
+        Returns:
+            Корзина текущей минуты
+        """
+        start = self._bucket_start(now)
+        buckets = self._usage.setdefault(user_id, deque())
+        if not buckets or buckets[-1].start != start:
+            buckets.append(UsageBucket(start))
+        bucket = buckets[-1]
+        bucket.dirty = True
+        return bucket
+
+    @staticmethod
+    def _bucket_start(now: float) -> int:
+        """Начало минутной корзины для момента времени"""
+        return int(now // BUCKET_SECONDS) * BUCKET_SECONDS
+
+    @staticmethod
+    def _retry_after(buckets: list[UsageBucket], field: str, used: int, limit: int, window: int, now: float) -> float:
+        """Время до освобождения квоты: пока старые корзины не выйдут из окна
+
+        Args:
+            buckets: Корзины в окне от старых к новым
+            field: Поле корзины (requests или tokens)
+            used: Использовано в окне
+            limit: Лимит окна
+            window: Размер окна в секундах
+            now: Текущее время
+
+        Returns:
+            Время ожидания в секундах
+        """
+        for bucket in buckets:
+            used -= getattr(bucket, field)
+            if used < limit:
+                return max(0.0, bucket.start + window - now)
+        return float(window)
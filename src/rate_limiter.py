@@ -0,0 +1,273 @@
+"""Клиентский ограничитель частоты запросов к LLM (запросы и токены в минуту)"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from src.config import Config
+from src.metrics import Histogram
+
+# Границы корзин гистограммы ожидания в очереди
+WAIT_MS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Единственный ограничитель процесса: лимиты провайдера общие для всех LLMClient
+_rate_limiter: "RateLimiter | None" = None
+
+
+class LLMPriority(IntEnum):
+    """Приоритет запроса к LLM (меньше - обслуживается раньше)"""
+
+    USER = 0
+    ADMIN = 1
+    BACKGROUND = 2
+
+
+class TokenBucket:
+    """Корзина токенов, пополняемая равномерно с заданной скоростью в минуту"""
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        """Инициализация корзины (изначально полной)
+
+        Args:
+            per_minute: Ёмкость корзины и скорость пополнения в минуту
+            clock: Источник времени (для тестов)
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """Время до накопления нужного количества токенов
+
+        Запрос больше ёмкости корзины ждёт полной корзины, иначе он не был бы
+        выполнен никогда.
+
+        Args:
+            amount: Нужное количество токенов
+
+        Returns:
+            Время ожидания в секундах (0 - токенов достаточно)
+        """
+        self._refill()
+        deficit = min(amount, self.capacity) - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def consume(self, amount: float) -> None:
+        """Списать токены (отрицательное значение возвращает токены в корзину)
+
+        Args:
+            amount: Количество токенов
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def _refill(self) -> None:
+        """Пополнить корзину за прошедшее время"""
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass(order=True)
+class _Waiter:
+    """Запрос, ожидающий разрешения в очереди ограничителя
+
+    Attributes:
+        priority: Приоритет запроса
+        seq: Порядковый номер (FIFO внутри приоритета)
+        tokens: Оценка токенов запроса
+        future: Future, которое завершается при выдаче разрешения
+    """
+
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class RateLimiter:
+    """Ограничитель по запросам и токенам в минуту с приоритетной очередью
+
+    Запрос выполняется сразу, если в очереди никого нет и в обеих корзинах
+    достаточно токенов; иначе он встаёт в очередь, упорядоченную по
+    приоритету, а затем по времени постановки. Очередь обслуживает одна
+    фоновая задача: первый в очереди запрос получает разрешение, как только
+    корзины накопят нужное количество токенов.
+    """
+
+    def __init__(
+        self, requests_per_minute: int, tokens_per_minute: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Инициализация ограничителя
+
+        Args:
+            requests_per_minute: Лимит запросов в минуту (0 - без ограничения)
+            tokens_per_minute: Лимит токенов в минуту (0 - без ограничения)
+            clock: Источник времени (для тестов)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task[None] | None = None
+
+        # Метрики
+        self.granted: Counter[str] = Counter()
+        self.delayed = 0
+        self.max_queue_depth = 0
+        self.wait_ms_histogram = Histogram(WAIT_MS_BUCKETS)
+
+    async def acquire(self, tokens: int, priority: LLMPriority = LLMPriority.USER) -> float:
+        """Дождаться разрешения на запрос
+
+        Args:
+            tokens: Оценка токенов запроса (промпт и ответ)
+            priority: Приоритет запроса
+
+        Returns:
+            Время ожидания в очереди в секундах
+        """
+        started = self._clock()
+        if not self._waiters and self._wait_time(tokens) <= 0:
+            self._consume(tokens)
+            self._record(priority, 0.0)
+            return 0.0
+
+        waiter = _Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Разрешение уже выдано, но запрос не будет выполнен - вернуть токены
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._consume(-tokens, requests=-1)
+            raise
+
+        waited = self._clock() - started
+        self.delayed += 1
+        self._record(priority, waited)
+        return waited
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Скорректировать корзину токенов по фактическому расходу
+
+        Args:
+            estimated_tokens: Оценка, с которой было получено разрешение
+            actual_tokens: Фактический расход токенов по ответу провайдера
+        """
+        if self._tokens is not None:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих в очереди"""
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики ограничителя
+
+        Returns:
+            Лимиты, глубина очереди, счётчики разрешений по приоритетам и гистограмма ожидания
+        """
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "granted": {priority.name.lower(): self.granted[priority.name.lower()] for priority in LLMPriority},
+            "delayed": self.delayed,
+            "wait_ms": self.wait_ms_histogram.snapshot(),
+        }
+
+    async def _dispatch(self) -> None:
+        """Фоновая задача: выдавать разрешения первому в очереди по мере пополнения корзин"""
+        while self._waiters:
+            head = self._waiters[0]
+            if head.future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = self._wait_time(head.tokens)
+            if wait <= 0:
+                heapq.heappop(self._waiters)
+                self._consume(head.tokens)
+                head.future.set_result(None)
+                continue
+
+            # Ждать пополнения корзин или появления запроса с более высоким приоритетом
+            self._wakeup.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+
+    def _wait_time(self, tokens: int) -> float:
+        """Время до появления токенов в обеих корзинах
+
+        Args:
+            tokens: Оценка токенов запроса
+
+        Returns:
+            Время ожидания в секундах
+        """
+        wait = 0.0
+        if self._requests is not None:
+            wait = self._requests.wait_time(1)
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens))
+        return wait
+
+    def _consume(self, tokens: int, requests: int = 1) -> None:
+        """Списать запрос и токены из корзин
+
+        Args:
+            tokens: Количество токенов
+            requests: Количество запросов
+        """
+        if self._requests is not None:
+            self._requests.consume(requests)
+        if self._tokens is not None:
+            self._tokens.consume(tokens)
+
+    def _record(self, priority: LLMPriority, waited: float) -> None:
+        """Учесть выданное разрешение в метриках
+
+        Args:
+            priority: Приоритет запроса
+            waited: Время ожидания в секундах
+        """
+        self.granted[priority.name.lower()] += 1
+        self.wait_ms_histogram.observe(waited * 1000)
+
+
+def get_rate_limiter(config: Config) -> RateLimiter | None:
+    """Получить общий ограничитель процесса, создав его при первом обращении
+
+    Args:
+        config: Конфигурация приложения
+
+    Returns:
+        RateLimiter или None, если лимиты не заданы
+    """
+    global _rate_limiter
+    if config.LLM_RATE_LIMIT_RPM <= 0 and config.LLM_RATE_LIMIT_TPM <= 0:
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(config.LLM_RATE_LIMIT_RPM, config.LLM_RATE_LIMIT_TPM)
+    return _rate_limiter
@@ -0,0 +1,235 @@
+"""Кэш ответов LLM для детерминированных запросов (память + SQLite)"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import aiosqlite
+import structlog
+
+from src.config import Config
+
+# Единственный кэш процесса: файл кэша общий для всех LLMClient
+_response_cache: "ResponseCache | None" = None
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+class ResponseCache:
+    """Двухуровневый кэш ответов LLM по точному совпадению ключа
+
+    Первый уровень - LRU-словарь в памяти, второй - отдельный файл SQLite,
+    переживающий перезапуски. Записи устаревают через ttl_seconds; при
+    превышении лимитов вытесняются давно не использованные записи. Ошибки
+    файлового уровня только логируются: кэш не должен ломать запрос.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        memory_entries: int,
+        max_entries: int,
+        logger: structlog.BoundLogger,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Инициализация кэша
+
+        Args:
+            path: Путь к файлу SQLite (пустая строка - только память)
+            ttl_seconds: Время жизни записи в секундах
+            memory_entries: Максимальное количество записей в памяти
+            max_entries: Максимальное количество записей в файле
+            logger: Логгер приложения
+            clock: Источник времени в секундах эпохи (для тестов)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.logger = logger
+        self._clock = clock
+        # key -> (ответ, время устаревания)
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._conn: aiosqlite.Connection | None = None
+        self._lock = asyncio.Lock()
+
+        # Метрики
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    async def get(self, key: str) -> str | None:
+        """Получить ответ по ключу
+
+        Args:
+            key: Отпечаток запроса
+
+        Returns:
+            Закэшированный ответ или None при промахе
+        """
+        now = self._clock()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._memory[key]
+
+        row = None
+        if self.path:
+            try:
+                async with self._lock:
+                    conn = await self._connect()
+                    cursor = await conn.execute(
+                        "SELECT value, expires_at FROM llm_response_cache WHERE key = ? AND expires_at > ?",
+                        (key, now),
+                    )
+                    row = await cursor.fetchone()
+                    if row is not None:
+                        await conn.execute("UPDATE llm_response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        await conn.commit()
+            except (aiosqlite.Error, OSError) as e:
+                self.logger.warning("llm_cache_read_failed", error=str(e))
+                row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, row[0], row[1])
+        return str(row[0])
+
+    async def set(self, key: str, value: str) -> None:
+        """Сохранить ответ
+
+        Args:
+            key: Отпечаток запроса
+            value: Ответ LLM
+        """
+        now = self._clock()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        self.writes += 1
+        if not self.path:
+            return
+
+        try:
+            async with self._lock:
+                conn = await self._connect()
+                await conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                await conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (now,))
+                # Вытеснить давно не использованные записи сверх лимита
+                cursor = await conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key IN ("
+                    "SELECT key FROM llm_response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self.disk_evictions += max(0, cursor.rowcount)
+                await conn.commit()
+        except (aiosqlite.Error, OSError) as e:
+            self.logger.warning("llm_cache_write_failed", error=str(e))
+
+    async def close(self) -> None:
+        """Закрыть соединение с файлом кэша"""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики кэша
+
+        Returns:
+            Количество записей в памяти, попаданий по уровням, промахов, записей и вытеснений
+        """
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Открыть соединение с файлом кэша при первом обращении
+
+        Returns:
+            Соединение с файлом кэша
+        """
+        if self._conn is None:
+            conn = await aiosqlite.connect(self.path)
+            try:
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute(CREATE_TABLE_SQL)
+                await conn.commit()
+            except BaseException:
+                await conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Положить запись в память, вытеснив самую давнюю при переполнении
+
+        Args:
+            key: Отпечаток запроса
+            value: Ответ LLM
+            expires_at: Время устаревания
+        """
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+
+def get_response_cache(config: Config, logger: structlog.BoundLogger) -> ResponseCache | None:
+    """Получить общий кэш ответов процесса, создав его при первом обращении
+
+    Args:
+        config: Конфигурация приложения
+        logger: Логгер приложения
+
+    Returns:
+        ResponseCache или None, если кэш выключен
+    """
+    global _response_cache
+    if not config.LLM_RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            config.LLM_RESPONSE_CACHE_PATH,
+            config.LLM_RESPONSE_CACHE_TTL_SECONDS,
+            config.LLM_RESPONSE_CACHE_MEMORY_ENTRIES,
+            config.LLM_RESPONSE_CACHE_MAX_ENTRIES,
+            logger,
+        )
+    return _response_cache
+
+
+async def close_response_cache() -> None:
+    """Закрыть общий кэш ответов процесса"""
+    global _response_cache
+    if _response_cache is not None:
+        await _response_cache.close()
+        _response_cache = None
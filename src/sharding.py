@@ -0,0 +1,69 @@
+"""Распределение пользователей по воркерам консистентным хешированием"""
+
+import bisect
+import hashlib
+from typing import Any
+
+
+class HashRing:
+    """Кольцо консистентного хеширования
+
+    Каждый воркер занимает на кольце несколько виртуальных точек, ключ
+    обслуживает первый воркер по часовой стрелке от хеша ключа. При изменении
+    числа воркеров переезжает только доля пользователей ~1/N, поэтому
+    остальные сохраняют прогретые кэши своего воркера.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 100) -> None:
+        """Инициализация кольца
+
+        Args:
+            nodes: Количество воркеров (номера 0..nodes-1)
+            replicas: Количество виртуальных точек на воркер
+
+        Raises:
+            ValueError: Если воркеров меньше одного
+        """
+        if nodes < 1:
+            raise ValueError("Нужен хотя бы один воркер")
+        points = sorted((self._hash(f"{node}:{replica}"), node) for node in range(nodes) for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: int) -> int:
+        """Номер воркера, обслуживающего ключ
+
+        Args:
+            key: Ключ (ID пользователя)
+
+        Returns:
+            Номер воркера
+        """
+        index = bisect.bisect(self._hashes, self._hash(str(key))) % len(self._hashes)
+        return self._nodes[index]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        """Стабильный между процессами 64-битный хеш строки"""
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def update_user_id(update: dict[str, Any]) -> int | None:
+    """Извлечь ID пользователя из JSON обновления Telegram без разбора в модели
+
+    Args:
+        update: Обновление в формате Bot API
+
+    Returns:
+        ID отправителя, ID чата для обновлений без отправителя или None
+    """
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user")
+        if isinstance(user, dict) and "id" in user:
+            return int(user["id"])
+        chat = event.get("chat")
+        if isinstance(chat, dict) and "id" in chat:
+            return int(chat["id"])
+    return None
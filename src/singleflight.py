@@ -0,0 +1,114 @@
+"""Объединение одновременных одинаковых вызовов в один (singleflight)"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def fingerprint(payload: Any) -> str:
+    """Построить отпечаток JSON-сериализуемых данных запроса
+
+    Args:
+        payload: Данные запроса (например, модель и сообщения)
+
+    Returns:
+        SHA-256 от канонического JSON-представления
+    """
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Call(Generic[T]):
+    """Выполняющийся общий вызов
+
+    Attributes:
+        task: Задача, выполняющая вызов
+        waiters: Количество ожидающих результат
+    """
+
+    task: asyncio.Task[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Объединение одновременных вызовов с одинаковым ключом
+
+    Первый вызов с ключом запускает функцию в отдельной задаче, остальные,
+    пришедшие до её завершения, ждут ту же задачу и получают тот же результат
+    или ту же ошибку. Отмена одного ожидающего не прерывает общий вызов;
+    задача отменяется, только когда отменены все ожидающие.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация"""
+        self._calls: dict[str, _Call[T]] = {}
+
+        # Метрики
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Выполнить вызов или присоединиться к уже выполняющемуся с тем же ключом
+
+        Args:
+            key: Ключ вызова (отпечаток запроса)
+            fn: Функция, выполняющая вызов
+
+        Returns:
+            Результат общего вызова
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Последний ожидающий ушёл - результат больше никому не нужен
+                call.task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся общих вызовов"""
+        return len(self._calls)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики объединения вызовов
+
+        Returns:
+            Количество выполненных, объединённых и отменённых вызовов
+        """
+        return {
+            "in_flight": self.in_flight,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        """Удалить завершённый вызов, чтобы следующие вызовы выполнялись заново
+
+        Args:
+            key: Ключ вызова
+            call: Завершённый вызов
+        """
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,192 @@
+"""Ограничение частоты сообщений пользователя (flood control) для aiogram"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import structlog
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+from src.config import Config
+
+# Ответ пользователю при первом отброшенном сообщении серии
+THROTTLED_MESSAGE = "Слишком много сообщений, подождите немного"
+
+# Как часто искать и удалять неактивных пользователей
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class _Bucket:
+    """Корзина токенов одного пользователя для одного вида сообщений
+
+    Токены могут уходить в минус: отложенные сообщения резервируют токены
+    заранее, и следующие ждут дольше.
+    """
+
+    __slots__ = ("notified", "tokens", "updated")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        """Инициализация полной корзины
+
+        Args:
+            tokens: Начальное количество токенов (ёмкость)
+            now: Текущее время
+        """
+        self.tokens = tokens
+        self.updated = now
+        # Пользователь уже предупреждён о текущей серии отброшенных сообщений
+        self.notified = False
+
+
+class _Limit:
+    """Лимит одного вида сообщений: скорость пополнения и ёмкость корзины"""
+
+    __slots__ = ("burst", "rate")
+
+    def __init__(self, per_minute: int, burst: int) -> None:
+        """Инициализация
+
+        Args:
+            per_minute: Сообщений в минуту
+            burst: Ёмкость корзины (сколько сообщений можно отправить подряд)
+        """
+        self.rate = per_minute / 60
+        self.burst = float(max(1, burst))
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Внешний middleware сообщений: корзины токенов по пользователям
+
+    Команды и обычный текст (вызывающий LLM) ограничиваются раздельно.
+    Сообщение сверх лимита откладывается до появления токена (режим defer,
+    если ждать не дольше THROTTLE_MAX_DEFER_SECONDS) или отбрасывается
+    до вызова фильтров и обработчиков. Корзины хранятся в одном словаре
+    и удаляются после THROTTLE_IDLE_SECONDS бездействия, когда они
+    заведомо снова полны, поэтому память зависит только от активных
+    пользователей.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        logger: structlog.BoundLogger,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация
+
+        Args:
+            config: Конфигурация приложения
+            logger: Логгер приложения
+            clock: Источник времени (для тестов)
+        """
+        self.logger = logger
+        # Вид сообщения -> лимит; 0 сообщений в минуту - без ограничения
+        self.limits = {
+            kind: _Limit(per_minute, burst)
+            for kind, per_minute, burst in (
+                ("command", config.THROTTLE_COMMAND_PER_MINUTE, config.THROTTLE_COMMAND_BURST),
+                ("text", config.THROTTLE_TEXT_PER_MINUTE, config.THROTTLE_TEXT_BURST),
+            )
+            if per_minute > 0
+        }
+        self.defer = config.THROTTLE_MODE == "defer"
+        self.max_defer_seconds: float = config.THROTTLE_MAX_DEFER_SECONDS
+        # Не раньше, чем корзина успеет наполниться, иначе удаление сбросило бы долг
+        refill_seconds = max((limit.burst / limit.rate for limit in self.limits.values()), default=0.0)
+        self.idle_seconds = max(config.THROTTLE_IDLE_SECONDS, refill_seconds + self.max_defer_seconds)
+        self._clock = clock
+        # (user_id, вид сообщения) -> корзина
+        self._buckets: dict[tuple[int, str], _Bucket] = {}
+        self._next_sweep = clock() + SWEEP_INTERVAL_SECONDS
+
+        # Метрики
+        self.passed = 0
+        self.deferred = 0
+        self.dropped = dict.fromkeys(self.limits, 0)
+        self.evicted = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Пропустить, отложить или отбросить сообщение
+
+        Args:
+            handler: Следующий обработчик цепочки
+            event: Входящее сообщение
+            data: Данные контекста aiogram
+
+        Returns:
+            Результат обработчика или None, если сообщение отброшено
+        """
+        if not isinstance(event, Message) or event.from_user is None:
+            return await handler(event, data)
+
+        user_id = event.from_user.id
+        kind = "command" if event.text and event.text.startswith("/") else "text"
+        limit = self.limits.get(kind)
+        if limit is None:
+            return await handler(event, data)
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        bucket = self._buckets.get((user_id, kind))
+        if bucket is None:
+            bucket = self._buckets[(user_id, kind)] = _Bucket(limit.burst, now)
+        else:
+            bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.notified = False
+            self.passed += 1
+            return await handler(event, data)
+
+        wait = (1 - bucket.tokens) / limit.rate
+        if self.defer and wait <= self.max_defer_seconds:
+            # Зарезервировать токен и дождаться его пополнения
+            bucket.tokens -= 1
+            self.deferred += 1
+            await asyncio.sleep(wait)
+            self.passed += 1
+            return await handler(event, data)
+
+        self.dropped[kind] += 1
+        self.logger.warning("update_throttled", user_id=user_id, kind=kind, retry_after=round(wait, 1))
+        if not bucket.notified:
+            # Предупредить один раз за серию, чтобы не отвечать на каждое сообщение флуда
+            bucket.notified = True
+            await event.answer(THROTTLED_MESSAGE)
+        return None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики ограничения
+
+        Returns:
+            Количество отслеживаемых корзин, пропущенных, отложенных, отброшенных и удалённых
+        """
+        return {
+            "tracked": len(self._buckets),
+            "passed": self.passed,
+            "deferred": self.deferred,
+            "dropped": dict(self.dropped),
+            "evicted": self.evicted,
+        }
+
+    def _sweep(self, now: float) -> None:
+        """Удалить корзины неактивных пользователей
+
+        Args:
+            now: Текущее время
+        """
+        idle = [key for key, bucket in self._buckets.items() if now - bucket.updated >= self.idle_seconds]
+        for key in idle:
+            del self._buckets[key]
+        self.evicted += len(idle)
+        self._next_sweep = now + SWEEP_INTERVAL_SECONDS
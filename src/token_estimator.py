@@ -0,0 +1,48 @@
+"""Оценка количества токенов без обращения к токенизатору модели"""
+
+import math
+from typing import Protocol
+
+
+class TokenEstimator(Protocol):
+    """Протокол оценщика токенов
+
+    Оценка строится по длине текста в символах, чтобы её можно было
+    посчитать по колонке messages.length, не загружая сам текст.
+    """
+
+    def estimate_tokens(self, length: int) -> int:
+        """Оценить количество токенов сообщения
+
+        Args:
+            length: Длина текста сообщения в символах
+
+        Returns:
+            Оценка количества токенов с учётом служебных токенов сообщения
+        """
+        ...
+
+
+class CharRatioTokenEstimator:
+    """Оффлайн-оценщик токенов по среднему количеству символов на токен"""
+
+    def __init__(self, chars_per_token: float, message_overhead: int = 4) -> None:
+        """Инициализация оценщика
+
+        Args:
+            chars_per_token: Среднее количество символов на токен
+            message_overhead: Служебные токены на каждое сообщение (роль, разделители)
+        """
+        self.chars_per_token = chars_per_token if chars_per_token > 0 else 1.0
+        self.message_overhead = message_overhead
+
+    def estimate_tokens(self, length: int) -> int:
+        """Оценить количество токенов сообщения
+
+        Args:
+            length: Длина текста сообщения в символах
+
+        Returns:
+            Оценка количества токенов с учётом служебных токенов сообщения
+        """
+        return math.ceil(length / self.chars_per_token) + self.message_overhead
@@ -0,0 +1,240 @@
+"""Фронтовой процесс: приём обновлений Telegram и распределение по воркерам"""
+
+import asyncio
+import contextlib
+import hmac
+from collections.abc import Callable
+from multiprocessing.process import BaseProcess
+from typing import Any
+
+import aiohttp
+import structlog
+from aiogram import Bot as AiogramBot
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError
+from aiohttp import web
+
+from src.bot import SECRET_HEADER, serve_app
+from src.config import Config
+from src.sharding import HashRing, update_user_id
+
+# Тайм-аут long polling getUpdates в секундах
+POLLING_TIMEOUT_SECONDS = 30
+
+# Пауза перед повтором доставки воркеру (удваивается до максимума)
+RETRY_BASE_DELAY_SECONDS = 0.1
+RETRY_MAX_DELAY_SECONDS = 5.0
+
+# Период проверки, что процессы воркеров живы
+SUPERVISE_INTERVAL_SECONDS = 1.0
+
+# Сколько ждать завершения воркера после SIGTERM
+WORKER_STOP_TIMEOUT_SECONDS = 10.0
+
+
+class UpdateRouter:
+    """Распределение обновлений Telegram по процессам-воркерам
+
+    Фронт только принимает обновления (webhook или polling) и по ID
+    пользователя выбирает воркер через кольцо консистентного хеширования.
+    Разбор обновления, обработчики, логирование и вызовы LLM выполняются
+    в воркерах, поэтому бот использует все ядра. Все обновления одного
+    пользователя попадают в один воркер и доставляются ему по порядку одной
+    задачей-отправителем, а кэши пользователя (история, квоты, выполняющиеся
+    генерации) остаются в памяти этого воркера.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        bot: AiogramBot,
+        logger: structlog.BoundLogger,
+        spawn: Callable[[int], BaseProcess],
+    ) -> None:
+        """Инициализация
+
+        Args:
+            config: Конфигурация приложения
+            bot: Бот для приёма обновлений (getUpdates/setWebhook)
+            logger: Логгер приложения
+            spawn: Запуск процесса воркера по его номеру
+        """
+        self.config = config
+        self.bot = bot
+        self.logger = logger
+        self.workers: int = config.BOT_WORKERS
+        self.ring = HashRing(self.workers)
+        # Воркеры слушают localhost на последовательных портах
+        self.worker_ports: list[int] = [config.BOT_WORKER_BASE_PORT + i for i in range(self.workers)]
+        self._spawn = spawn
+        self._processes: list[BaseProcess] = []
+        self._queues: list[asyncio.Queue[dict[str, Any]]] = [asyncio.Queue() for _ in range(self.workers)]
+        self._tasks: list[asyncio.Task[None]] = []
+        self._session: aiohttp.ClientSession | None = None
+
+        # Метрики
+        self.routed = [0] * self.workers
+        self.forwarded = [0] * self.workers
+        self.dropped = 0
+        self.restarts = 0
+
+    async def start(self) -> None:
+        """Запустить процессы воркеров и задачи доставки"""
+        self._session = aiohttp.ClientSession()
+        self._processes = [self._spawn(worker) for worker in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._supervise()))
+        self._tasks.extend(asyncio.create_task(self._deliver(worker)) for worker in range(self.workers))
+
+    async def stop(self) -> None:
+        """Остановить доставку и завершить процессы воркеров"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            await asyncio.to_thread(process.join, WORKER_STOP_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.kill()
+        self._processes.clear()
+
+    async def run(self) -> None:
+        """Принимать обновления в режиме BOT_MODE до отмены"""
+        if self.config.BOT_MODE == "webhook":
+            await serve_app(self.create_webhook_app(), self.config.WEBHOOK_HOST, self.config.WEBHOOK_PORT)
+            return
+        await self._poll()
+
+    def create_webhook_app(self) -> web.Application:
+        """Создать aiohttp-приложение, принимающее webhook Telegram
+
+        Returns:
+            Приложение, регистрирующее webhook в Telegram при старте
+        """
+        app = web.Application()
+        app.router.add_post(self.config.WEBHOOK_PATH, self._handle_webhook)
+        app.on_startup.append(self._set_webhook)
+        return app
+
+    def route(self, update: dict[str, Any]) -> int:
+        """Поставить обновление в очередь воркера его пользователя
+
+        Args:
+            update: Обновление в формате Bot API
+
+        Returns:
+            Номер выбранного воркера
+        """
+        user_id = update_user_id(update)
+        # Обновления без пользователя и чата порядка не требуют
+        worker = self.ring.node_for(user_id) if user_id is not None else 0
+        self._queues[worker].put_nowait(update)
+        self.routed[worker] += 1
+        return worker
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получить метрики распределения
+
+        Returns:
+            Количество воркеров, распределённых, доставленных и ожидающих обновлений по воркерам
+        """
+        return {
+            "workers": self.workers,
+            "routed": list(self.routed),
+            "forwarded": list(self.forwarded),
+            "queued": [queue.qsize() for queue in self._queues],
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+        }
+
+    async def _handle_webhook(self, request: web.Request) -> web.Response:
+        """Принять обновление от Telegram и сразу подтвердить его
+
+        Args:
+            request: HTTP-запрос Telegram
+
+        Returns:
+            200 после постановки в очередь или 401 при неверном секрете
+        """
+        secret = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(secret, self.config.WEBHOOK_SECRET):
+            return web.Response(status=401, text="Unauthorized")
+        self.route(await request.json())
+        return web.Response()
+
+    async def _set_webhook(self, app: web.Application) -> None:
+        """Зарегистрировать адрес webhook в Telegram
+
+        Args:
+            app: Запускаемое приложение
+        """
+        await self.bot.set_webhook(
+            url=self.config.WEBHOOK_URL.rstrip("/") + self.config.WEBHOOK_PATH,
+            secret_token=self.config.WEBHOOK_SECRET,
+        )
+
+    async def _poll(self) -> None:
+        """Получать обновления long polling и распределять их"""
+        # Активный webhook не даёт получать обновления через getUpdates
+        await self.bot.delete_webhook()
+        offset: int | None = None
+        while True:
+            try:
+                updates = await self.bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT_SECONDS)
+            except (TelegramNetworkError, TelegramAPIError) as e:
+                self.logger.warning("polling_failed", error=str(e))
+                await asyncio.sleep(RETRY_MAX_DELAY_SECONDS)
+                continue
+            for update in updates:
+                offset = update.update_id + 1
+                self.route(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+    async def _deliver(self, worker: int) -> None:
+        """Фоновая задача: доставлять обновления воркеру строго по порядку
+
+        Недоступный воркер (запускается или перезапускается) не теряет
+        обновления: доставка повторяется, пока он не ответит.
+
+        Args:
+            worker: Номер воркера
+        """
+        assert self._session is not None
+        queue = self._queues[worker]
+        headers = {SECRET_HEADER: self.config.WEBHOOK_SECRET} if self.config.WEBHOOK_SECRET else {}
+        while True:
+            update = await queue.get()
+            url = f"http://127.0.0.1:{self.worker_ports[worker]}{self.config.WEBHOOK_PATH}"
+            delay = RETRY_BASE_DELAY_SECONDS
+            while True:
+                try:
+                    async with self._session.post(url, json=update, headers=headers) as response:
+                        status = response.status
+                except (aiohttp.ClientError, OSError) as e:
+                    self.logger.warning("worker_unavailable", worker=worker, error=str(e), retry_in=delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RETRY_MAX_DELAY_SECONDS)
+                    continue
+                break
+            if status == 200:
+                self.forwarded[worker] += 1
+            else:
+                # Воркер отклонил обновление (ошибка конфигурации) - повтор не поможет
+                self.dropped += 1
+                self.logger.error("worker_rejected_update", worker=worker, status=status)
+
+    async def _supervise(self) -> None:
+        """Фоновая задача: перезапускать завершившиеся процессы воркеров"""
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL_SECONDS)
+            for worker, process in enumerate(self._processes):
+                if not process.is_alive():
+                    self.logger.error("bot_worker_exited", worker=worker, exitcode=process.exitcode)
+                    self._processes[worker] = self._spawn(worker)
+                    self.restarts += 1
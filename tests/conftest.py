@@ -89,6 +89,11 @@ async def test_database(monkeypatch: pytest.MonkeyPatch) -> Database:
                 length INTEGER NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
                 is_deleted BOOLEAN DEFAULT 0 NOT NULL,
+                llm_model TEXT,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                latency_ms INTEGER,
+                ttft_ms INTEGER,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
             """
@@ -102,12 +107,27 @@ async def test_database(monkeypatch: pytest.MonkeyPatch) -> Database:
             """
         )
 
+        # Create quota usage table
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_quota_usage (
+                user_id INTEGER NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                requests INTEGER DEFAULT 0 NOT NULL,
+                tokens INTEGER DEFAULT 0 NOT NULL,
+                PRIMARY KEY (user_id, bucket_start)
+            )
+            """
+        )
+
     yield db
 
     # Cleanup: drop tables after test
     async with db.get_connection() as conn:
+        await conn.execute("DROP TABLE IF EXISTS user_quota_usage")
         await conn.execute("DROP TABLE IF EXISTS messages")
         await conn.execute("DROP TABLE IF EXISTS users")
+    await db.close()
 
 
 @pytest_asyncio.fixture
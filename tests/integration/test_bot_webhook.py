@@ -0,0 +1,109 @@
+"""Integration tests for webhook mode against a local fake Bot API server"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bot import Bot
+from src.config import Config
+
+SECRET = "test-secret"
+
+
+@pytest_asyncio.fixture
+async def fake_bot_api() -> AsyncIterator[tuple[TestServer, list[tuple[str, dict[str, Any]]]]]:
+    """Fixture для поддельного сервера Bot API, записывающего вызванные методы
+
+    Returns:
+        Сервер и список вызовов (метод, параметры)
+    """
+    calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        params = dict(await request.post())
+        method = request.match_info["method"]
+        calls.append((method, params))
+        if method == "sendMessage":
+            result: Any = {
+                "message_id": 2,
+                "date": 0,
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": params["text"],
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, calls
+    await server.close()
+
+
+def _update(text: str) -> dict[str, Any]:
+    """Обновление Telegram с текстовым сообщением"""
+    return {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_webhook_registers_verifies_secret_and_acks_before_handling(
+    config: Config, fake_bot_api: tuple[TestServer, list[tuple[str, dict[str, Any]]]]
+) -> None:
+    """Тест: webhook регистрируется при старте, проверяет секрет и отвечает 200 до завершения обработки"""
+    server, calls = fake_bot_api
+    config.TELEGRAM_BOT_TOKEN = "123456:test-token"
+    config.BOT_MODE = "webhook"
+    config.TELEGRAM_API_URL = str(server.make_url("")).rstrip("/")
+    config.WEBHOOK_URL = "https://bot.example.com/"
+    config.WEBHOOK_SECRET = SECRET
+    bot = Bot(config)
+
+    release = asyncio.Event()
+    handled = asyncio.Event()
+
+    @bot.dp.message()
+    async def echo(message: Message) -> None:
+        await release.wait()
+        await message.answer(f"echo: {message.text}")
+        handled.set()
+
+    client = TestClient(TestServer(bot.create_webhook_app()))
+    await client.start_server()
+    try:
+        method, params = calls[0]
+        assert method == "setWebhook"
+        assert params["url"] == "https://bot.example.com/telegram/webhook"
+        assert params["secret_token"] == SECRET
+
+        forged = await client.post(config.WEBHOOK_PATH, json=_update("hi"))
+        assert forged.status == 401
+
+        response = await client.post(
+            config.WEBHOOK_PATH, json=_update("hi"), headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        )
+        # Подтверждение пришло, пока обработчик ещё ждёт
+        assert response.status == 200
+        assert not handled.is_set()
+
+        release.set()
+        await asyncio.wait_for(handled.wait(), timeout=5)
+        assert calls[-1] == ("sendMessage", {"chat_id": "42", "text": "echo: hi"})
+    finally:
+        await client.close()
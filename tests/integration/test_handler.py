@@ -1,13 +1,19 @@
 """Integration tests for MessageHandler"""
 
+import asyncio
+from collections.abc import AsyncIterator, Callable
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from src.bulkhead import BUSY_MESSAGE, BulkheadFullError
 from src.config import Config
+from src.database import Database
 from src.dialog_manager import DialogManager
-from src.handler import MessageHandler
-from src.llm_client import LLMClient
+from src.handler import ERROR_MESSAGE, MessageHandler
+from src.llm_client import LLMClient, LLMResult
+from src.llm_usage import LLMUsage
+from src.quota import QuotaTracker
 
 
 @pytest.fixture
@@ -21,7 +27,9 @@ def mock_llm_client(config: Config) -> LLMClient:
         Мокированный LLMClient
     """
     mock_client = MagicMock(spec=LLMClient)
-    mock_client.generate_response = AsyncMock(return_value="Test response")
+    mock_client.generate_response_with_usage = AsyncMock(
+        return_value=LLMResult("Test response", LLMUsage("test-model", 10, 3, latency_ms=120))
+    )
     return mock_client
 
 
@@ -92,3 +100,261 @@ async def test_role_command_includes_role_description(message_handler: MessageHa
 
     # Проверяем что ответ содержит описание роли
     assert config.BOT_ROLE_DESCRIPTION in response_text
+
+
+@pytest.mark.asyncio
+async def test_handle_text_sends_history_to_llm_and_persists_answer(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: текстовое сообщение попадает в контекст LLM, ответ сохраняется и отправляется"""
+    message = AsyncMock()
+    message.text = "Hello"
+    message.from_user.id = 12345
+    message.answer = AsyncMock()
+
+    await message_handler.handle_text(message)
+
+    sent_history = mock_llm_client.generate_response_with_usage.call_args[0][0]
+    assert sent_history[-1] == {"role": "user", "content": "Hello"}
+    message.answer.assert_called_once_with("Test response")
+
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["Hello", "Test response"]
+
+
+@pytest.mark.asyncio
+async def test_handle_text_streaming_edits_placeholder_and_persists_once(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: в потоковом режиме заглушка редактируется, ответ сохраняется один раз"""
+    dialog_manager.config.STREAMING_ENABLED = True
+    dialog_manager.config.STREAM_EDIT_INTERVAL_SECONDS = 0
+
+    async def fake_stream(
+        history: list[dict[str, str]], on_usage: Callable[[LLMUsage], None] | None = None
+    ) -> AsyncIterator[str]:
+        for delta in ["Hel", "lo", "!"]:
+            yield delta
+
+    mock_llm_client.stream_response = fake_stream
+    placeholder = AsyncMock()
+    message = AsyncMock()
+    message.text = "Hi"
+    message.from_user.id = 12345
+    message.answer = AsyncMock(return_value=placeholder)
+
+    await message_handler.handle_text(message)
+
+    message.answer.assert_called_once()
+    assert placeholder.edit_text.call_args_list[-1][0][0] == "Hello!"
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["Hi", "Hello!"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("deltas", [["Hel", "lo"], []])
+async def test_handle_text_streaming_error_replaces_placeholder(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager, deltas: list[str]
+) -> None:
+    """Тест: ошибка или пустой поток показываются в заглушке, пустой ответ не сохраняется"""
+    dialog_manager.config.STREAMING_ENABLED = True
+    dialog_manager.config.STREAM_EDIT_INTERVAL_SECONDS = 3600
+
+    async def fake_stream(
+        history: list[dict[str, str]], on_usage: Callable[[LLMUsage], None] | None = None
+    ) -> AsyncIterator[str]:
+        for delta in deltas:
+            yield delta
+        if deltas:
+            raise TimeoutError("stream stalled")
+
+    mock_llm_client.stream_response = fake_stream
+    placeholder = AsyncMock()
+    message = AsyncMock()
+    message.text = "Hi"
+    message.from_user.id = 12345
+    message.answer = AsyncMock(return_value=placeholder)
+
+    await message_handler.handle_text(message)
+
+    # Отдельное сообщение об ошибке не отправляется: только заглушка
+    message.answer.assert_called_once()
+    placeholder.edit_text.assert_called_once_with(ERROR_MESSAGE)
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["Hi"]
+
+
+@pytest.mark.asyncio
+async def test_handle_text_does_not_persist_empty_response(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: пустой ответ LLM не сохраняется, пользователь получает сообщение об ошибке"""
+    mock_llm_client.generate_response_with_usage.return_value = LLMResult("", LLMUsage("test-model", 10, 0, 5))
+    message = AsyncMock()
+    message.text = "Hello"
+    message.from_user.id = 12345
+    message.answer = AsyncMock()
+
+    await message_handler.handle_text(message)
+
+    message.answer.assert_called_once_with(ERROR_MESSAGE)
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["Hello"]
+
+
+@pytest.mark.asyncio
+async def test_handle_text_replies_busy_when_overloaded(
+    message_handler: MessageHandler, mock_llm_client: MagicMock
+) -> None:
+    """Тест: при перегрузке пользователь сразу получает ответ о занятости"""
+    mock_llm_client.generate_response_with_usage.side_effect = BulkheadFullError("Очередь вызовов LLM заполнена")
+    message = AsyncMock()
+    message.text = "Hello"
+    message.from_user.id = 12345
+    message.answer = AsyncMock()
+
+    await message_handler.handle_text(message)
+
+    message.answer.assert_called_once_with(BUSY_MESSAGE)
+
+
+@pytest.mark.asyncio
+async def test_handle_text_refuses_when_quota_exceeded(
+    mock_llm_client: MagicMock, dialog_manager: DialogManager, logger: MagicMock, test_database: Database
+) -> None:
+    """Тест: при исчерпанной квоте пользователь получает отказ без вызова LLM"""
+    dialog_manager.config.QUOTA_REQUESTS_PER_HOUR = 1
+    quota = QuotaTracker(dialog_manager.config, test_database, logger)
+    handler = MessageHandler(mock_llm_client, dialog_manager, logger, quota)
+    message = AsyncMock()
+    message.text = "Hello"
+    message.from_user.id = 12345
+    message.answer = AsyncMock()
+
+    await handler.handle_text(message)
+    await handler.handle_text(message)
+
+    assert mock_llm_client.generate_response_with_usage.call_count == 1
+    assert "Превышен лимит" in message.answer.call_args[0][0]
+    # Токены ответа учтены в квоте
+    assert quota.get_usage(12345)["tokens_per_hour"] == 13
+
+
+@pytest.mark.asyncio
+async def test_message_burst_uses_one_quota_request(
+    mock_llm_client: MagicMock, dialog_manager: DialogManager, logger: MagicMock, test_database: Database
+) -> None:
+    """Тест: объединённая серия сообщений расходует из квоты один запрос"""
+    dialog_manager.config.QUOTA_REQUESTS_PER_HOUR = 1
+    quota = QuotaTracker(dialog_manager.config, test_database, logger)
+    handler = MessageHandler(mock_llm_client, dialog_manager, logger, quota)
+    handler.debouncer.window_seconds = 0.05
+    messages = []
+    for text in ["Hi", "I have", "a question"]:
+        message = AsyncMock()
+        message.text = text
+        message.from_user.id = 12345
+        messages.append(message)
+
+    leader = asyncio.create_task(handler.handle_text(messages[0]))
+    await asyncio.sleep(0)
+    for message in messages[1:]:
+        await handler.handle_text(message)
+    await leader
+
+    mock_llm_client.generate_response_with_usage.assert_called_once()
+    messages[2].answer.assert_called_once_with("Test response")
+    assert quota.get_usage(12345)["requests_per_hour"] == 1
+
+
+@pytest.mark.asyncio
+async def test_new_message_cancels_stale_generation(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: новое сообщение отменяет незавершённую генерацию, отвечает только последняя"""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def generate(history: list[dict[str, str]]) -> LLMResult:
+        if history[-1]["content"] == "First":
+            started.set()
+            await release.wait()
+        return LLMResult(f"Answer to {history[-1]['content']}", LLMUsage("test-model", 1, 1, latency_ms=1))
+
+    mock_llm_client.generate_response_with_usage.side_effect = generate
+    first = AsyncMock()
+    first.text = "First"
+    first.from_user.id = 12345
+    second = AsyncMock()
+    second.text = "Second"
+    second.from_user.id = 12345
+
+    stale = asyncio.create_task(message_handler.handle_text(first))
+    await started.wait()
+    await message_handler.handle_text(second)
+    await stale
+
+    first.answer.assert_not_called()
+    second.answer.assert_called_once_with("Answer to Second")
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["First", "Second", "Answer to Second"]
+    assert message_handler.generations.superseded == 1
+
+
+@pytest.mark.asyncio
+async def test_clear_cancels_generation_before_clearing_history(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: /clear отменяет генерацию, и её ответ не попадает в очищенную историю"""
+    started = asyncio.Event()
+
+    async def generate(history: list[dict[str, str]]) -> LLMResult:
+        started.set()
+        await asyncio.Event().wait()
+        raise AssertionError("генерация должна быть отменена")
+
+    mock_llm_client.generate_response_with_usage.side_effect = generate
+    message = AsyncMock()
+    message.text = "Hello"
+    message.from_user.id = 12345
+    clear = AsyncMock()
+    clear.from_user.id = 12345
+
+    pending = asyncio.create_task(message_handler.handle_text(message))
+    await started.wait()
+    await message_handler.handle_clear(clear)
+    await pending
+
+    message.answer.assert_not_called()
+    clear.answer.assert_called_once_with("История диалога очищена")
+    history = await dialog_manager.get_history(12345)
+    assert all(msg["role"] == "system" for msg in history)
+
+
+@pytest.mark.asyncio
+async def test_message_burst_is_answered_with_one_llm_call(
+    message_handler: MessageHandler, mock_llm_client: MagicMock, dialog_manager: DialogManager
+) -> None:
+    """Тест: серия быстрых сообщений сохраняется целиком и получает один ответ на последнее"""
+    message_handler.debouncer.window_seconds = 0.05
+    messages = []
+    for text in ["Hi", "I have", "a question"]:
+        message = AsyncMock()
+        message.text = text
+        message.from_user.id = 12345
+        messages.append(message)
+
+    leader = asyncio.create_task(message_handler.handle_text(messages[0]))
+    await asyncio.sleep(0)
+    for message in messages[1:]:
+        await message_handler.handle_text(message)
+    await leader
+
+    mock_llm_client.generate_response_with_usage.assert_called_once()
+    sent_history = mock_llm_client.generate_response_with_usage.call_args[0][0]
+    assert [msg["content"] for msg in sent_history[-3:]] == ["Hi", "I have", "a question"]
+    messages[0].answer.assert_not_called()
+    messages[1].answer.assert_not_called()
+    messages[2].answer.assert_called_once_with("Test response")
+    history = await dialog_manager.get_history(12345)
+    assert [msg["content"] for msg in history[1:]] == ["Hi", "I have", "a question", "Test response"]
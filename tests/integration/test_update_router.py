@@ -0,0 +1,142 @@
+"""Integration tests for UpdateRouter with fake worker servers"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.config import Config
+from src.update_router import UpdateRouter
+
+SECRET = "test-secret"
+
+
+class FakeProcess:
+    """Процесс-воркер, который ничего не запускает"""
+
+    exitcode = None
+
+    def is_alive(self) -> bool:
+        return True
+
+    def terminate(self) -> None:
+        pass
+
+    def join(self, timeout: float | None = None) -> None:
+        pass
+
+    def kill(self) -> None:
+        pass
+
+
+def _update(update_id: int, user_id: int) -> dict[str, Any]:
+    """Обновление Telegram с сообщением пользователя"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": str(update_id),
+        },
+    }
+
+
+@pytest_asyncio.fixture
+async def router(config: Config, logger: MagicMock) -> AsyncIterator[tuple[UpdateRouter, list[list[dict[str, Any]]]]]:
+    """Fixture для UpdateRouter с двумя поддельными воркерами
+
+    Returns:
+        Роутер и списки обновлений, полученных каждым воркером
+    """
+    config.BOT_WORKERS = 2
+    config.BOT_MODE = "webhook"
+    config.WEBHOOK_URL = "https://bot.example.com"
+    config.WEBHOOK_SECRET = SECRET
+    received: list[list[dict[str, Any]]] = [[], []]
+    servers = []
+    for worker in range(2):
+
+        async def handle(request: web.Request, worker: int = worker) -> web.Response:
+            assert request.headers["X-Telegram-Bot-Api-Secret-Token"] == SECRET
+            received[worker].append(await request.json())
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_post(config.WEBHOOK_PATH, handle)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+
+    bot = MagicMock()
+    bot.set_webhook = AsyncMock()
+    router = UpdateRouter(config, bot, logger, lambda worker: FakeProcess())
+    router.worker_ports = [server.port for server in servers]
+    await router.start()
+    yield router, received
+    await router.stop()
+    for server in servers:
+        await server.close()
+
+
+async def _wait_delivered(router: UpdateRouter, total: int) -> None:
+    """Дождаться доставки всех обновлений воркерам"""
+    for _ in range(500):
+        if sum(router.forwarded) == total:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"доставлено {router.get_stats()}")
+
+
+@pytest.mark.asyncio
+async def test_router_keeps_each_user_on_one_worker_in_order(
+    router: tuple[UpdateRouter, list[list[dict[str, Any]]]],
+) -> None:
+    """Тест: обновления пользователя доставляются одному воркеру в исходном порядке"""
+    update_router, received = router
+    users = list(range(1, 21))
+    updates = [_update(update_id, users[update_id % len(users)]) for update_id in range(200)]
+
+    for update in updates:
+        update_router.route(update)
+    await _wait_delivered(update_router, len(updates))
+
+    assert all(received)
+    for user_id in users:
+        worker = update_router.ring.node_for(user_id)
+        expected = [u["update_id"] for u in updates if u["message"]["from"]["id"] == user_id]
+        assert [u["update_id"] for u in received[worker] if u["message"]["from"]["id"] == user_id] == expected
+        assert not any(u["message"]["from"]["id"] == user_id for u in received[1 - worker])
+
+
+@pytest.mark.asyncio
+async def test_router_webhook_verifies_secret_and_forwards(
+    router: tuple[UpdateRouter, list[list[dict[str, Any]]]],
+) -> None:
+    """Тест: фронтовой webhook проверяет секрет, регистрирует адрес и передаёт обновление воркеру"""
+    update_router, received = router
+    client = TestClient(TestServer(update_router.create_webhook_app()))
+    await client.start_server()
+    try:
+        update_router.bot.set_webhook.assert_awaited_once_with(
+            url="https://bot.example.com/telegram/webhook", secret_token=SECRET
+        )
+        forged = await client.post(update_router.config.WEBHOOK_PATH, json=_update(1, 5))
+        assert forged.status == 401
+
+        response = await client.post(
+            update_router.config.WEBHOOK_PATH,
+            json=_update(1, 5),
+            headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+        )
+        assert response.status == 200
+        await _wait_delivered(update_router, 1)
+        assert received[update_router.ring.node_for(5)] == [_update(1, 5)]
+    finally:
+        await client.close()
@@ -0,0 +1,132 @@
+"""Unit tests for Bulkhead class"""
+
+import asyncio
+
+import pytest
+
+from src.bulkhead import Bulkhead, BulkheadFullError
+from src.rate_limiter import LLMPriority
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrency_and_queues_excess_calls() -> None:
+    """Тест: одновременно выполняется не больше max_concurrent вызовов, остальные ждут"""
+    bulkhead = Bulkhead(max_concurrent=2, max_queue=10, max_wait_seconds=60)
+    running = 0
+    peak = 0
+
+    async def call() -> None:
+        nonlocal running, peak
+        async with bulkhead.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(5)))
+
+    assert peak == 2
+    stats = bulkhead.get_stats()
+    assert stats["admitted"] == 5
+    assert stats["queued"] == 3
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full() -> None:
+    """Тест: при заполненной очереди вызов отклоняется сразу"""
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=1, max_wait_seconds=60)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with bulkhead.slot():
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold()) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFullError):
+        async with bulkhead.slot():
+            pass
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert bulkhead.get_stats()["rejected_queue_full"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_expected_wait_too_long() -> None:
+    """Тест: вызов отклоняется, если ожидаемое время ожидания превышает порог"""
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=10, max_wait_seconds=5)
+    bulkhead.service_time_ewma = 10
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with bulkhead.slot():
+            await release.wait()
+
+    task = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    assert bulkhead.expected_wait() == 10
+    with pytest.raises(BulkheadFullError):
+        async with bulkhead.slot():
+            pass
+
+    release.set()
+    await task
+    assert bulkhead.get_stats()["rejected_wait_too_long"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot() -> None:
+    """Тест: отменённый в очереди вызов не занимает слот"""
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=10, max_wait_seconds=60)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await holder
+
+    assert bulkhead.get_stats()["active"] == 0
+    async with bulkhead.slot():
+        assert bulkhead.get_stats()["active"] == 1
+
+
+@pytest.mark.asyncio
+async def test_saturated_bulkhead_admits_by_priority() -> None:
+    """Тест: освободившийся слот получает USER, даже если BACKGROUND и ADMIN встали в очередь раньше"""
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=10, max_wait_seconds=60)
+    release = asyncio.Event()
+    order: list[LLMPriority] = []
+
+    async def hold() -> None:
+        async with bulkhead.slot(LLMPriority.BACKGROUND):
+            await release.wait()
+
+    async def call(priority: LLMPriority) -> None:
+        async with bulkhead.slot(priority):
+            order.append(priority)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiters = []
+    for priority in (LLMPriority.BACKGROUND, LLMPriority.ADMIN, LLMPriority.USER, LLMPriority.BACKGROUND):
+        waiters.append(asyncio.create_task(call(priority)))
+        await asyncio.sleep(0)
+    assert bulkhead.queue_depth == 4
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    assert order == [LLMPriority.USER, LLMPriority.ADMIN, LLMPriority.BACKGROUND, LLMPriority.BACKGROUND]
@@ -0,0 +1,113 @@
+"""Unit tests for ChatService streaming"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.api.chat_service import ChatService
+from src.api.schemas import ChatRequest
+from src.api.session_manager import session_id_to_user_id
+from src.bulkhead import BUSY_MESSAGE, BulkheadFullError
+from src.config import Config
+from src.database import Database
+from src.llm_client import LLMResult
+from src.llm_usage import LLMUsage
+from src.quota import QuotaTracker
+
+
+@pytest.fixture
+def chat_service(config: Config, test_database: Database, logger: MagicMock) -> ChatService:
+    """Fixture для ChatService с потоковым LLM, отдающим три фрагмента
+
+    Args:
+        config: Тестовая конфигурация
+        test_database: Тестовая база данных
+        logger: Мокированный логгер
+
+    Returns:
+        ChatService для тестирования
+    """
+    service = ChatService(config, test_database, logger)
+
+    async def fake_stream(
+        history: list[dict[str, str]], on_usage: Callable[[LLMUsage], None] | None = None
+    ) -> AsyncIterator[str]:
+        for delta in ["Hel", "lo", "!"]:
+            yield delta
+        if on_usage is not None:
+            on_usage(LLMUsage("test-model", 10, 3, latency_ms=120, ttft_ms=40))
+
+    service.llm_client.stream_response = fake_stream  # type: ignore[method-assign]
+    return service
+
+
+@pytest.mark.asyncio
+async def test_stream_message_yields_deltas_and_persists_answer(chat_service: ChatService) -> None:
+    """Тест: stream_message() отдаёт фрагменты и сохраняет полный ответ"""
+    request = ChatRequest(message="Hi", mode="normal", session_id="web_test")
+
+    deltas = [delta async for delta in chat_service.stream_message(request)]
+
+    assert deltas == ["Hel", "lo", "!"]
+    history = await chat_service.dialog_manager.get_history(session_id_to_user_id("web_test"))
+    assert [msg["content"] for msg in history[1:]] == ["Hi", "Hello!"]
+
+    # Расход токенов сохраняется вместе с ответом ассистента
+    async with chat_service.database.get_connection() as conn:
+        cursor = await conn.execute(
+            "SELECT llm_model, prompt_tokens, completion_tokens, latency_ms, ttft_ms FROM messages ORDER BY id"
+        )
+        rows = [tuple(row) for row in await cursor.fetchall()]
+    assert rows == [(None, None, None, None, None), ("test-model", 10, 3, 120, 40)]
+
+
+@pytest.mark.asyncio
+async def test_stream_message_persists_partial_answer_on_disconnect(chat_service: ChatService) -> None:
+    """Тест: при закрытии потока клиентом сохраняется уже полученная часть ответа"""
+    request = ChatRequest(message="Hi", mode="normal", session_id="web_test")
+
+    stream = chat_service.stream_message(request)
+    assert await anext(stream) == "Hel"
+    await stream.aclose()
+    await asyncio.gather(*chat_service._background_tasks)
+
+    history = await chat_service.dialog_manager.get_history(session_id_to_user_id("web_test"))
+    assert [msg["content"] for msg in history[1:]] == ["Hi", "Hel"]
+
+
+@pytest.mark.asyncio
+async def test_process_message_returns_busy_response_when_overloaded(chat_service: ChatService) -> None:
+    """Тест: при перегрузке process_message() сразу возвращает ответ о занятости"""
+    chat_service.llm_client.generate_response_with_usage = AsyncMock(  # type: ignore[method-assign]
+        side_effect=BulkheadFullError("Очередь вызовов LLM заполнена")
+    )
+    request = ChatRequest(message="Hi", mode="normal", session_id="web_test")
+
+    response = await chat_service.process_message(request)
+
+    assert response.message == BUSY_MESSAGE
+    history = await chat_service.dialog_manager.get_history(session_id_to_user_id("web_test"))
+    assert [msg["content"] for msg in history[1:]] == ["Hi"]
+
+
+@pytest.mark.asyncio
+async def test_process_message_refuses_when_quota_exceeded(
+    config: Config, test_database: Database, logger: MagicMock
+) -> None:
+    """Тест: при исчерпанной квоте сессии process_message() отказывает без вызова LLM"""
+    config.QUOTA_REQUESTS_PER_HOUR = 0
+    config.QUOTA_REQUESTS_PER_DAY = 1
+    service = ChatService(config, test_database, logger, quota=QuotaTracker(config, test_database, logger))
+    service.llm_client.generate_response_with_usage = AsyncMock(  # type: ignore[method-assign]
+        return_value=LLMResult("Answer", LLMUsage("test-model", 10, 3, latency_ms=120))
+    )
+    request = ChatRequest(message="Hi", mode="normal", session_id="web_test")
+
+    first = await service.process_message(request)
+    second = await service.process_message(request)
+
+    assert first.message == "Answer"
+    assert "Превышен лимит" in second.message
+    service.llm_client.generate_response_with_usage.assert_called_once()
@@ -0,0 +1,89 @@
+"""Unit tests for CircuitBreaker class"""
+
+from src.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_threshold_and_rejects_requests() -> None:
+    """Тест: выключатель размыкается после серии ошибок и отклоняет запросы"""
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_seconds=10, clock=FakeClock())
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    stats = breaker.get_stats()
+    assert stats["state"] == "open"
+    assert stats["opened_count"] == 1
+    assert stats["rejected_count"] == 1
+
+
+def test_success_resets_failure_count() -> None:
+    """Тест: успешный запрос сбрасывает счётчик ошибок подряд"""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_seconds=10, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_half_open_allows_single_probe() -> None:
+    """Тест: после времени восстановления пропускается один пробный запрос"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_circuit() -> None:
+    """Тест: ошибка пробного запроса снова размыкает выключатель"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.get_stats()["opened_count"] == 2
+    clock.now = 15
+    assert not breaker.allow_request()
+
+
+def test_lost_probe_is_retried_after_recovery_time() -> None:
+    """Тест: если исход пробы не записан, следующая проба пропускается через recovery_seconds"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    clock.now = 15
+    assert not breaker.allow_request()
+    clock.now = 20
+    assert breaker.allow_request()
@@ -207,3 +207,78 @@ def test_config_raises_error_when_prompt_file_not_found(monkeypatch: pytest.Monk
 
         with pytest.raises(ValueError, match="Файл системного промпта не найден"):
             Config()
+
+
+def test_config_parses_boolean_flags(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест: булевы флаги читаются из окружения, по умолчанию выключены"""
+    with patch("src.config.load_dotenv"):
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_bot_token")
+        monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+        monkeypatch.setenv("SYSTEM_PROMPT", "Test prompt")
+        monkeypatch.delenv("DB_WRITE_BATCHING_ENABLED", raising=False)
+
+        assert Config().DB_WRITE_BATCHING_ENABLED is False
+
+        monkeypatch.setenv("DB_WRITE_BATCHING_ENABLED", "True")
+
+        assert Config().DB_WRITE_BATCHING_ENABLED is True
+
+
+def test_config_parses_llm_targets(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест: пул целей LLM разбирается из LLM_TARGETS, по умолчанию - OPENAI_MODEL"""
+    with patch("src.config.load_dotenv"):
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_bot_token")
+        monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+        monkeypatch.setenv("SYSTEM_PROMPT", "Test prompt")
+        monkeypatch.setenv("OPENAI_MODEL", "openai/gpt-4")
+        monkeypatch.setenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
+        monkeypatch.delenv("LLM_TARGETS", raising=False)
+
+        assert Config().LLM_TARGETS == [("openai/gpt-4", "https://openrouter.ai/api/v1")]
+
+        monkeypatch.setenv("LLM_TARGETS", "openai/gpt-4o, llama3:8b|http://localhost:11434/v1,")
+
+        assert Config().LLM_TARGETS == [
+            ("openai/gpt-4o", "https://openrouter.ai/api/v1"),
+            ("llama3:8b", "http://localhost:11434/v1"),
+        ]
+
+
+def test_config_requires_url_and_secret_in_webhook_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест: режим webhook требует WEBHOOK_URL и WEBHOOK_SECRET, по умолчанию - polling"""
+    with patch("src.config.load_dotenv"):
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_bot_token")
+        monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+        monkeypatch.setenv("SYSTEM_PROMPT", "Test prompt")
+        monkeypatch.delenv("BOT_MODE", raising=False)
+
+        assert Config().BOT_MODE == "polling"
+
+        monkeypatch.setenv("BOT_MODE", "webhook")
+        monkeypatch.setenv("WEBHOOK_URL", "https://bot.example.com")
+        monkeypatch.delenv("WEBHOOK_SECRET", raising=False)
+
+        with pytest.raises(ValueError, match="WEBHOOK_SECRET"):
+            Config()
+
+        monkeypatch.setenv("WEBHOOK_SECRET", "s3cret")
+
+        assert Config().WEBHOOK_SECRET == "s3cret"
+
+
+def test_config_splits_llm_limits_between_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест: воркеры делят общие лимиты LLM, 0 остаётся без ограничения"""
+    with patch("src.config.load_dotenv"):
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_bot_token")
+        monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+        monkeypatch.setenv("SYSTEM_PROMPT", "Test prompt")
+        monkeypatch.setenv("LLM_RATE_LIMIT_RPM", "100")
+        monkeypatch.setenv("LLM_RATE_LIMIT_TPM", "0")
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "32")
+
+        config = Config()
+        config.split_llm_limits(3)
+
+        assert config.LLM_RATE_LIMIT_RPM == 34
+        assert config.LLM_RATE_LIMIT_TPM == 0
+        assert config.LLM_MAX_CONCURRENCY == 11
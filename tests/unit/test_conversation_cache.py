@@ -0,0 +1,109 @@
+"""Unit tests for ConversationCache class"""
+
+from src.conversation_cache import ConversationCache
+
+
+class FakeClock:
+    """Управляемый источник времени для тестов TTL"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_returns_put_messages_and_counts_hits() -> None:
+    """Тест: get() возвращает сохранённое окно и считает попадания/промахи"""
+    cache = ConversationCache(max_users=10, max_bytes=1000, ttl_seconds=60)
+
+    assert cache.get(1) is None
+    cache.put(1, [{"role": "user", "content": "Hello"}])
+
+    assert cache.get(1) == [{"role": "user", "content": "Hello"}]
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_append_only_updates_cached_users() -> None:
+    """Тест: append() дополняет окно закэшированного пользователя и игнорирует остальных"""
+    cache = ConversationCache(max_users=10, max_bytes=1000, ttl_seconds=60)
+    cache.put(1, [])
+
+    cache.append(1, {"role": "user", "content": "Hi"})
+    cache.append(2, {"role": "user", "content": "Hi"})
+
+    assert cache.get(1) == [{"role": "user", "content": "Hi"}]
+    assert cache.get(2) is None
+
+
+def test_evicts_least_recently_used_over_user_limit() -> None:
+    """Тест: при превышении количества пользователей вытесняется самый давний"""
+    cache = ConversationCache(max_users=2, max_bytes=1000, ttl_seconds=60)
+    cache.put(1, [])
+    cache.put(2, [])
+    cache.get(1)
+    cache.put(3, [])
+
+    assert cache.contains(1)
+    assert not cache.contains(2)
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_evicts_over_byte_limit() -> None:
+    """Тест: суммарный размер текста ограничен max_bytes"""
+    cache = ConversationCache(max_users=10, max_bytes=10, ttl_seconds=60)
+    cache.put(1, [{"role": "user", "content": "12345"}])
+    cache.put(2, [{"role": "user", "content": "1234567"}])
+
+    assert not cache.contains(1)
+    assert cache.contains(2)
+    assert cache.get_stats()["bytes"] == 7
+
+
+def test_idle_entries_expire() -> None:
+    """Тест: окно устаревает после ttl_seconds простоя"""
+    clock = FakeClock()
+    cache = ConversationCache(max_users=10, max_bytes=1000, ttl_seconds=60, clock=clock)
+    cache.put(1, [])
+
+    clock.now = 61
+
+    assert cache.get(1) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_fill_is_discarded_after_concurrent_write() -> None:
+    """Тест: окно, прочитанное из БД до конкурентной записи, не кэшируется"""
+    cache = ConversationCache(max_users=10, max_bytes=1000, ttl_seconds=60)
+
+    token = cache.begin_fill(1)
+    cache.invalidate(1)
+    cache.complete_fill(1, token, [{"role": "user", "content": "stale"}])
+
+    assert not cache.contains(1)
+
+    token = cache.begin_fill(1)
+    cache.complete_fill(1, token, [{"role": "user", "content": "fresh"}])
+
+    assert cache.get(1) == [{"role": "user", "content": "fresh"}]
+
+
+def test_fill_overlapping_write_is_discarded() -> None:
+    """Тест: окно, прочитанное во время незавершённой записи, не кэшируется"""
+    cache = ConversationCache(max_users=10, max_bytes=1000, ttl_seconds=60)
+    message = {"role": "user", "content": "Hello"}
+
+    cache.begin_write(1)
+    token = cache.begin_fill(1)
+    # Чтение уже видит зафиксированную строку, но запись ещё не завершена
+    cache.complete_fill(1, token, [message])
+    cache.complete_write(1, message)
+
+    assert not cache.contains(1)
+
+    token = cache.begin_fill(1)
+    cache.complete_fill(1, token, [message])
+
+    assert cache.get(1) == [message]
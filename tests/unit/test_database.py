@@ -0,0 +1,114 @@
+"""Unit tests for Database connection pool"""
+
+import asyncio
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.mark.asyncio
+async def test_get_connection_reuses_pooled_connection(test_database: Database) -> None:
+    """Тест: get_connection() повторно выдаёт уже открытое соединение"""
+    async with test_database.get_connection() as conn1:
+        pass
+    async with test_database.get_connection() as conn2:
+        pass
+
+    assert conn1 is conn2
+    assert test_database.get_pool_stats().open_connections == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_has_pragmas_applied(test_database: Database) -> None:
+    """Тест: PRAGMA-настройки применяются при открытии соединения"""
+    async with test_database.get_connection() as conn:
+        cursor = await conn.execute("PRAGMA foreign_keys")
+        foreign_keys = await cursor.fetchone()
+        cursor = await conn.execute("PRAGMA busy_timeout")
+        busy_timeout = await cursor.fetchone()
+
+    assert foreign_keys is not None and foreign_keys[0] == 1
+    assert busy_timeout is not None and busy_timeout[0] == test_database.config.DB_BUSY_TIMEOUT_MS
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded_and_counts_waits(test_database: Database) -> None:
+    """Тест: пул не открывает больше DB_POOL_SIZE соединений и учитывает ожидания"""
+    test_database.pool_size = 1
+    release = asyncio.Event()
+
+    async def hold_connection() -> None:
+        async with test_database.get_connection():
+            await release.wait()
+
+    holder = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0.01)
+
+    waiter = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0.01)
+
+    stats = test_database.get_pool_stats()
+    assert stats.open_connections == 1
+    assert stats.in_use == 1
+    assert stats.waiting == 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+
+    stats = test_database.get_pool_stats()
+    assert stats.waits == 1
+    assert stats.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_get_connection_rolls_back_on_error(test_database: Database) -> None:
+    """Тест: при исключении транзакция откатывается, соединение возвращается в пул"""
+    with pytest.raises(RuntimeError):
+        async with test_database.get_connection() as conn:
+            await conn.execute("INSERT INTO users (id) VALUES (1)")
+            raise RuntimeError("boom")
+
+    async with test_database.get_connection() as conn:
+        cursor = await conn.execute("SELECT COUNT(*) FROM users")
+        row = await cursor.fetchone()
+
+    assert row is not None and row[0] == 0
+    assert test_database.get_pool_stats().in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_close_fails_pending_checkouts(test_database: Database) -> None:
+    """Тест: close() будит задачи, ожидающие соединение, и новые выдачи отклоняются"""
+    test_database.pool_size = 1
+    release = asyncio.Event()
+
+    async def hold_connection() -> None:
+        async with test_database.get_connection():
+            await release.wait()
+
+    holder = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.create_task(hold_connection()) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    assert test_database.get_pool_stats().waiting == 2
+
+    await test_database.close()
+    results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        async with test_database.get_connection():
+            pass
+
+    release.set()
+    await holder
+    stats = test_database.get_pool_stats()
+    assert stats.open_connections == 0
+    assert stats.waiting == 0
+
+    # После повторного connect() сигнал закрытия не мешает выдаче соединений
+    await test_database.connect()
+    async with test_database.get_connection() as conn:
+        assert conn is not None
+    assert test_database.get_pool_stats().idle == 1
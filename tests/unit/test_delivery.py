@@ -0,0 +1,188 @@
+"""Тесты для DeliveryQueue"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from aiogram.client.default import DefaultBotProperties
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteWebhook, EditMessageText, SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity, ReplyParameters
+
+from src.config import Config
+from src.delivery import TELEGRAM_MESSAGE_LIMIT, DeliveryQueue, split_message
+
+
+@pytest_asyncio.fixture
+async def delivery(config: Config, logger: MagicMock) -> AsyncIterator[DeliveryQueue]:
+    """Fixture для запущенной очереди с короткими интервалами"""
+    config.DELIVERY_GLOBAL_PER_SECOND = 1000
+    config.DELIVERY_CHAT_INTERVAL_SECONDS = 0.05
+    config.DELIVERY_GROUP_INTERVAL_SECONDS = 0.05
+    queue = DeliveryQueue(config, logger)
+    await queue.start()
+    yield queue
+    await queue.stop()
+
+
+class FakeApi:
+    """Следующий обработчик цепочки запросов: записывает запросы и время их выполнения"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[Any, str, float]] = []
+        self.retry_after: list[int] = []
+        self.methods: list[Any] = []
+
+    async def __call__(self, bot: Any, method: Any) -> str:
+        if self.retry_after:
+            raise TelegramRetryAfter(method, "Too Many Requests", self.retry_after.pop(0))
+        self.methods.append(method)
+        text = getattr(method, "text", type(method).__name__)
+        self.calls.append((getattr(method, "chat_id", None), text, time.monotonic()))
+        return f"ok:{text}"
+
+
+def test_split_message_prefers_line_breaks() -> None:
+    """Тест: длинный текст режется по переводам строк, строка длиннее лимита - по лимиту"""
+    assert split_message("short") == ["short"]
+    assert split_message("") == [""]
+    assert split_message("aaaa\nbbbb\ncc", limit=9) == ["aaaa\nbbbb", "cc"]
+    assert split_message("x" * 10, limit=4) == ["xxxx", "xxxx", "xx"]
+
+
+@pytest.mark.asyncio
+async def test_sends_are_ordered_and_paced_per_chat(delivery: DeliveryQueue) -> None:
+    """Тест: сообщения чата уходят по порядку с интервалом, другой чат не ждёт"""
+    api = FakeApi()
+    bot = MagicMock()
+
+    results = await asyncio.gather(
+        *(delivery(api, bot, SendMessage(chat_id=1, text=f"a{i}")) for i in range(3)),
+        delivery(api, bot, SendMessage(chat_id=2, text="b0")),
+    )
+
+    assert results == ["ok:a0", "ok:a1", "ok:a2", "ok:b0"]
+    chat_1 = [(text, at) for chat_id, text, at in api.calls if chat_id == 1]
+    assert [text for text, _ in chat_1] == ["a0", "a1", "a2"]
+    assert all(later - earlier >= 0.045 for (_, earlier), (_, later) in zip(chat_1, chat_1[1:], strict=False))
+    b_at = next(at for chat_id, _, at in api.calls if chat_id == 2)
+    assert b_at < chat_1[1][1]
+    assert delivery.get_stats()["sent"] == 4
+    assert delivery.get_stats()["latency_ms"]["count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_and_retried(delivery: DeliveryQueue) -> None:
+    """Тест: после 429 запрос повторяется, вызвавший получает успешный ответ"""
+    api = FakeApi()
+    api.retry_after = [0]
+
+    result = await delivery(api, MagicMock(), EditMessageText(chat_id=1, message_id=5, text="edited"))
+
+    assert result == "ok:edited"
+    assert delivery.get_stats()["retried"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_gives_up_after_max_retries(delivery: DeliveryQueue) -> None:
+    """Тест: после DELIVERY_MAX_RETRIES повторов ошибка передаётся вызвавшему"""
+    api = FakeApi()
+    api.retry_after = [0] * (delivery.max_retries + 1)
+
+    with pytest.raises(TelegramRetryAfter):
+        await delivery(api, MagicMock(), SendMessage(chat_id=1, text="hi"))
+
+    assert delivery.get_stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_long_message_is_split_into_ordered_chunks(delivery: DeliveryQueue) -> None:
+    """Тест: ответ длиннее лимита Telegram отправляется несколькими сообщениями по порядку"""
+    api = FakeApi()
+    first = "a" * (TELEGRAM_MESSAGE_LIMIT - 10)
+    second = "b" * 100
+
+    result = await delivery(
+        api, MagicMock(default=DefaultBotProperties()), SendMessage(chat_id=1, text=f"{first}\n{second}")
+    )
+
+    assert [text for _, text, _ in api.calls] == [first, second]
+    assert result == f"ok:{first}"
+    assert delivery.get_stats()["split"] == 1
+
+
+@pytest.mark.asyncio
+async def test_split_message_keeps_reply_on_first_and_keyboard_on_last_chunk(delivery: DeliveryQueue) -> None:
+    """Тест: ответ на сообщение остаётся у первой части, клавиатура - у последней"""
+    api = FakeApi()
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="ok", callback_data="ok")]])
+    method = SendMessage(
+        chat_id=1,
+        text="a" * TELEGRAM_MESSAGE_LIMIT + "\n" + "b" * TELEGRAM_MESSAGE_LIMIT + "\n" + "c",
+        reply_parameters=ReplyParameters(message_id=7),
+        reply_markup=keyboard,
+    )
+
+    await delivery(api, MagicMock(default=DefaultBotProperties()), method)
+
+    assert len(api.methods) == 3
+    assert [m.reply_parameters for m in api.methods] == [method.reply_parameters, None, None]
+    assert [m.reply_markup for m in api.methods] == [None, None, keyboard]
+
+
+@pytest.mark.parametrize(
+    ("bot_parse_mode", "parse_mode", "entities"),
+    [
+        (None, "HTML", None),
+        ("MarkdownV2", None, None),
+        (None, None, [MessageEntity(type="bold", offset=0, length=4)]),
+    ],
+)
+@pytest.mark.asyncio
+async def test_formatted_long_message_is_not_split(
+    delivery: DeliveryQueue,
+    logger: MagicMock,
+    bot_parse_mode: str | None,
+    parse_mode: str | None,
+    entities: list[MessageEntity] | None,
+) -> None:
+    """Тест: длинное сообщение с форматированием не разбивается на части"""
+    api = FakeApi()
+    bot = MagicMock(default=DefaultBotProperties(parse_mode=bot_parse_mode))
+    text = "a" * TELEGRAM_MESSAGE_LIMIT + "\nb"
+    kwargs: dict[str, Any] = {"entities": entities}
+    if parse_mode is not None:
+        kwargs["parse_mode"] = parse_mode
+
+    await delivery(api, bot, SendMessage(chat_id=1, text=text, **kwargs))
+
+    assert [t for _, t, _ in api.calls] == [text]
+    assert delivery.get_stats()["split"] == 0
+    logger.warning.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_requests_without_chat_bypass_queue(delivery: DeliveryQueue) -> None:
+    """Тест: запросы без chat_id выполняются сразу, минуя очередь"""
+    api = FakeApi()
+
+    await delivery(api, MagicMock(), DeleteWebhook())
+
+    assert api.calls[0][0] is None
+    assert delivery.get_stats()["sent"] == 0
+
+
+def test_global_rate_is_shared_between_workers(config: Config, logger: MagicMock) -> None:
+    """Тест: глобальный лимит делится между воркерами, 0 означает отсутствие ограничения"""
+    config.DELIVERY_GLOBAL_PER_SECOND = 24
+    config.BOT_WORKERS = 4
+
+    assert DeliveryQueue(config, logger).global_interval == pytest.approx(1 / 6)
+
+    config.DELIVERY_GLOBAL_PER_SECOND = 0
+
+    assert DeliveryQueue(config, logger).global_interval == 0
@@ -1,12 +1,15 @@
 """Unit tests for DialogManager class"""
 
+import asyncio
 from typing import Any
+from unittest.mock import patch
 
 import pytest
 
 from src.config import Config
 from src.dialog_manager import DialogManager
 from src.message_repository import MessageRepository
+from src.token_estimator import CharRatioTokenEstimator
 
 
 @pytest.mark.asyncio
@@ -179,3 +182,119 @@ async def test_get_history_applies_trimming_when_max_context_set(
     assert len(history) == 5
     assert history[0]["role"] == "system"
     assert "User 8" in history[1]["content"]  # Последние пары
+
+
+@pytest.mark.asyncio
+async def test_add_message_and_get_history_returns_context_with_new_message(dialog_manager: DialogManager) -> None:
+    """Тест: add_message_and_get_history() сохраняет сообщение и возвращает контекст с ним"""
+    user_id = 12345
+
+    await dialog_manager.add_message(user_id, "user", "First")
+    await dialog_manager.add_message(user_id, "assistant", "Second")
+
+    history = await dialog_manager.add_message_and_get_history(user_id, "user", "Third")
+
+    assert [msg["role"] for msg in history] == ["system", "user", "assistant", "user"]
+    assert history[-1]["content"] == "Third"
+    assert history == await dialog_manager.get_history(user_id)
+
+
+@pytest.mark.asyncio
+async def test_get_history_respects_token_budget(config: Config, message_repository: MessageRepository) -> None:
+    """Тест: при MAX_CONTEXT_TOKENS история обрезается по бюджету, начиная с новых сообщений"""
+    config.SYSTEM_PROMPT = "S" * 40  # 10 токенов при 4 символах на токен
+    config.MAX_CONTEXT_TOKENS = 40
+    manager = DialogManager(config, message_repository, CharRatioTokenEstimator(4, message_overhead=0))
+    user_id = 12345
+
+    await manager.add_message(user_id, "user", "A" * 200)  # 50 токенов - не помещается
+    await manager.add_message(user_id, "assistant", "B" * 40)  # 10 токенов
+    await manager.add_message(user_id, "user", "C" * 80)  # 20 токенов
+
+    history = await manager.get_history(user_id)
+
+    assert [msg["content"][0] for msg in history] == ["S", "B", "C"]
+
+
+@pytest.mark.asyncio
+async def test_get_history_keeps_newest_message_over_budget(
+    config: Config, message_repository: MessageRepository
+) -> None:
+    """Тест: самое новое сообщение сохраняется, даже если оно одно превышает бюджет"""
+    config.MAX_CONTEXT_TOKENS = 10
+    manager = DialogManager(config, message_repository, CharRatioTokenEstimator(4, message_overhead=0))
+    user_id = 12345
+
+    await manager.add_message(user_id, "user", "Short")
+    history = await manager.add_message_and_get_history(user_id, "user", "X" * 1000)
+
+    assert len(history) == 2
+    assert history[0]["role"] == "system"
+    assert history[1]["content"] == "X" * 1000
+
+
+@pytest.mark.asyncio
+async def test_get_history_served_from_conversation_cache(
+    config: Config, message_repository: MessageRepository
+) -> None:
+    """Тест: при включённом кэше повторное чтение истории не обращается к БД"""
+    config.CONVERSATION_CACHE_ENABLED = True
+    manager = DialogManager(config, message_repository)
+    user_id = 12345
+
+    await manager.add_message_and_get_history(user_id, "user", "Hello")
+    await manager.add_message(user_id, "assistant", "Hi there")
+
+    with patch.object(message_repository, "get_recent_messages") as get_recent:
+        history = await manager.get_history(user_id)
+
+    get_recent.assert_not_called()
+    assert [msg["content"] for msg in history[1:]] == ["Hello", "Hi there"]
+    assert manager.cache is not None and manager.cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_clear_history_invalidates_conversation_cache(
+    config: Config, message_repository: MessageRepository
+) -> None:
+    """Тест: clear_history() сбрасывает закэшированное окно"""
+    config.CONVERSATION_CACHE_ENABLED = True
+    manager = DialogManager(config, message_repository)
+    user_id = 12345
+
+    await manager.add_message_and_get_history(user_id, "user", "Hello")
+    await manager.clear_history(user_id)
+
+    history = await manager.get_history(user_id)
+
+    assert len(history) == 1
+
+
+@pytest.mark.asyncio
+async def test_history_read_during_write_does_not_duplicate_message(
+    config: Config, message_repository: MessageRepository
+) -> None:
+    """Тест: чтение истории между фиксацией записи и обновлением кэша не дублирует сообщение"""
+    config.CONVERSATION_CACHE_ENABLED = True
+    manager = DialogManager(config, message_repository)
+    user_id = 12345
+    committed = asyncio.Event()
+    release = asyncio.Event()
+    add_message = message_repository.add_message
+
+    async def slow_add_message(*args: Any, **kwargs: Any) -> None:
+        await add_message(*args, **kwargs)
+        committed.set()
+        await release.wait()
+
+    with patch.object(message_repository, "add_message", side_effect=slow_add_message):
+        write = asyncio.create_task(manager.add_message(user_id, "user", "Hello"))
+        await committed.wait()
+        # Промах кэша: окно читается из БД, где сообщение уже есть
+        await manager.get_history(user_id)
+        release.set()
+        await write
+
+    history = await manager.get_history(user_id)
+
+    assert [msg["content"] for msg in history[1:]] == ["Hello"]
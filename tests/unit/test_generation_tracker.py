@@ -0,0 +1,77 @@
+"""Тесты для GenerationTracker"""
+
+import asyncio
+
+import pytest
+
+from src.generation_tracker import GenerationCancelledError, GenerationPolicy, GenerationTracker
+
+
+async def _wait_forever() -> str:
+    """Генерация, которая завершается только отменой"""
+    await asyncio.Event().wait()
+    return "never"
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result() -> None:
+    """Тест: результат генерации возвращается вызывающему"""
+    tracker = GenerationTracker(GenerationPolicy.CANCEL_PREVIOUS)
+
+    async def generate() -> str:
+        return "answer"
+
+    assert await tracker.run(1, generate()) == "answer"
+    assert tracker.in_flight(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_new_generation_cancels_previous() -> None:
+    """Тест: при политике cancel_previous новая генерация отменяет предыдущую"""
+    tracker = GenerationTracker(GenerationPolicy.CANCEL_PREVIOUS)
+    stale = asyncio.create_task(tracker.run(1, _wait_forever()))
+    await asyncio.sleep(0)
+
+    async def generate() -> str:
+        return "fresh"
+
+    assert await tracker.run(1, generate()) == "fresh"
+    with pytest.raises(GenerationCancelledError):
+        await stale
+    assert tracker.get_stats()["superseded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_keep_previous_does_not_cancel_and_other_users_unaffected() -> None:
+    """Тест: при политике keep_previous генерации не отменяют друг друга"""
+    tracker = GenerationTracker(GenerationPolicy.KEEP_PREVIOUS)
+    first = asyncio.create_task(tracker.run(1, _wait_forever()))
+    other_user = asyncio.create_task(tracker.run(2, _wait_forever()))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(tracker.run(1, _wait_forever()))
+    await asyncio.sleep(0)
+
+    assert tracker.in_flight(1) == 2
+    assert await tracker.cancel(1) == 2
+    for task in (first, second):
+        with pytest.raises(GenerationCancelledError):
+            await task
+    assert not other_user.done()
+    assert tracker.get_stats()["cleared"] == 2
+
+    other_user.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await other_user
+
+
+@pytest.mark.asyncio
+async def test_caller_cancellation_propagates_to_generation() -> None:
+    """Тест: отмена вызывающей задачи отменяет генерацию и не подменяется GenerationCancelledError"""
+    tracker = GenerationTracker(GenerationPolicy.CANCEL_PREVIOUS)
+    caller = asyncio.create_task(tracker.run(1, _wait_forever()))
+    await asyncio.sleep(0)
+
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert tracker.in_flight(1) == 0
@@ -0,0 +1,75 @@
+"""Unit tests for shared LLM HTTP transport"""
+
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src import http_transport
+from src.config import Config
+from src.http_transport import close_http_client, get_http_client, warm_up_http_client
+from src.llm_client import LLMClient
+
+
+@pytest.mark.asyncio
+async def test_llm_clients_share_http_client(config: Config, logger: MagicMock) -> None:
+    """Тест: все LLMClient процесса используют один HTTP-клиент"""
+    config.LLM_TARGETS = [("a", "https://a.example/v1"), ("b", "https://b.example/v1")]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=AsyncMock()) as mock_openai:
+        LLMClient(config, logger)
+        LLMClient(config, logger)
+
+    http_clients = {id(call.kwargs["http_client"]) for call in mock_openai.call_args_list}
+    assert mock_openai.call_count == 4
+    assert http_clients == {id(get_http_client(config))}
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_close_http_client_recreates_on_next_use(config: Config) -> None:
+    """Тест: после закрытия при следующем обращении создаётся новый клиент"""
+    client = get_http_client(config)
+
+    await close_http_client()
+
+    assert client.is_closed
+    assert get_http_client(config) is not client
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connection_to_each_endpoint(
+    config: Config, logger: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест: прогрев обращается к каждому endpoint один раз и не падает на ошибках"""
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.host == "down.example":
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(404)
+
+    monkeypatch.setattr(http_transport, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    config.LLM_TARGETS = [("a", "https://up.example/v1"), ("b", "https://up.example/v1")]
+    config.LLM_FAST_TARGETS = [("c", "https://down.example/v1")]
+
+    await warm_up_http_client(config, logger)
+
+    assert requested == ["https://up.example/v1", "https://down.example/v1"]
+    logger.info.assert_called_once_with("llm_http_warmed_up", base_url="https://up.example/v1", http_version="HTTP/1.1")
+    logger.warning.assert_called_once()
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_warns_when_http2_requested_but_unavailable(config: Config, logger: MagicMock) -> None:
+    """Тест: без пакета h2 клиент работает по HTTP/1.1 и предупреждает об этом"""
+    config.LLM_HTTP2_ENABLED = True
+
+    with patch("src.http_transport.http2_available", return_value=False):
+        get_http_client(config, logger)
+
+    logger.warning.assert_called_once_with("llm_http2_unavailable", reason=ANY)
+    await close_http_client()
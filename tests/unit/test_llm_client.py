@@ -1,13 +1,18 @@
 """Unit tests for LLMClient class"""
 
+import asyncio
 from typing import Any
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
-from openai import OpenAIError
+from openai import APIStatusError, OpenAIError
 
+from src import response_cache as response_cache_module
+from src.bulkhead import Bulkhead
+from src.circuit_breaker import CircuitOpenError
 from src.config import Config
 from src.llm_client import LLMClient
+from src.model_router import Route
 
 
 @pytest.fixture
@@ -73,7 +78,7 @@ async def test_generate_response_logs_request_and_response(
         # Проверяем логирование запроса
         logger.info.assert_any_call("llm_request", model=config.OPENAI_MODEL, message_count=1)
         # Проверяем логирование ответа
-        logger.info.assert_any_call("llm_response", length=13)  # len("Test response")
+        logger.info.assert_any_call("llm_response", model=config.OPENAI_MODEL, length=13)  # len("Test response")
 
 
 @pytest.mark.asyncio
@@ -139,3 +144,376 @@ async def test_generate_response_passes_correct_parameters(
         call_kwargs = mock_openai_client.chat.completions.create.call_args[1]
         assert call_kwargs["model"] == config.OPENAI_MODEL
         assert call_kwargs["messages"] == messages
+
+
+def _make_chunk(content: str | None) -> MagicMock:
+    """Создать мокированный чанк потокового ответа
+
+    Args:
+        content: Текст дельты
+
+    Returns:
+        Мокированный ChatCompletionChunk
+    """
+    chunk = MagicMock()
+    chunk.choices = [MagicMock()]
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+class FakeStream:
+    """Мокированный AsyncStream с фиксированным набором чанков"""
+
+    def __init__(self, chunks: list[MagicMock]) -> None:
+        self.chunks = chunks
+        self.closed = False
+
+    def __aiter__(self) -> "FakeStream":
+        return self
+
+    async def __anext__(self) -> MagicMock:
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_deltas_and_closes_stream(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: stream_response() отдаёт непустые дельты и закрывает поток"""
+    stream = FakeStream([_make_chunk("Hel"), _make_chunk(None), _make_chunk("lo")])
+    mock_openai_client.chat.completions.create.return_value = stream
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        deltas = [delta async for delta in client.stream_response([{"role": "user", "content": "Hi"}])]
+
+    assert deltas == ["Hel", "lo"]
+    assert stream.closed
+    assert mock_openai_client.chat.completions.create.call_args[1]["stream"] is True
+
+
+def _make_status_error(status_code: int, headers: dict[str, str] | None = None) -> APIStatusError:
+    """Создать ошибку API с указанным HTTP-статусом
+
+    Args:
+        status_code: HTTP-статус ответа
+        headers: Заголовки ответа
+
+    Returns:
+        APIStatusError с мокированным ответом
+    """
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return APIStatusError(f"Error {status_code}", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_generate_response_retries_retryable_errors(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: временные ошибки повторяются, Retry-After учитывается"""
+    success = mock_openai_client.chat.completions.create.return_value
+    mock_openai_client.chat.completions.create.side_effect = [
+        _make_status_error(429, {"retry-after": "0.25"}),
+        _make_status_error(503),
+        success,
+    ]
+    config.LLM_MAX_RETRIES = 2
+
+    with (
+        patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client),
+        patch("src.llm_client.asyncio.sleep", new_callable=AsyncMock) as mock_sleep,
+    ):
+        client = LLMClient(config, logger)
+        response = await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    assert response == "Test response"
+    assert mock_openai_client.chat.completions.create.call_count == 3
+    assert mock_sleep.await_args_list[0].args[0] == 0.25
+    assert mock_sleep.await_args_list[1].args[0] <= config.LLM_RETRY_BASE_DELAY_SECONDS * 2
+    stats = client.get_stats()
+    assert stats["attempts"] == 3
+    assert stats["retries"] == 2
+    assert stats["targets"][0]["circuit_breaker"]["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_slot_released_between_retries(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: слот bulkhead занят только на время вызова провайдера, не на задержку повтора"""
+    success = mock_openai_client.chat.completions.create.return_value
+    mock_openai_client.chat.completions.create.side_effect = [_make_status_error(503), success]
+    config.LLM_MAX_RETRIES = 1
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=10, max_wait_seconds=60)
+    active_during_sleep: list[int] = []
+
+    async def sleep(delay: float) -> None:
+        active_during_sleep.append(bulkhead.get_stats()["active"])
+
+    with (
+        patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client),
+        patch("src.llm_client.asyncio.sleep", side_effect=sleep),
+    ):
+        client = LLMClient(config, logger)
+        client.bulkhead = bulkhead
+        response = await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    assert response == "Test response"
+    assert active_during_sleep == [0]
+    stats = bulkhead.get_stats()
+    assert stats["admitted"] == 2
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_response_does_not_retry_client_errors(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: ошибки запроса (4xx) не повторяются и не размыкают выключатель"""
+    mock_openai_client.chat.completions.create.side_effect = _make_status_error(400)
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        with pytest.raises(APIStatusError):
+            await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    assert mock_openai_client.chat.completions.create.call_count == 1
+    assert client.get_stats()["targets"][0]["circuit_breaker"]["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_response_gives_up_when_retry_after_too_long(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: Retry-After больше максимальной задержки прекращает повторы"""
+    mock_openai_client.chat.completions.create.side_effect = _make_status_error(429, {"retry-after": "120"})
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        with pytest.raises(APIStatusError):
+            await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    assert mock_openai_client.chat.completions.create.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast(config: Config, logger: MagicMock, mock_openai_client: AsyncMock) -> None:
+    """Тест: после серии ошибок запросы отклоняются без обращения к провайдеру"""
+    mock_openai_client.chat.completions.create.side_effect = _make_status_error(502)
+    config.LLM_MAX_RETRIES = 0
+    config.LLM_CIRCUIT_FAILURE_THRESHOLD = 2
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        messages: list[dict[str, Any]] = [{"role": "user", "content": "Hello"}]
+        for _ in range(2):
+            with pytest.raises(APIStatusError):
+                await client.generate_response(messages)
+
+        with pytest.raises(CircuitOpenError):
+            await client.generate_response(messages)
+
+    assert mock_openai_client.chat.completions.create.call_count == 2
+    stats = client.get_stats()["targets"][0]["circuit_breaker"]
+    assert stats["state"] == "open"
+    assert stats["rejected_count"] == 1
+    logger.warning.assert_any_call("llm_circuit_open", error=ANY)
+
+
+@pytest.mark.asyncio
+async def test_failover_to_next_target_on_error(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: при ошибке цели запрос сразу переключается на следующую без задержки"""
+    success = mock_openai_client.chat.completions.create.return_value
+    mock_openai_client.chat.completions.create.side_effect = [_make_status_error(503), success]
+    config.LLM_TARGETS = [("primary", "https://a.example/v1"), ("backup", "https://b.example/v1")]
+
+    with (
+        patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client),
+        patch("src.llm_client.asyncio.sleep", new_callable=AsyncMock) as mock_sleep,
+    ):
+        client = LLMClient(config, logger)
+        response = await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    assert response == "Test response"
+    models = [call.kwargs["model"] for call in mock_openai_client.chat.completions.create.call_args_list]
+    assert models == ["primary", "backup"]
+    mock_sleep.assert_not_awaited()
+    stats = client.get_stats()
+    assert stats["failovers"] == 1
+    assert stats["retries"] == 0
+    assert stats["targets"][0]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_latency_excludes_wait_before_successful_call(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: latency_ms измеряет успешный вызов провайдера, ожидание до него - в queue_ms"""
+    success = mock_openai_client.chat.completions.create.return_value
+    calls = 0
+
+    async def create(**kwargs: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.1)
+            raise _make_status_error(503)
+        return success
+
+    mock_openai_client.chat.completions.create.side_effect = create
+    config.LLM_TARGETS = [("primary", "https://a.example/v1"), ("backup", "https://b.example/v1")]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        result = await client.generate_response_with_usage([{"role": "user", "content": "Hello"}])
+
+    assert result.usage.model == "backup"
+    assert result.usage.latency_ms < 50
+    assert result.usage.queue_ms is not None
+    assert result.usage.queue_ms >= 90
+
+
+@pytest.mark.asyncio
+async def test_failover_when_latency_slo_exceeded(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: попытка дольше LLM_LATENCY_SLO_SECONDS переключается на следующую цель"""
+    success = mock_openai_client.chat.completions.create.return_value
+
+    async def create(**kwargs: Any) -> MagicMock:
+        if kwargs["model"] == "slow":
+            await asyncio.sleep(10)
+        return success
+
+    mock_openai_client.chat.completions.create.side_effect = create
+    config.LLM_TARGETS = [("slow", "https://a.example/v1"), ("fast", "https://b.example/v1")]
+    config.LLM_LATENCY_SLO_SECONDS = 0.05
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        response = await client.generate_response([{"role": "user", "content": "Hello"}])
+
+        assert response == "Test response"
+        slow, fast = client.targets
+        assert slow.failures == 1
+        assert slow.latency_ewma is not None and slow.latency_ewma >= 0.05
+
+        # Следующий запрос сразу идёт на более здоровую цель
+        await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    models = [call.kwargs["model"] for call in mock_openai_client.chat.completions.create.call_args_list]
+    assert models == ["slow", "fast", "fast"]
+
+
+@pytest.mark.asyncio
+async def test_routes_to_primary_when_targets_equally_healthy(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: при отсутствии проблем запросы идут на первую цель из LLM_TARGETS"""
+    config.LLM_TARGETS = [("primary", "https://a.example/v1"), ("backup", "https://a.example/v1")]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client) as mock_openai:
+        client = LLMClient(config, logger)
+        for _ in range(3):
+            await client.generate_response([{"role": "user", "content": "Hello"}])
+
+    # Один клиент на endpoint
+    mock_openai.assert_called_once()
+    models = {call.kwargs["model"] for call in mock_openai_client.chat.completions.create.call_args_list}
+    assert models == {"primary"}
+
+
+@pytest.mark.asyncio
+async def test_simple_request_routed_to_fast_target(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: простой запрос идёт быстрой модели, явный Route.LARGE - большой"""
+    config.LLM_FAST_TARGETS = [("small", "https://a.example/v1")]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        await client.generate_response([{"role": "user", "content": "привет"}])
+        await client.generate_response([{"role": "user", "content": "привет"}], route=Route.LARGE)
+
+    models = [call.kwargs["model"] for call in mock_openai_client.chat.completions.create.call_args_list]
+    assert models == ["small", config.OPENAI_MODEL]
+    assert client.get_stats()["router"]["routes"] == {"fast": 1, "large": 0}
+    # В логе модель маршрута, а не OPENAI_MODEL по умолчанию
+    logger.info.assert_any_call("llm_request", model="small", message_count=1)
+    logger.info.assert_any_call("llm_response", model="small", length=13)
+
+
+@pytest.mark.asyncio
+async def test_fast_route_falls_back_to_large_target(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: при ошибке быстрой модели запрос переключается на большую"""
+    success = mock_openai_client.chat.completions.create.return_value
+    mock_openai_client.chat.completions.create.side_effect = [_make_status_error(500), success]
+    config.LLM_FAST_TARGETS = [("small", "https://a.example/v1")]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        response = await client.generate_response([{"role": "user", "content": "привет"}])
+
+    assert response == "Test response"
+    models = [call.kwargs["model"] for call in mock_openai_client.chat.completions.create.call_args_list]
+    assert models == ["small", config.OPENAI_MODEL]
+    logger.info.assert_any_call("llm_response", model=config.OPENAI_MODEL, length=13)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_coalesced(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock
+) -> None:
+    """Тест: одновременные одинаковые запросы выполняются одним вызовом провайдера"""
+    response = mock_openai_client.chat.completions.create.return_value
+
+    async def slow_create(**kwargs: Any) -> MagicMock:
+        await asyncio.sleep(0.01)
+        return response
+
+    mock_openai_client.chat.completions.create.side_effect = slow_create
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        results = await asyncio.gather(
+            client.generate_response([{"role": "user", "content": "Hello"}]),
+            client.generate_response([{"role": "user", "content": "Hello"}]),
+            client.generate_response([{"role": "user", "content": "Other"}]),
+        )
+
+    assert results == ["Test response"] * 3
+    assert mock_openai_client.chat.completions.create.call_count == 2
+    assert client.get_stats()["singleflight"]["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_response_cache_used_only_when_requested(
+    config: Config, logger: MagicMock, mock_openai_client: AsyncMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест: кэш ответов используется только при use_cache=True"""
+    monkeypatch.setattr(response_cache_module, "_response_cache", None)
+    config.LLM_RESPONSE_CACHE_ENABLED = True
+    config.LLM_RESPONSE_CACHE_PATH = ""
+    messages: list[dict[str, Any]] = [{"role": "user", "content": "Hello"}]
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        first = await client.generate_response(messages, use_cache=True)
+        second = await client.generate_response(messages, use_cache=True)
+        await client.generate_response(messages)
+
+    assert first == second == "Test response"
+    assert mock_openai_client.chat.completions.create.call_count == 2
+    assert client.response_cache is not None
+    assert client.response_cache.get_stats()["memory_hits"] == 1
@@ -0,0 +1,84 @@
+"""Тесты для MessageDebouncer"""
+
+import asyncio
+
+import pytest
+
+from src.message_debouncer import MessageDebouncer
+
+
+@pytest.mark.asyncio
+async def test_burst_is_merged_into_one_turn() -> None:
+    """Тест: сообщения внутри окна объединяются в один ход в порядке поступления"""
+    turns: list[tuple[int, list[str]]] = []
+
+    async def process(user_id: int, items: list[str]) -> None:
+        turns.append((user_id, items))
+
+    debouncer: MessageDebouncer[str] = MessageDebouncer(0.05, 5, process)
+    leader = asyncio.create_task(debouncer.submit(1, "a"))
+    await asyncio.sleep(0)
+    await debouncer.submit(1, "b")
+    await debouncer.submit(2, "other")
+    await debouncer.submit(1, "c")
+    await leader
+
+    assert (1, ["a", "b", "c"]) in turns
+    assert (2, ["other"]) in turns
+    assert debouncer.get_stats() == {"pending": 0, "turns": 2, "merged": 2, "discarded": 0}
+
+
+@pytest.mark.asyncio
+async def test_zero_window_processes_each_message_in_order() -> None:
+    """Тест: без окна каждое сообщение - отдельный ход, ходы пользователя не перекрываются"""
+    events: list[str] = []
+
+    async def process(user_id: int, items: list[str]) -> None:
+        events.append(f"start {items[0]}")
+        await asyncio.sleep(0.01)
+        events.append(f"end {items[0]}")
+
+    debouncer: MessageDebouncer[str] = MessageDebouncer(0, 5, process)
+    await asyncio.gather(debouncer.submit(1, "a"), debouncer.submit(1, "b"))
+
+    assert events == ["start a", "end a", "start b", "end b"]
+    assert debouncer._locks == {}
+
+
+@pytest.mark.asyncio
+async def test_max_wait_closes_turn_during_continuous_burst() -> None:
+    """Тест: непрерывный поток сообщений не откладывает ход дольше max_wait_seconds"""
+    turns: list[list[int]] = []
+
+    async def process(user_id: int, items: list[int]) -> None:
+        turns.append(items)
+
+    debouncer: MessageDebouncer[int] = MessageDebouncer(0.05, 0.1, process)
+    leader = asyncio.create_task(debouncer.submit(1, 0))
+    for i in range(1, 20):
+        await asyncio.sleep(0.02)
+        if leader.done():
+            break
+        await debouncer.submit(1, i)
+    await leader
+
+    assert turns and len(turns[0]) < 20
+
+
+@pytest.mark.asyncio
+async def test_discard_drops_pending_turn() -> None:
+    """Тест: отброшенный до закрытия ход не обрабатывается"""
+    turns: list[list[str]] = []
+
+    async def process(user_id: int, items: list[str]) -> None:
+        turns.append(items)
+
+    debouncer: MessageDebouncer[str] = MessageDebouncer(10, 10, process)
+    leader = asyncio.create_task(debouncer.submit(1, "a"))
+    await asyncio.sleep(0)
+    await debouncer.submit(1, "b")
+
+    assert debouncer.discard(1) == 2
+    await asyncio.wait_for(leader, timeout=1)
+    assert turns == []
+    assert debouncer.get_stats()["discarded"] == 2
@@ -1,8 +1,10 @@
 """Unit tests for MessageRepository class"""
 
+from unittest.mock import patch
+
 import pytest
 
-from src.message_repository import MessageRepository
+from src.message_repository import KnownUserCache, MessageRepository
 
 
 @pytest.mark.asyncio
@@ -152,3 +154,60 @@ async def test_message_length_calculation(message_repository: MessageRepository)
     assert messages[0]["length"] == len(short_msg)
     assert messages[1]["length"] == len(long_msg)
 
+
+@pytest.mark.asyncio
+async def test_add_message_skips_user_upsert_for_known_user(message_repository: MessageRepository) -> None:
+    """Тест: для уже известного пользователя upsert в users не выполняется"""
+    user_id = 12345
+
+    with patch.object(message_repository, "_upsert_user", wraps=message_repository._upsert_user) as upsert:
+        await message_repository.add_message(user_id, "user", "First")
+        await message_repository.add_message(user_id, "assistant", "Second")
+
+    assert upsert.await_count == 1
+    messages = await message_repository.get_user_messages(user_id)
+    assert len(messages) == 2
+
+
+def test_known_user_cache_evicts_least_recently_used() -> None:
+    """Тест: KnownUserCache вытесняет давно не использованных пользователей"""
+    cache = KnownUserCache(max_size=2)
+
+    cache.add(1)
+    cache.add(2)
+    cache.touch(1)
+    cache.add(3)
+
+    assert cache.touch(1)
+    assert not cache.touch(2)
+    assert cache.touch(3)
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_recent_messages_returns_last_n_in_order(message_repository: MessageRepository) -> None:
+    """Тест: get_recent_messages() возвращает последние N сообщений в хронологическом порядке"""
+    user_id = 12345
+
+    for i in range(5):
+        await message_repository.add_message(user_id, "user", f"Message {i}")
+
+    messages = await message_repository.get_recent_messages(user_id, limit=2)
+
+    assert messages == [
+        {"role": "user", "content": "Message 3"},
+        {"role": "user", "content": "Message 4"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_recent_messages_without_limit_returns_all(message_repository: MessageRepository) -> None:
+    """Тест: get_recent_messages() без limit возвращает всю историю"""
+    user_id = 12345
+
+    for i in range(3):
+        await message_repository.add_message(user_id, "user", f"Message {i}")
+
+    messages = await message_repository.get_recent_messages(user_id)
+
+    assert [m["content"] for m in messages] == ["Message 0", "Message 1", "Message 2"]
@@ -0,0 +1,89 @@
+"""Unit tests for MessageWriteQueue class"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.config import Config
+from src.database import Database
+from src.message_repository import MessageRepository
+from src.message_write_queue import MessageWriteQueue
+
+
+@pytest.fixture
+def write_queue(config: Config, test_database: Database, logger: MagicMock) -> MessageWriteQueue:
+    """Fixture для очереди групповой записи с окном 50 мс
+
+    Args:
+        config: Тестовая конфигурация
+        test_database: Тестовая база данных
+        logger: Мокированный логгер
+
+    Returns:
+        MessageWriteQueue для тестирования
+    """
+    config.DB_WRITE_BATCH_MAX_DELAY_MS = 50
+    config.DB_WRITE_BATCH_MAX_SIZE = 10
+    return MessageWriteQueue(config, test_database, logger)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_messages_written_in_one_batch(
+    write_queue: MessageWriteQueue, test_database: Database
+) -> None:
+    """Тест: конкурентные вставки объединяются в одну транзакцию"""
+    repository = MessageRepository(test_database, write_queue)
+
+    await asyncio.gather(*(repository.add_message(100 + i, "user", f"Message {i}") for i in range(5)))
+    await write_queue.stop()
+
+    stats = write_queue.get_stats()
+    assert stats["batches_written"] == 1
+    assert stats["messages_written"] == 5
+    assert stats["batch_size"]["count"] == 1
+    assert stats["batch_size"]["buckets"]["le_5"] == 1
+
+    messages = await repository.get_user_messages(103)
+    assert [m["content"] for m in messages] == ["Message 3"]
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_max_size(write_queue: MessageWriteQueue, test_database: Database) -> None:
+    """Тест: пакет не превышает DB_WRITE_BATCH_MAX_SIZE строк"""
+    write_queue.max_batch_size = 2
+    repository = MessageRepository(test_database, write_queue)
+
+    await asyncio.gather(*(repository.add_message(1, "user", str(i)) for i in range(5)))
+    await write_queue.stop()
+
+    assert write_queue.get_stats()["batches_written"] == 3
+    messages = await repository.get_user_messages(1)
+    assert [m["content"] for m in messages] == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_propagates_to_callers(write_queue: MessageWriteQueue, test_database: Database) -> None:
+    """Тест: ошибка записи пакета пробрасывается каждому вызывающему"""
+    async with test_database.get_connection() as conn:
+        await conn.execute("DROP TABLE messages")
+
+    with pytest.raises(Exception, match="no such table"):
+        await write_queue.add_message(1, "user", "Hello")
+    await write_queue.stop()
+
+    assert write_queue.get_stats()["batch_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_writer_fails_pending_messages(write_queue: MessageWriteQueue) -> None:
+    """Тест: при отмене писателя вызывающие получают ошибку, а не ждут вечно"""
+    await write_queue.start()
+    callers = [asyncio.create_task(write_queue.add_message(1, "user", str(i))) for i in range(3)]
+    await asyncio.sleep(0.01)
+
+    assert write_queue._writer is not None
+    write_queue._writer.cancel()
+    results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
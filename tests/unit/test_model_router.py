@@ -0,0 +1,66 @@
+"""Unit tests for ModelRouter class"""
+
+from typing import Any
+
+import pytest
+
+from src.config import Config
+from src.model_router import ModelRouter, Route
+
+
+def _conversation(text: str, history: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
+    """Собрать историю с системным промптом и последним сообщением пользователя
+
+    Args:
+        text: Текст последнего сообщения пользователя
+        history: Предыдущие сообщения диалога
+
+    Returns:
+        Сообщения в формате OpenAI API
+    """
+    return [{"role": "system", "content": "System " * 500}, *(history or []), {"role": "user", "content": text}]
+
+
+@pytest.mark.parametrize("text", ["привет", "Спасибо!", "А в каком году вышел альбом?"])
+def test_simple_requests_routed_to_fast_model(config: Config, text: str) -> None:
+    """Тест: короткие простые сообщения идут быстрой модели"""
+    router = ModelRouter(config)
+
+    assert router.route(_conversation(text)) is Route.FAST
+
+
+@pytest.mark.parametrize(
+    ("text", "reason"),
+    [
+        ("a" * 300, "long_message"),
+        ("Что не так с `print x`?", "code"),
+        ("Посоветуй из списка:\n- Queen\n- ABBA", "list"),
+        ("Объясни разницу между джазом и блюзом", "keyword"),
+    ],
+)
+def test_complex_requests_routed_to_large_model(config: Config, text: str, reason: str) -> None:
+    """Тест: длинные сообщения, код, списки и задачи на рассуждение идут большой модели"""
+    router = ModelRouter(config)
+
+    assert router.classify(_conversation(text)) == reason
+    assert router.route(_conversation(text)) is Route.LARGE
+
+
+def test_long_context_routed_to_large_model(config: Config) -> None:
+    """Тест: короткий вопрос при большом контексте диалога идёт большой модели"""
+    config.ROUTER_FAST_MAX_CONTEXT_CHARS = 100
+    router = ModelRouter(config)
+    history = [{"role": "assistant", "content": "x" * 200}]
+
+    assert router.classify(_conversation("а ещё?", history)) == "long_context"
+
+
+def test_route_counters(config: Config) -> None:
+    """Тест: маршруты и причины выбора большой модели учитываются в метриках"""
+    router = ModelRouter(config)
+
+    router.route(_conversation("привет"))
+    router.route(_conversation("привет"))
+    router.route(_conversation("```code```"))
+
+    assert router.get_stats() == {"routes": {"fast": 2, "large": 1}, "large_reasons": {"code": 1}}
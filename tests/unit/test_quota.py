@@ -0,0 +1,101 @@
+"""Unit tests for QuotaTracker class"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.config import Config
+from src.database import Database
+from src.quota import QuotaExceededError, QuotaTracker
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self) -> None:
+        """Инициализация часов"""
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        """Текущее время"""
+        return self.now
+
+
+@pytest.fixture
+def quota_config(config: Config) -> Config:
+    """Fixture для конфигурации с небольшими квотами
+
+    Args:
+        config: Тестовая конфигурация
+
+    Returns:
+        Конфигурация с лимитом 3 запроса в час и 1000 токенов в сутки
+    """
+    config.QUOTA_REQUESTS_PER_HOUR = 3
+    config.QUOTA_REQUESTS_PER_DAY = 0
+    config.QUOTA_TOKENS_PER_HOUR = 0
+    config.QUOTA_TOKENS_PER_DAY = 1000
+    return config
+
+
+@pytest.mark.asyncio
+async def test_requests_limited_in_sliding_window(
+    quota_config: Config, test_database: Database, logger: MagicMock
+) -> None:
+    """Тест: запросы сверх лимита отклоняются, пока старые не выйдут из окна"""
+    clock = FakeClock()
+    quota = QuotaTracker(quota_config, test_database, logger, clock=clock)
+
+    quota.acquire(1)
+    clock.now += 600
+    quota.acquire(1)
+    quota.acquire(1)
+
+    with pytest.raises(QuotaExceededError) as exc_info:
+        quota.acquire(1)
+    assert exc_info.value.limit_name == "requests_per_hour"
+    # Первый запрос выйдет из окна через 50 минут
+    assert 2900 <= exc_info.value.retry_after <= 3000
+    assert "50 мин" in exc_info.value.user_message
+
+    # Другой пользователь не затронут
+    quota.acquire(2)
+
+    clock.now += 3000
+    quota.acquire(1)
+    assert quota.get_stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tokens_limited_after_usage_recorded(
+    quota_config: Config, test_database: Database, logger: MagicMock
+) -> None:
+    """Тест: после исчерпания токенов следующий запрос отклоняется"""
+    quota = QuotaTracker(quota_config, test_database, logger, clock=FakeClock())
+
+    quota.acquire(1)
+    quota.record_tokens(1, 1200)
+
+    with pytest.raises(QuotaExceededError) as exc_info:
+        quota.acquire(1)
+    assert exc_info.value.limit_name == "tokens_per_day"
+    assert quota.get_usage(1) == {"requests_per_hour": 1, "tokens_per_day": 1200}
+
+
+@pytest.mark.asyncio
+async def test_usage_restored_from_checkpoint(quota_config: Config, test_database: Database, logger: MagicMock) -> None:
+    """Тест: сохранённые счётчики загружаются новым экземпляром после перезапуска"""
+    clock = FakeClock()
+    quota = QuotaTracker(quota_config, test_database, logger, clock=clock)
+    await quota.start()
+    quota.acquire(1)
+    quota.record_tokens(1, 300)
+    await quota.stop()
+
+    restarted = QuotaTracker(quota_config, test_database, logger, clock=clock)
+    await restarted.start()
+    try:
+        assert restarted.get_usage(1) == {"requests_per_hour": 1, "tokens_per_day": 300}
+    finally:
+        await restarted.stop()
+    assert quota.get_stats()["checkpoints"] == 1
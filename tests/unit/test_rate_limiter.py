@@ -0,0 +1,128 @@
+"""Unit tests for RateLimiter class"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src import rate_limiter as rate_limiter_module
+from src.config import Config
+from src.llm_client import LLMClient
+from src.rate_limiter import LLMPriority, RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_over_time() -> None:
+    """Тест: корзина пополняется равномерно и ждёт не больше своей ёмкости"""
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    assert bucket.wait_time(1000) == pytest.approx(60.0)
+
+    clock.now = 30
+    assert bucket.wait_time(30) == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_is_immediate_within_limits() -> None:
+    """Тест: в пределах лимитов разрешение выдаётся без очереди"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+
+    waited = await limiter.acquire(100)
+
+    assert waited == 0
+    stats = limiter.get_stats()
+    assert stats["granted"]["user"] == 1
+    assert stats["delayed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_served_by_priority() -> None:
+    """Тест: при исчерпании лимита запросы пользователей обслуживаются раньше admin и фоновых"""
+    limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=0)
+    assert limiter._requests is not None
+    limiter._requests.tokens = 0
+    order: list[LLMPriority] = []
+
+    async def call(priority: LLMPriority) -> None:
+        await limiter.acquire(1, priority)
+        order.append(priority)
+
+    tasks = []
+    for priority in (LLMPriority.BACKGROUND, LLMPriority.ADMIN, LLMPriority.USER):
+        tasks.append(asyncio.create_task(call(priority)))
+        await asyncio.sleep(0)
+    assert limiter.get_stats()["queue_depth"] == 3
+
+    await asyncio.gather(*tasks)
+
+    assert order == [LLMPriority.USER, LLMPriority.ADMIN, LLMPriority.BACKGROUND]
+    stats = limiter.get_stats()
+    assert stats["delayed"] == 3
+    assert stats["max_queue_depth"] == 3
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_limit_delays_large_requests() -> None:
+    """Тест: запрос ждёт, пока корзина токенов накопит его оценку"""
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=60000)
+    await limiter.acquire(60000)
+
+    waited = await limiter.acquire(50)
+
+    assert waited >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue() -> None:
+    """Тест: отменённый запрос покидает очередь и не блокирует следующих"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=0)
+    assert limiter._requests is not None
+    limiter._requests.tokens = 0
+
+    cancelled = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    assert limiter.get_stats()["queue_depth"] == 0
+    assert await limiter.acquire(1) > 0
+
+
+@pytest.mark.asyncio
+async def test_llm_client_acquires_permit_per_request(
+    config: Config, logger: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест: LLMClient получает разрешение на каждый запрос и корректирует расход токенов"""
+    monkeypatch.setattr(rate_limiter_module, "_rate_limiter", None)
+    config.LLM_RATE_LIMIT_RPM = 100
+    config.LLM_RATE_LIMIT_TPM = 6000
+    mock_openai_client = AsyncMock()
+    response = MagicMock()
+    response.choices[0].message.content = "Answer"
+    response.usage.total_tokens = 20
+    mock_openai_client.chat.completions.create.return_value = response
+
+    with patch("src.llm_client.AsyncOpenAI", return_value=mock_openai_client):
+        client = LLMClient(config, logger)
+        await client.generate_response([{"role": "user", "content": "Hello"}], priority=LLMPriority.ADMIN)
+
+    limiter = client.rate_limiter
+    assert limiter is not None
+    assert limiter is rate_limiter_module.get_rate_limiter(config)
+    assert limiter.get_stats()["granted"]["admin"] == 1
+    # Оценка с резервом на ответ заменена фактическим расходом
+    assert limiter._tokens is not None
+    assert limiter._tokens.tokens == pytest.approx(6000 - 20, abs=1)
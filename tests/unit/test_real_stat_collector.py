@@ -0,0 +1,28 @@
+"""Unit tests for RealStatCollector LLM usage aggregates"""
+
+import pytest
+
+from src.api.real_stat_collector import RealStatCollector
+from src.database import Database
+from src.llm_usage import LLMUsage
+from src.message_repository import MessageRepository
+
+
+@pytest.mark.asyncio
+async def test_stats_aggregate_llm_usage(test_database: Database, message_repository: MessageRepository) -> None:
+    """Тест: /stats суммирует токены и задержку ответов LLM и строит топ по расходу"""
+    await message_repository.add_message(1, "user", "Привет")
+    await message_repository.add_message(1, "assistant", "Ответ", LLMUsage("m", 100, 20, latency_ms=800, ttft_ms=200))
+    await message_repository.add_message(2, "user", "Вопрос")
+    await message_repository.add_message(2, "assistant", "Ответ", LLMUsage("m", 10, 5, latency_ms=400))
+
+    stats = await RealStatCollector(test_database).get_stats("day")
+
+    assert stats.llm_usage is not None
+    assert stats.llm_usage.responses == 2
+    assert stats.llm_usage.prompt_tokens == 110
+    assert stats.llm_usage.completion_tokens == 25
+    assert stats.llm_usage.avg_latency_ms == 600.0
+    assert stats.llm_usage.max_latency_ms == 800
+    assert stats.llm_usage.avg_ttft_ms == 200.0
+    assert [(u.user_id, u.total_tokens) for u in stats.top_token_users] == [(1, 120), (2, 15)]
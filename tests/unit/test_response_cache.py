@@ -0,0 +1,91 @@
+"""Unit tests for ResponseCache class"""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.response_cache import ResponseCache
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self) -> None:
+        """Инициализация часов"""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Текущее время"""
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_hit_and_ttl(logger: MagicMock) -> None:
+    """Тест: запись возвращается из памяти до истечения TTL"""
+    clock = FakeClock()
+    cache = ResponseCache("", ttl_seconds=60, memory_entries=10, max_entries=10, logger=logger, clock=clock)
+
+    assert await cache.get("key") is None
+    await cache.set("key", "SELECT 1")
+    assert await cache.get("key") == "SELECT 1"
+
+    clock.now += 61
+    assert await cache.get("key") is None
+    assert cache.get_stats()["memory_hits"] == 1
+    assert cache.get_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used(logger: MagicMock) -> None:
+    """Тест: при переполнении памяти вытесняется давно не использованная запись"""
+    cache = ResponseCache("", ttl_seconds=60, memory_entries=2, max_entries=10, logger=logger)
+
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.get("a")
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert cache.get_stats()["memory_evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path: Path, logger: MagicMock) -> None:
+    """Тест: запись из файла доступна новому экземпляру кэша"""
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, ttl_seconds=60, memory_entries=10, max_entries=10, logger=logger)
+    await cache.set("key", "SELECT 1")
+    await cache.close()
+
+    restarted = ResponseCache(path, ttl_seconds=60, memory_entries=10, max_entries=10, logger=logger)
+    try:
+        assert await restarted.get("key") == "SELECT 1"
+        assert await restarted.get("key") == "SELECT 1"
+        stats = restarted.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+    finally:
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_evicts_over_limit_and_expired(tmp_path: Path, logger: MagicMock) -> None:
+    """Тест: файл кэша ограничен по количеству записей и не отдаёт устаревшие"""
+    clock = FakeClock()
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, ttl_seconds=60, memory_entries=1, max_entries=2, logger=logger, clock=clock)
+    try:
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            await cache.set(key, key.upper())
+
+        assert cache.get_stats()["disk_evictions"] == 1
+        assert await cache.get("a") is None
+        assert await cache.get("b") == "B"
+
+        clock.now += 61
+        assert await cache.get("c") is None
+    finally:
+        await cache.close()
@@ -0,0 +1,46 @@
+"""Тесты для консистентного хеширования пользователей по воркерам"""
+
+import pytest
+
+from src.sharding import HashRing, update_user_id
+
+
+def test_hash_ring_is_deterministic_and_uses_all_workers() -> None:
+    """Тест: пользователь всегда попадает в один воркер, нагрузка распределяется по всем"""
+    ring = HashRing(4)
+
+    assignments = [ring.node_for(user_id) for user_id in range(10000)]
+
+    same_ring = HashRing(4)
+    assert assignments == [same_ring.node_for(user_id) for user_id in range(10000)]
+    counts = [assignments.count(node) for node in range(4)]
+    assert min(counts) > 1500
+
+
+def test_hash_ring_moves_few_users_when_worker_added() -> None:
+    """Тест: при добавлении воркера переезжает только часть пользователей, и только на новый воркер"""
+    before = HashRing(4)
+    after = HashRing(5)
+
+    moved = [user_id for user_id in range(10000) if before.node_for(user_id) != after.node_for(user_id)]
+
+    assert len(moved) < 3000
+    assert all(after.node_for(user_id) == 4 for user_id in moved)
+
+
+def test_hash_ring_requires_workers() -> None:
+    """Тест: кольцо без воркеров не создаётся"""
+    with pytest.raises(ValueError):
+        HashRing(0)
+
+
+def test_update_user_id_from_sender_or_chat() -> None:
+    """Тест: ID пользователя берётся из отправителя, для обновлений без него - из чата"""
+    message = {"update_id": 1, "message": {"from": {"id": 7}, "chat": {"id": -100}}}
+    callback = {"update_id": 2, "callback_query": {"id": "q", "from": {"id": 8}}}
+    channel_post = {"update_id": 3, "channel_post": {"chat": {"id": -200}}}
+
+    assert update_user_id(message) == 7
+    assert update_user_id(callback) == 8
+    assert update_user_id(channel_post) == -200
+    assert update_user_id({"update_id": 4}) is None
@@ -0,0 +1,107 @@
+"""Unit tests for SingleFlight class"""
+
+import asyncio
+
+import pytest
+
+from src.singleflight import SingleFlight, fingerprint
+
+
+def test_fingerprint_ignores_key_order() -> None:
+    """Тест: отпечаток не зависит от порядка ключей и различает содержимое"""
+    first = fingerprint({"model": "m", "messages": [{"role": "user", "content": "привет"}]})
+    second = fingerprint({"messages": [{"content": "привет", "role": "user"}], "model": "m"})
+    other = fingerprint({"model": "m", "messages": [{"role": "user", "content": "пока"}]})
+
+    assert first == second
+    assert first != other
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    """Тест: одновременные вызовы с одним ключом выполняются один раз"""
+    flight: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def fn() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", fn) for _ in range(3)))
+
+    assert results == ["result"] * 3
+    assert calls == 1
+    assert flight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 2, "cancelled": 0}
+
+    # Завершённый вызов не кэшируется: следующий выполняется заново
+    await flight.do("key", fn)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_is_shared_by_all_waiters() -> None:
+    """Тест: ошибка общего вызова получают все ожидающие"""
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def fn() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", fn), flight.do("key", fn), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_shared_call() -> None:
+    """Тест: отмена одного ожидающего не прерывает вызов для остальных"""
+    flight: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn() -> str:
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(flight.do("key", fn))
+    second = asyncio.create_task(flight.do("key", fn))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "result"
+    assert first.cancelled()
+    assert flight.get_stats()["cancelled"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_call_cancelled_when_all_waiters_cancelled() -> None:
+    """Тест: общий вызов отменяется, когда отменены все ожидающие"""
+    flight: SingleFlight[str] = SingleFlight()
+    started = asyncio.Event()
+    cancelled = False
+
+    async def fn() -> str:
+        nonlocal cancelled
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return "result"
+
+    tasks = [asyncio.create_task(flight.do("key", fn)) for _ in range(2)]
+    await started.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert cancelled
+    assert flight.get_stats()["cancelled"] == 1
+    assert flight.in_flight == 0
@@ -0,0 +1,121 @@
+"""Тесты для ThrottlingMiddleware"""
+
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Message
+
+from src.config import Config
+from src.throttling import THROTTLED_MESSAGE, ThrottlingMiddleware
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _message(user_id: int, text: str) -> MagicMock:
+    """Мокированное сообщение Telegram"""
+    message = MagicMock(spec=Message)
+    message.from_user = MagicMock(id=user_id)
+    message.text = text
+    message.answer = AsyncMock()
+    return message
+
+
+@pytest.fixture
+def throttle_config(config: Config) -> Config:
+    """Fixture для конфигурации с маленькими лимитами: 2 сообщения подряд, 6 в минуту"""
+    config.THROTTLE_TEXT_PER_MINUTE = 6
+    config.THROTTLE_TEXT_BURST = 2
+    config.THROTTLE_COMMAND_PER_MINUTE = 60
+    config.THROTTLE_COMMAND_BURST = 1
+    config.THROTTLE_MODE = "drop"
+    return config
+
+
+async def _feed(middleware: ThrottlingMiddleware, message: MagicMock) -> bool:
+    """Пропустить сообщение через middleware
+
+    Returns:
+        True, если сообщение дошло до обработчика
+    """
+    handler = AsyncMock(return_value="handled")
+    data: dict[str, Any] = {}
+    result = await middleware(handler, message, data)
+    return result == "handled"
+
+
+@pytest.mark.asyncio
+async def test_drops_text_over_burst_and_notifies_once(throttle_config: Config, logger: MagicMock) -> None:
+    """Тест: сообщения сверх ёмкости отбрасываются, предупреждение отправляется один раз за серию"""
+    clock = FakeClock()
+    middleware = ThrottlingMiddleware(throttle_config, logger, clock)
+    message = _message(1, "hello")
+
+    results = [await _feed(middleware, message) for _ in range(4)]
+
+    assert results == [True, True, False, False]
+    message.answer.assert_awaited_once_with(THROTTLED_MESSAGE)
+    assert middleware.get_stats()["dropped"] == {"command": 0, "text": 2}
+
+    # Через 10 секунд накопился один токен (6 в минуту)
+    clock.now += 10
+    assert await _feed(middleware, message)
+
+
+@pytest.mark.asyncio
+async def test_commands_and_users_limited_separately(throttle_config: Config, logger: MagicMock) -> None:
+    """Тест: команды и текст, а также разные пользователи не расходуют общие токены"""
+    middleware = ThrottlingMiddleware(throttle_config, logger, FakeClock())
+
+    assert await _feed(middleware, _message(1, "/start"))
+    assert not await _feed(middleware, _message(1, "/role"))
+    assert await _feed(middleware, _message(1, "text"))
+    assert await _feed(middleware, _message(2, "/start"))
+
+
+@pytest.mark.asyncio
+async def test_defer_mode_delays_instead_of_dropping(
+    throttle_config: Config, logger: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест: в режиме defer лишнее сообщение ждёт токен, если ожидание не больше максимального"""
+    throttle_config.THROTTLE_MODE = "defer"
+    throttle_config.THROTTLE_MAX_DEFER_SECONDS = 15
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+
+    monkeypatch.setattr("src.throttling.asyncio.sleep", fake_sleep)
+    middleware = ThrottlingMiddleware(throttle_config, logger, FakeClock())
+    message = _message(1, "hello")
+
+    results = [await _feed(middleware, message) for _ in range(4)]
+
+    # Третье ждёт 10 с, четвёртое - 20 с (больше максимума) и отбрасывается
+    assert results == [True, True, True, False]
+    assert sleeps == [pytest.approx(10)]
+    assert middleware.get_stats()["deferred"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_buckets_are_evicted(throttle_config: Config, logger: MagicMock) -> None:
+    """Тест: корзины неактивных пользователей удаляются"""
+    clock = FakeClock()
+    middleware = ThrottlingMiddleware(throttle_config, logger, clock)
+    for user_id in range(100):
+        await _feed(middleware, _message(user_id, "hello"))
+    assert middleware.get_stats()["tracked"] == 100
+
+    clock.now += middleware.idle_seconds + 60
+    await _feed(middleware, _message(1000, "hello"))
+
+    assert middleware.get_stats()["tracked"] == 1
+    assert middleware.get_stats()["evicted"] == 100